@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Catálogo de backups (metadados indexados no banco de configuração)
+"""
+
+import os
+import sqlite3
+
+class BackupCatalog:
+    def __init__(self, logger):
+        """Inicializar catálogo de backups"""
+        self.logger = logger
+        self.config_db_path = os.path.join("config", "replicator.db")
+        self._init_catalog_tables()
+    
+    def _init_catalog_tables(self):
+        """Inicializar tabelas do catálogo de backups"""
+        try:
+            os.makedirs(os.path.dirname(self.config_db_path), exist_ok=True)
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            # Um registro por backup
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS backup_catalog (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    backup_name TEXT UNIQUE NOT NULL,
+                    database_name TEXT NOT NULL,
+                    host TEXT NOT NULL,
+                    port INTEGER,
+                    schema_fingerprint TEXT NOT NULL,
+                    content_fingerprint TEXT NOT NULL,
+                    table_count INTEGER DEFAULT 0,
+                    total_rows INTEGER DEFAULT 0,
+                    total_bytes INTEGER DEFAULT 0,
+                    duration_seconds REAL,
+                    compression TEXT,
+                    created_at TIMESTAMP NOT NULL
+                )
+            """)
+            
+            # Uma linha por tabela de cada backup (definição e conteúdo)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS backup_catalog_tables (
+                    backup_id INTEGER NOT NULL,
+                    table_name TEXT NOT NULL,
+                    schema_hash TEXT,
+                    data_hash TEXT,
+                    rows INTEGER DEFAULT 0,
+                    bytes INTEGER DEFAULT 0,
+                    PRIMARY KEY (backup_id, table_name),
+                    FOREIGN KEY (backup_id) REFERENCES backup_catalog(id)
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_backup_catalog_database
+                ON backup_catalog (database_name, host, created_at)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_backup_catalog_tables_name
+                ON backup_catalog_tables (table_name, backup_id)
+            """)
+            
+            conn.commit()
+            conn.close()
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao inicializar catálogo de backups: {str(e)}")
+    
+    def register_backup(self, backup_name, manifest, schema_fingerprint, content_fingerprint, tables):
+        """Registrar um backup no catálogo
+        
+        tables é uma lista de dicionários com table_name, schema_hash,
+        data_hash, rows e bytes.
+        """
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                DELETE FROM backup_catalog_tables
+                WHERE backup_id IN (SELECT id FROM backup_catalog WHERE backup_name = ?)
+            """, (backup_name,))
+            cursor.execute("DELETE FROM backup_catalog WHERE backup_name = ?", (backup_name,))
+            
+            cursor.execute("""
+                INSERT INTO backup_catalog
+                (backup_name, database_name, host, port, schema_fingerprint, content_fingerprint,
+                 table_count, total_rows, total_bytes, duration_seconds, compression, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                backup_name, manifest['database'], manifest['host'], manifest.get('port'),
+                schema_fingerprint, content_fingerprint, len(tables),
+                sum(table['rows'] for table in tables), sum(table['bytes'] for table in tables),
+                manifest.get('duration_seconds'), manifest.get('compression'),
+                manifest['created_at'].replace('T', ' ')
+            ))
+            backup_id = cursor.lastrowid
+            
+            cursor.executemany("""
+                INSERT INTO backup_catalog_tables (backup_id, table_name, schema_hash, data_hash, rows, bytes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [
+                (backup_id, table['table_name'], table['schema_hash'], table['data_hash'], table['rows'], table['bytes'])
+                for table in tables
+            ])
+            
+            conn.commit()
+            conn.close()
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao registrar backup no catálogo: {str(e)}")
+            return False
+    
+    def remove_backup(self, backup_name):
+        """Remover um backup do catálogo"""
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                DELETE FROM backup_catalog_tables
+                WHERE backup_id IN (SELECT id FROM backup_catalog WHERE backup_name = ?)
+            """, (backup_name,))
+            cursor.execute("DELETE FROM backup_catalog WHERE backup_name = ?", (backup_name,))
+            
+            conn.commit()
+            conn.close()
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao remover backup do catálogo: {str(e)}")
+            return False
+    
+    def count_backups(self):
+        """Contar backups catalogados"""
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM backup_catalog")
+            count = cursor.fetchone()[0]
+            conn.close()
+            return count
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao consultar catálogo de backups: {str(e)}")
+            return 0
+    
+    def list_backups(self, database_name=None, host=None, limit=100):
+        """Listar backups do catálogo, do mais recente para o mais antigo"""
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            conditions = []
+            params = []
+            if database_name:
+                conditions.append("database_name = ?")
+                params.append(database_name)
+            if host:
+                conditions.append("host = ?")
+                params.append(host)
+            
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            
+            cursor.execute(f"""
+                SELECT * FROM backup_catalog
+                {where_clause}
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, params + [limit])
+            
+            backups = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return backups
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao listar catálogo de backups: {str(e)}")
+            return []
+    
+    def get_latest_backup(self, database_name, host):
+        """Obter o backup mais recente de um banco"""
+        backups = self.list_backups(database_name, host, limit=1)
+        return backups[0] if backups else None
+    
+    def find_backup_before_table_change(self, database_name, host, table_name):
+        """Encontrar o último backup em que a tabela tinha outra definição
+        
+        Compara a definição da tabela no backup mais recente com os backups
+        anteriores e devolve o mais recente com definição diferente (ou sem a
+        tabela), isto é, o ponto de restauração anterior à mudança. Retorna
+        None se a tabela não estiver no backup mais recente.
+        """
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            latest = self.get_latest_backup(database_name, host)
+            if not latest:
+                conn.close()
+                return None
+            
+            cursor.execute("""
+                SELECT schema_hash FROM backup_catalog_tables
+                WHERE backup_id = ? AND table_name = ?
+            """, (latest['id'], table_name))
+            row = cursor.fetchone()
+            current_hash = row['schema_hash'] if row else None
+            
+            # Tabela ausente no backup mais recente: não há definição atual a comparar
+            if current_hash is None:
+                conn.close()
+                return None
+            
+            cursor.execute("""
+                SELECT b.* FROM backup_catalog b
+                LEFT JOIN backup_catalog_tables t
+                  ON t.backup_id = b.id AND t.table_name = ?
+                WHERE b.database_name = ? AND b.host = ?
+                  AND b.created_at < ?
+                  AND (t.schema_hash IS NULL OR t.schema_hash != ?)
+                ORDER BY b.created_at DESC
+                LIMIT 1
+            """, (table_name, database_name, host, latest['created_at'], current_hash))
+            
+            row = cursor.fetchone()
+            conn.close()
+            return dict(row) if row else None
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar no catálogo de backups: {str(e)}")
+            return None
@@ -5,9 +5,36 @@ Configurações de sincronização de dados entre ambientes
 """
 
 import os
+import re
 import json
 import sqlite3
-from datetime import datetime
+import decimal
+from datetime import datetime, date, timedelta
+
+# Colunas adicionadas a data_sync_tables depois da versão inicial (migradas com ALTER TABLE)
+DATA_SYNC_TABLE_COLUMNS = {
+    'watermark_column': "TEXT",  # coluna de marca d'água da sincronização incremental
+    'propagate_deletes': "INTEGER DEFAULT 0",  # remover no destino as linhas excluídas na origem
+    'row_filter': "TEXT",  # predicado WHERE que restringe as linhas sincronizadas
+    'full_sync_mode': "TEXT DEFAULT 'replace'"  # modo da sincronização completa (FULL_SYNC_MODES)
+}
+
+# Modos da sincronização completa: DELETE + INSERT na tabela, carga em
+# tabela sombra seguida de troca atômica (RENAME TABLE), ou upsert sobre as
+# linhas existentes, sem limpar o destino
+FULL_SYNC_MODES = ('replace', 'swap', 'merge')
+
+# Tabelas que versões anteriores nunca limpavam na sincronização completa;
+# ao migrar o banco de configuração elas passam ao modo 'merge'
+LEGACY_MERGE_TABLES = ('users', 'user_passwords', 'permissions', 'roles', 'processes', 'log_actions', 'log_requests')
+
+# Versão do formato da chave gravada em data_sync_checkpoints (ver _encode_checkpoint_key)
+CHECKPOINT_KEY_FORMAT = 1
+
+# Trechos recusados no filtro de linhas: o filtro deve ser um único predicado.
+# Só valem fora de literais e identificadores entre aspas (code LIKE '#%' é válido)
+ROW_FILTER_FORBIDDEN = (';', '--', '/*', '#')
+ROW_FILTER_QUOTED = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`(?:[^`]|``)*`", re.DOTALL)
 
 class DataSyncConfig:
     def __init__(self, logger):
@@ -36,6 +63,34 @@ class DataSyncConfig:
                 )
             """)
             
+            # Bancos criados por versões anteriores: adicionar as colunas novas
+            cursor.execute("PRAGMA table_info(data_sync_tables)")
+            existing_columns = {row[1] for row in cursor.fetchall()}
+            for column_name, column_type in DATA_SYNC_TABLE_COLUMNS.items():
+                if column_name not in existing_columns:
+                    cursor.execute(f"ALTER TABLE data_sync_tables ADD COLUMN {column_name} {column_type}")
+            
+            # Migrações de dados já aplicadas (cada uma roda uma única vez)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS data_sync_migrations (
+                    name TEXT PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Tabelas críticas da versão anterior: de 'replace' (que agora limpa
+            # a tabela) para 'merge', inclusive em bancos em que a coluna
+            # full_sync_mode já existia
+            cursor.execute("SELECT 1 FROM data_sync_migrations WHERE name = 'legacy_merge_tables'")
+            if not cursor.fetchone():
+                placeholders = ', '.join(['?'] * len(LEGACY_MERGE_TABLES))
+                cursor.execute(f"""
+                    UPDATE data_sync_tables SET full_sync_mode = 'merge'
+                    WHERE LOWER(table_name) IN ({placeholders})
+                      AND COALESCE(full_sync_mode, 'replace') = 'replace'
+                """, LEGACY_MERGE_TABLES)
+                cursor.execute("INSERT INTO data_sync_migrations (name) VALUES ('legacy_merge_tables')")
+            
             # Tabela para configurações específicas de colunas
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS data_sync_columns (
@@ -66,23 +121,76 @@ class DataSyncConfig:
                 )
             """)
             
+            # Tabela para pontos de retomada (última chave gravada de cada tabela)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS data_sync_checkpoints (
+                    table_name TEXT NOT NULL,
+                    sync_direction TEXT NOT NULL,
+                    sync_type TEXT NOT NULL,
+                    last_key TEXT,
+                    rows_copied INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (table_name, sync_direction)
+                )
+            """)
+            
+            # Índices removidos do destino pelo perfil de carga e ainda não recriados
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS data_sync_deferred_indexes (
+                    table_name TEXT NOT NULL,
+                    sync_direction TEXT NOT NULL,
+                    index_clauses TEXT NOT NULL,  -- JSON: cláusulas ADD KEY
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (table_name, sync_direction)
+                )
+            """)
+            
+            # Tabela para marcas d'água da sincronização incremental
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS data_sync_watermarks (
+                    table_name TEXT NOT NULL,
+                    sync_direction TEXT NOT NULL,
+                    watermark_column TEXT NOT NULL,
+                    watermark_value TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (table_name, sync_direction)
+                )
+            """)
+            
             conn.commit()
             conn.close()
             
         except Exception as e:
             self.logger.error(f"Erro ao inicializar tabelas de sincronização: {str(e)}")
     
-    def add_sync_table(self, table_name, description="", sync_type="full", primary_key="id"):
-        """Adicionar tabela para sincronização de dados"""
+    def add_sync_table(self, table_name, description="", sync_type="full", primary_key="id", watermark_column=None,
+                       propagate_deletes=False, row_filter=None, full_sync_mode='replace'):
+        """Adicionar tabela para sincronização de dados
+        
+        row_filter é um predicado SQL (sem o WHERE) aplicado às leituras da
+        origem; na sincronização completa, só as linhas do filtro são
+        substituídas no destino.
+        """
+        row_filter = (row_filter or '').strip() or None
+        if row_filter and not self._is_single_predicate(row_filter):
+            self.logger.error(f"Filtro de linhas inválido para '{table_name}': use um único predicado, sem ';' ou comentários")
+            return False
+        
+        if full_sync_mode not in FULL_SYNC_MODES:
+            self.logger.error(f"Modo de sincronização completa não suportado: {full_sync_mode}")
+            return False
+        
         try:
             conn = sqlite3.connect(self.config_db_path)
             cursor = conn.cursor()
             
             cursor.execute("""
                 INSERT OR REPLACE INTO data_sync_tables 
-                (table_name, description, sync_type, primary_key_column, updated_at)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (table_name, description, sync_type, primary_key))
+                (table_name, description, sync_type, primary_key_column, watermark_column, propagate_deletes, row_filter,
+                 full_sync_mode, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (table_name, description, sync_type, primary_key, watermark_column, 1 if propagate_deletes else 0, row_filter,
+                  full_sync_mode))
             
             conn.commit()
             conn.close()
@@ -94,14 +202,26 @@ class DataSyncConfig:
             self.logger.error(f"Erro ao adicionar tabela para sincronização: {str(e)}")
             return False
     
+    def _is_single_predicate(self, row_filter):
+        """Verificar se o filtro não tem ';' nem comentários fora dos literais
+        
+        Literais sem fechamento também são recusados: o resto do filtro
+        ficaria dentro da string e não seria verificado.
+        """
+        code = ROW_FILTER_QUOTED.sub(' ', row_filter)
+        return not any(token in code for token in ROW_FILTER_FORBIDDEN + ("'", '"', '`'))
+    
     def remove_sync_table(self, table_name):
         """Remover tabela da sincronização de dados"""
         try:
             conn = sqlite3.connect(self.config_db_path)
             cursor = conn.cursor()
             
-            # Remover configurações de colunas
+            # Remover configurações de colunas, pontos de retomada e marcas d'água
             cursor.execute("DELETE FROM data_sync_columns WHERE table_name = ?", (table_name,))
+            cursor.execute("DELETE FROM data_sync_checkpoints WHERE table_name = ?", (table_name,))
+            cursor.execute("DELETE FROM data_sync_deferred_indexes WHERE table_name = ?", (table_name,))
+            cursor.execute("DELETE FROM data_sync_watermarks WHERE table_name = ?", (table_name,))
             
             # Remover tabela
             cursor.execute("DELETE FROM data_sync_tables WHERE table_name = ?", (table_name,))
@@ -123,7 +243,8 @@ class DataSyncConfig:
             cursor = conn.cursor()
             
             cursor.execute("""
-                SELECT table_name, description, sync_type, primary_key_column, active, created_at
+                SELECT table_name, description, sync_type, primary_key_column, active, created_at, watermark_column,
+                       propagate_deletes, row_filter, full_sync_mode
                 FROM data_sync_tables
                 ORDER BY table_name
             """)
@@ -138,7 +259,11 @@ class DataSyncConfig:
                     'sync_type': row[2],
                     'primary_key': row[3],
                     'active': bool(row[4]),
-                    'created_at': row[5]
+                    'created_at': row[5],
+                    'watermark_column': row[6],
+                    'propagate_deletes': bool(row[7]),
+                    'row_filter': row[8],
+                    'full_sync_mode': row[9] or 'replace'
                 }
                 for row in tables
             ]
@@ -154,7 +279,8 @@ class DataSyncConfig:
             cursor = conn.cursor()
             
             cursor.execute("""
-                SELECT table_name, sync_type, primary_key_column
+                SELECT table_name, sync_type, primary_key_column, watermark_column, propagate_deletes, row_filter,
+                       full_sync_mode
                 FROM data_sync_tables
                 WHERE active = 1
                 ORDER BY table_name
@@ -167,7 +293,11 @@ class DataSyncConfig:
                 {
                     'table_name': row[0],
                     'sync_type': row[1],
-                    'primary_key': row[2]
+                    'primary_key': row[2],
+                    'watermark_column': row[3],
+                    'propagate_deletes': bool(row[4]),
+                    'row_filter': row[5],
+                    'full_sync_mode': row[6] or 'replace'
                 }
                 for row in tables
             ]
@@ -394,3 +524,257 @@ class DataSyncConfig:
         except Exception as e:
             self.logger.error(f"Erro ao obter histórico: {str(e)}")
             return []
+    
+    def get_sync_checkpoint(self, table_name, sync_direction, sync_type, max_age_hours=None):
+        """Obter o ponto de retomada de uma sincronização interrompida
+        
+        Retorna None se não houver checkpoint ou se ele for de outro tipo de
+        sincronização. Checkpoints mais antigos que max_age_hours, ou gravados
+        em um formato anterior (chave sem tipo), são descartados: a
+        sincronização recomeça do início.
+        """
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT sync_type, last_key, rows_copied, updated_at,
+                       (julianday('now') - julianday(updated_at)) * 24
+                FROM data_sync_checkpoints
+                WHERE table_name = ? AND sync_direction = ?
+            """, (table_name, sync_direction))
+            
+            row = cursor.fetchone()
+            conn.close()
+            
+            if not row or row[0] != sync_type:
+                return None
+            
+            if max_age_hours is not None and row[4] > max_age_hours:
+                self.logger.warning(
+                    f"Checkpoint de '{table_name}' gravado em {row[3]} (há mais de {max_age_hours}h) descartado; "
+                    f"a sincronização recomeça do início"
+                )
+                self.clear_sync_checkpoint(table_name, sync_direction)
+                return None
+            
+            stored = json.loads(row[1]) if row[1] is not None else None
+            if not isinstance(stored, dict) or stored.get('format') != CHECKPOINT_KEY_FORMAT:
+                self.logger.warning(f"Checkpoint de '{table_name}' em formato anterior descartado")
+                self.clear_sync_checkpoint(table_name, sync_direction)
+                return None
+            
+            return {
+                'last_key': self._decode_checkpoint_key(stored['key']),
+                'rows_copied': row[2],
+                'updated_at': row[3]
+            }
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao obter checkpoint de sincronização: {str(e)}")
+            return None
+    
+    def save_sync_checkpoint(self, table_name, sync_direction, sync_type, last_key, rows_copied):
+        """Gravar a última chave confirmada no destino
+        
+        A chave é gravada com o tipo (ver _encode_checkpoint_key). Chaves de
+        um tipo que não pode ser restaurado sem perda não são gravadas:
+        retomar a partir de um valor convertido pularia linhas. Retorna False
+        nesse caso ou se a gravação falhar.
+        """
+        try:
+            encoded_key = self._encode_checkpoint_key(last_key)
+        except TypeError as e:
+            self.logger.warning(f"Checkpoint de '{table_name}' não gravado: {str(e)}")
+            return False
+        
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT OR REPLACE INTO data_sync_checkpoints
+                (table_name, sync_direction, sync_type, last_key, rows_copied, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (
+                table_name, sync_direction, sync_type,
+                json.dumps({'format': CHECKPOINT_KEY_FORMAT, 'key': encoded_key}),
+                rows_copied
+            ))
+            
+            conn.commit()
+            conn.close()
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar checkpoint de sincronização: {str(e)}")
+            return False
+    
+    def _encode_checkpoint_key(self, value):
+        """Converter uma chave (possivelmente composta) em JSON que preserva o tipo
+        
+        Texto, números e NULL são gravados como estão; bytes, Decimal, datas
+        e TIME viram {"t": tipo, "v": valor}. Outros tipos geram TypeError.
+        """
+        if value is None or isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return value
+        
+        if isinstance(value, (list, tuple)):
+            return [self._encode_checkpoint_key(item) for item in value]
+        
+        if isinstance(value, (bytes, bytearray)):
+            return {'t': 'bytes', 'v': bytes(value).hex()}
+        
+        if isinstance(value, decimal.Decimal):
+            return {'t': 'decimal', 'v': str(value)}
+        
+        if isinstance(value, datetime):
+            return {'t': 'datetime', 'v': value.isoformat()}
+        
+        if isinstance(value, date):
+            return {'t': 'date', 'v': value.isoformat()}
+        
+        if isinstance(value, timedelta):
+            return {'t': 'time', 'v': [value.days, value.seconds, value.microseconds]}
+        
+        raise TypeError(f"chave do tipo {type(value).__name__} não suportada")
+    
+    def _decode_checkpoint_key(self, value):
+        """Restaurar uma chave gravada por _encode_checkpoint_key"""
+        if isinstance(value, list):
+            return [self._decode_checkpoint_key(item) for item in value]
+        
+        if not isinstance(value, dict):
+            return value
+        
+        decoders = {
+            'bytes': bytes.fromhex,
+            'decimal': decimal.Decimal,
+            'datetime': datetime.fromisoformat,
+            'date': date.fromisoformat,
+            'time': lambda parts: timedelta(days=parts[0], seconds=parts[1], microseconds=parts[2])
+        }
+        return decoders[value['t']](value['v'])
+    
+    def clear_sync_checkpoint(self, table_name, sync_direction):
+        """Remover o ponto de retomada de uma sincronização concluída"""
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "DELETE FROM data_sync_checkpoints WHERE table_name = ? AND sync_direction = ?",
+                (table_name, sync_direction)
+            )
+            
+            conn.commit()
+            conn.close()
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao remover checkpoint de sincronização: {str(e)}")
+    
+    def get_deferred_indexes(self, table_name, sync_direction):
+        """Obter as cláusulas dos índices adiados que ainda não foram recriados"""
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT index_clauses FROM data_sync_deferred_indexes
+                WHERE table_name = ? AND sync_direction = ?
+            """, (table_name, sync_direction))
+            
+            row = cursor.fetchone()
+            conn.close()
+            
+            return json.loads(row[0]) if row else []
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao obter índices adiados: {str(e)}")
+            return []
+    
+    def save_deferred_indexes(self, table_name, sync_direction, index_clauses):
+        """Registrar os índices que serão removidos do destino durante a carga
+        
+        Retorna False se o registro falhar: nesse caso os índices não devem
+        ser removidos.
+        """
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT OR REPLACE INTO data_sync_deferred_indexes
+                (table_name, sync_direction, index_clauses, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            """, (table_name, sync_direction, json.dumps(index_clauses)))
+            
+            conn.commit()
+            conn.close()
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao registrar índices adiados: {str(e)}")
+            return False
+    
+    def clear_deferred_indexes(self, table_name, sync_direction):
+        """Remover o registro dos índices adiados depois de recriados"""
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "DELETE FROM data_sync_deferred_indexes WHERE table_name = ? AND sync_direction = ?",
+                (table_name, sync_direction)
+            )
+            
+            conn.commit()
+            conn.close()
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao remover registro de índices adiados: {str(e)}")
+    
+    def get_sync_watermark(self, table_name, sync_direction, watermark_column):
+        """Obter a marca d'água da última sincronização incremental
+        
+        Retorna None se ainda não houver marca ou se ela for de outra coluna.
+        """
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT watermark_column, watermark_value
+                FROM data_sync_watermarks
+                WHERE table_name = ? AND sync_direction = ?
+            """, (table_name, sync_direction))
+            
+            row = cursor.fetchone()
+            conn.close()
+            
+            if not row or row[0] != watermark_column or row[1] is None:
+                return None
+            
+            return json.loads(row[1])
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao obter marca d'água de sincronização: {str(e)}")
+            return None
+    
+    def save_sync_watermark(self, table_name, sync_direction, watermark_column, watermark_value):
+        """Gravar a marca d'água alcançada por uma sincronização incremental"""
+        try:
+            conn = sqlite3.connect(self.config_db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT OR REPLACE INTO data_sync_watermarks
+                (table_name, sync_direction, watermark_column, watermark_value, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (table_name, sync_direction, watermark_column, json.dumps(watermark_value, default=str)))
+            
+            conn.commit()
+            conn.close()
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar marca d'água de sincronização: {str(e)}")
@@ -0,0 +1,759 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de backup nativo (estrutura + dados) com leitura em streaming
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import hashlib
+import shutil
+import datetime
+import threading
+import pymysql
+import pymysql.cursors
+from concurrent.futures import ThreadPoolExecutor
+from database.dump_format import DumpFormat, BINARY_DATA_TYPES
+from database.object_store import ObjectStore, GC_GRACE_SECONDS
+from config.backup_catalog import BackupCatalog
+
+INTEGER_DATA_TYPES = {'tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint'}
+
+class BackupEngine:
+    def __init__(self, logger, backups_dir="backups", compression='gzip', workers=4,
+                 fetch_size=10000, chunk_rows=1000000, chunk_bytes=256 * 1024 * 1024,
+                 split_rows=2000000, size_budget_mb=None):
+        """Inicializar motor de backup"""
+        self.logger = logger
+        self.backups_dir = backups_dir
+        self.objects = ObjectStore(os.path.join(backups_dir, 'objects'))
+        self.size_budget_mb = size_budget_mb
+        self.catalog = BackupCatalog(logger)
+        self.format = DumpFormat(compression)
+        self.workers = workers
+        self.fetch_size = fetch_size
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+        self.split_rows = split_rows
+        
+        if self.format.compression != compression:
+            self.logger.warning(f"Compressão '{compression}' indisponível, usando '{self.format.compression}'")
+        
+        if self.catalog.count_backups() == 0:
+            self._import_into_catalog()
+    
+    def create_backup(self, connection_details):
+        """Criar backup completo (estrutura + dados) do banco
+        
+        Os dados são gravados em paralelo por N workers, um arquivo por tabela
+        ou por faixa da chave primária nas tabelas grandes. Cada worker lê com
+        um cursor sem buffer (SSCursor) e grava blocos comprimidos no formato
+        do LOAD DATA, então o uso de memória não depende do tamanho das
+        tabelas. Todos os workers compartilham o mesmo ponto no tempo
+        (snapshot aberto sob FLUSH TABLES WITH READ LOCK); sem o privilégio
+        para o bloqueio, cada tabela é lida com seu próprio snapshot.
+        
+        Arquivos de dados e DDLs são gravados no repositório de objetos
+        endereçado por sha256 (ObjectStore), então tabelas sem mudança não
+        ocupam espaço novo; as que mantêm a definição e o sinal de alteração
+        do último backup nem são lidas. O diretório do backup guarda apenas o
+        manifest.json, com os objetos, linhas e bytes de cada tabela.
+        Retorna o diretório do backup, ou None em caso de erro.
+        """
+        database = connection_details['database']
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        backup_path = os.path.join(self.backups_dir, f"backup_{database}_{timestamp}")
+        
+        connection = self._create_connection(connection_details)
+        if not connection:
+            return None
+        
+        worker_connections = []
+        
+        try:
+            self.logger.info(f"Criando backup: {backup_path}")
+            started_at = time.time()
+            os.makedirs(backup_path, exist_ok=True)
+            
+            manifest = {
+                'format': 3,
+                'database': database,
+                'host': connection_details['host'],
+                'port': connection_details['port'],
+                'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'compression': self.format.compression,
+                'snapshot': None,
+                'workers': 0,
+                'tables': {},
+                'views': [],
+                'triggers': []
+            }
+            
+            # Sinais lidos antes do snapshot: escritas confirmadas depois mudam o sinal do próximo backup
+            with connection.cursor() as cursor:
+                change_signals = self._read_change_signals(cursor, database)
+            connection.commit()
+            
+            latest = self.catalog.get_latest_backup(database, connection_details['host'])
+            latest_manifest = self._read_backup_manifest(latest['backup_name']) if latest else None
+            
+            worker_connections, snapshot = self._open_worker_snapshots(connection, connection_details)
+            if not worker_connections:
+                self.logger.error("Falha ao abrir conexões dos workers de backup")
+                shutil.rmtree(backup_path, ignore_errors=True)
+                return None
+            
+            manifest['snapshot'] = snapshot
+            manifest['workers'] = len(worker_connections)
+            
+            with connection.cursor() as cursor:
+                tables, views, estimated_rows = self._list_objects(cursor, database)
+                columns_by_table = self._load_columns(cursor, database)
+                integer_keys = self._load_integer_primary_keys(cursor, database)
+                
+                for table_name in tables:
+                    cursor.execute(f"SHOW CREATE TABLE `{table_name}`")
+                    columns = columns_by_table.get(table_name, [])
+                    
+                    manifest['tables'][table_name] = {
+                        'schema': self._write_statement(self._strip_auto_increment(cursor.fetchone()[1])),
+                        'columns': [name for name, _ in columns],
+                        'hex_columns': [index for index, (_, data_type) in enumerate(columns) if data_type in BINARY_DATA_TYPES],
+                        'change_signal': change_signals.get(table_name),
+                        'rows': 0,
+                        'bytes': 0,
+                        'files': []
+                    }
+                
+                reused_tables = self._reuse_unchanged_tables(manifest, latest_manifest)
+                if reused_tables:
+                    self.logger.info(
+                        f"{len(reused_tables)} tabelas sem alterações desde o backup {latest['backup_name']}: dados reaproveitados"
+                    )
+                
+                for view_name in views:
+                    cursor.execute(f"SHOW CREATE VIEW `{view_name}`")
+                    manifest['views'].append({
+                        'name': view_name,
+                        'object': self._write_statement(cursor.fetchone()[1])
+                    })
+                
+                # Triggers são recriados só depois da carga de dados na restauração
+                cursor.execute("""
+                    SELECT TRIGGER_NAME, EVENT_OBJECT_TABLE
+                    FROM information_schema.TRIGGERS
+                    WHERE TRIGGER_SCHEMA = %s
+                    ORDER BY EVENT_OBJECT_TABLE, ACTION_ORDER
+                """, (database,))
+                
+                for trigger_name, table_name in cursor.fetchall():
+                    cursor.execute(f"SHOW CREATE TRIGGER `{trigger_name}`")
+                    manifest['triggers'].append({
+                        'name': trigger_name,
+                        'table': table_name,
+                        'object': self._write_statement(cursor.fetchone()[2])
+                    })
+                
+                # Faixas de chave só fazem sentido se todos os workers leem o mesmo snapshot
+                tasks = self._plan_tasks(
+                    cursor, [table_name for table_name in tables if table_name not in reused_tables],
+                    estimated_rows, columns_by_table,
+                    integer_keys if snapshot == 'global' else {}
+                )
+            
+            connection.commit()
+            
+            self.logger.info(f"Gravando dados de {len(tables) - len(reused_tables)} tabelas em {len(tasks)} partes com {len(worker_connections)} workers...")
+            results, failed_tasks = self._run_tasks(worker_connections, snapshot, tasks)
+            
+            if failed_tasks:
+                self.logger.error(f"Backup incompleto: falha em {', '.join(failed_tasks)}")
+                shutil.rmtree(backup_path, ignore_errors=True)
+                return None
+            
+            for task, files in sorted(results, key=lambda result: (result[0]['table'], result[0]['part'])):
+                table_manifest = manifest['tables'][task['table']]
+                table_manifest['files'].extend(files)
+                table_manifest['rows'] += sum(entry['rows'] for entry in files)
+                table_manifest['bytes'] += sum(entry['bytes'] for entry in files)
+            
+            manifest['duration_seconds'] = round(time.time() - started_at, 1)
+            catalog_tables, manifest['schema_fingerprint'], manifest['content_fingerprint'] = self._fingerprint(manifest)
+            
+            # Conteúdo idêntico ao último backup do mesmo banco: reaproveitar o existente
+            if latest and latest['content_fingerprint'] == manifest['content_fingerprint']:
+                latest_path = os.path.join(self.backups_dir, latest['backup_name'])
+                if os.path.isfile(os.path.join(latest_path, 'manifest.json')):
+                    shutil.rmtree(backup_path, ignore_errors=True)
+                    self.logger.success(f"Banco sem alterações desde o backup {latest['backup_name']}: backup reaproveitado")
+                    return latest_path
+            
+            self._write_manifest(backup_path, manifest)
+            self.catalog.register_backup(
+                os.path.basename(backup_path), manifest,
+                manifest['schema_fingerprint'], manifest['content_fingerprint'], catalog_tables
+            )
+            
+            total_rows = sum(table['rows'] for table in manifest['tables'].values())
+            total_bytes = sum(table['bytes'] for table in manifest['tables'].values())
+            throughput = total_bytes / manifest['duration_seconds'] / (1024 * 1024) if manifest['duration_seconds'] else 0
+            
+            self.logger.success(
+                f"Backup criado: {backup_path} ({len(tables)} tabelas, {total_rows} registros, "
+                f"{total_bytes} bytes, {manifest['duration_seconds']}s, {throughput:.1f} MB/s)"
+            )
+            
+            self.apply_retention()
+            return backup_path
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao criar backup: {str(e)}")
+            shutil.rmtree(backup_path, ignore_errors=True)
+            return None
+        
+        finally:
+            for worker_connection in worker_connections:
+                worker_connection.close()
+            connection.close()
+    
+    def _open_worker_snapshots(self, coordinator, connection_details):
+        """Abrir as conexões dos workers, todas no mesmo snapshot quando possível
+        
+        O FLUSH TABLES WITH READ LOCK bloqueia escritas só pelo tempo de abrir
+        um START TRANSACTION WITH CONSISTENT SNAPSHOT em cada worker. Retorna
+        (conexões, 'global' | 'per_table').
+        """
+        connections = []
+        for _ in range(max(1, self.workers)):
+            worker_connection = self._create_connection(connection_details)
+            if not worker_connection:
+                for opened in connections:
+                    opened.close()
+                return [], None
+            connections.append(worker_connection)
+        
+        for worker_connection in connections:
+            with worker_connection.cursor() as cursor:
+                self._prepare_session(cursor)
+        
+        with coordinator.cursor() as cursor:
+            try:
+                cursor.execute("FLUSH TABLES WITH READ LOCK")
+            except Exception as e:
+                self.logger.warning(f"Sem FLUSH TABLES WITH READ LOCK ({str(e)}): cada tabela terá seu próprio snapshot")
+                return connections, 'per_table'
+            
+            try:
+                for worker_connection in connections:
+                    with worker_connection.cursor() as worker_cursor:
+                        worker_cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            finally:
+                cursor.execute("UNLOCK TABLES")
+        
+        return connections, 'global'
+    
+    def _prepare_session(self, cursor):
+        """Configurar a sessão de leitura de um worker"""
+        # Valores de TIMESTAMP gravados em UTC, independente do fuso da sessão
+        cursor.execute("SET SESSION time_zone = '+00:00'")
+        # O streaming pode pausar durante a compressão; evitar timeout do servidor
+        cursor.execute("SET SESSION net_write_timeout = 3600")
+        cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    
+    def _list_objects(self, cursor, database):
+        """Listar tabelas base, views e a estimativa de linhas de cada tabela"""
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_TYPE, TABLE_ROWS
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s
+            ORDER BY TABLE_NAME
+        """, (database,))
+        
+        tables = []
+        views = []
+        estimated_rows = {}
+        for table_name, table_type, table_rows in cursor.fetchall():
+            if table_type == 'VIEW':
+                views.append(table_name)
+            else:
+                tables.append(table_name)
+                estimated_rows[table_name] = table_rows or 0
+        
+        return tables, views, estimated_rows
+    
+    def _read_change_signals(self, cursor, database):
+        """Ler o sinal de alteração de cada tabela (UPDATE_TIME e estimativa de linhas)
+        
+        Tabelas sem UPDATE_TIME (InnoDB após reinício do servidor, MariaDB)
+        ou alteradas há menos de um segundo não têm sinal: uma escrita no
+        mesmo segundo não mudaria o UPDATE_TIME, então elas são sempre gravadas.
+        """
+        try:
+            # MySQL 8 mantém as estatísticas do information_schema em cache (24h por padrão)
+            cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+        except pymysql.MySQLError:
+            pass
+        
+        cursor.execute("""
+            SELECT TABLE_NAME, UPDATE_TIME, TABLE_ROWS, UPDATE_TIME < NOW() - INTERVAL 1 SECOND
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+        """, (database,))
+        
+        return {
+            table_name: f"{update_time.isoformat(sep=' ')}/{table_rows}" if update_time and settled else None
+            for table_name, update_time, table_rows, settled in cursor.fetchall()
+        }
+    
+    def _read_backup_manifest(self, backup_name):
+        """Ler o manifesto de um backup do catálogo (None se o diretório não existir mais)"""
+        manifest_path = os.path.join(self.backups_dir, backup_name, 'manifest.json')
+        if not os.path.isfile(manifest_path):
+            return None
+        
+        with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    
+    def _reuse_unchanged_tables(self, manifest, latest_manifest):
+        """Copiar do último backup os objetos de dados das tabelas sem alteração
+        
+        A tabela é reaproveitada quando a definição e o sinal de alteração
+        (ver _read_change_signals) são os mesmos do último backup e todos os
+        seus objetos ainda existem. Retorna os nomes das tabelas reaproveitadas.
+        """
+        if not latest_manifest or latest_manifest.get('compression') != manifest['compression']:
+            return set()
+        
+        reused_tables = set()
+        
+        for table_name, table in manifest['tables'].items():
+            previous = latest_manifest['tables'].get(table_name)
+            if not table['change_signal'] or not previous:
+                continue
+            if previous.get('change_signal') != table['change_signal'] or previous.get('schema') != table['schema']:
+                continue
+            if not all(isinstance(entry, dict) and entry.get('object') for entry in previous['files']):
+                continue
+            if not all(self.objects.reuse(entry['object']) for entry in previous['files']):
+                continue
+            
+            table['files'] = [dict(entry) for entry in previous['files']]
+            table['rows'] = previous.get('rows', 0)
+            table['bytes'] = previous.get('bytes', 0)
+            reused_tables.add(table_name)
+        
+        return reused_tables
+    
+    def _load_columns(self, cursor, database):
+        """Carregar (nome, tipo) das colunas de todas as tabelas com uma única consulta
+        
+        Colunas geradas ficam de fora: o servidor as recalcula na restauração.
+        """
+        cursor.execute("""
+            SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, EXTRA
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, (database,))
+        
+        columns_by_table = {}
+        for table_name, column_name, data_type, extra in cursor.fetchall():
+            if re.search(r'\b(VIRTUAL|STORED|PERSISTENT)( GENERATED)?\b', (extra or '').upper()):
+                continue
+            columns_by_table.setdefault(table_name, []).append((column_name, data_type.lower()))
+        
+        return columns_by_table
+    
+    def _load_integer_primary_keys(self, cursor, database):
+        """Mapear as tabelas cuja chave primária é uma única coluna inteira"""
+        cursor.execute("""
+            SELECT k.TABLE_NAME, MIN(k.COLUMN_NAME), MIN(c.DATA_TYPE), COUNT(*)
+            FROM information_schema.KEY_COLUMN_USAGE k
+            JOIN information_schema.COLUMNS c
+              ON c.TABLE_SCHEMA = k.TABLE_SCHEMA AND c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME
+            WHERE k.TABLE_SCHEMA = %s AND k.CONSTRAINT_NAME = 'PRIMARY'
+            GROUP BY k.TABLE_NAME
+        """, (database,))
+        
+        return {
+            table_name: column_name
+            for table_name, column_name, data_type, column_count in cursor.fetchall()
+            if column_count == 1 and data_type.lower() in INTEGER_DATA_TYPES
+        }
+    
+    def _plan_tasks(self, cursor, tables, estimated_rows, columns_by_table, integer_keys):
+        """Dividir o trabalho em partes: uma por tabela, ou faixas da chave nas tabelas grandes
+        
+        As faixas da primeira e da última parte são abertas, então linhas fora
+        do MIN/MAX lido no planejamento continuam cobertas. As partes maiores
+        vêm primeiro para equilibrar a carga entre os workers.
+        """
+        tasks = []
+        
+        for table_name in tables:
+            columns = [name for name, _ in columns_by_table.get(table_name, [])]
+            if not columns:
+                continue
+            
+            rows = estimated_rows.get(table_name, 0)
+            key = integer_keys.get(table_name)
+            ranges = [("", ())]
+            
+            if key and rows > self.split_rows:
+                cursor.execute(f"SELECT MIN(`{key}`), MAX(`{key}`) FROM `{table_name}`")
+                min_key, max_key = cursor.fetchone()
+                
+                if min_key is not None and max_key > min_key:
+                    parts = -(-rows // self.split_rows)
+                    step = max(1, -(-(max_key - min_key + 1) // parts))
+                    bounds = list(range(min_key + step, max_key + 1, step))
+                    
+                    ranges = []
+                    lower = None
+                    for bound in bounds + [None]:
+                        conditions = []
+                        params = []
+                        if lower is not None:
+                            conditions.append(f"`{key}` >= %s")
+                            params.append(lower)
+                        if bound is not None:
+                            conditions.append(f"`{key}` < %s")
+                            params.append(bound)
+                        ranges.append(("WHERE " + " AND ".join(conditions), tuple(params)))
+                        lower = bound
+            
+            for part, (where_clause, params) in enumerate(ranges, 1):
+                tasks.append({
+                    'table': table_name,
+                    'part': part,
+                    'parts': len(ranges),
+                    'columns': columns,
+                    'where': where_clause,
+                    'params': params,
+                    'estimated_rows': rows / len(ranges)
+                })
+        
+        tasks.sort(key=lambda task: task['estimated_rows'], reverse=True)
+        return tasks
+    
+    def _run_tasks(self, worker_connections, snapshot, tasks):
+        """Executar as partes em paralelo, cada worker com sua própria conexão
+        
+        Retorna ([(parte, arquivos)], [partes com falha]).
+        """
+        task_queue = queue.Queue()
+        for task in tasks:
+            task_queue.put(task)
+        
+        results = []
+        failed_tasks = []
+        lock = threading.Lock()
+        
+        def worker(worker_connection):
+            while True:
+                try:
+                    task = task_queue.get_nowait()
+                except queue.Empty:
+                    return
+                
+                label = f"{task['table']} ({task['part']}/{task['parts']})"
+                
+                try:
+                    if snapshot == 'per_table':
+                        with worker_connection.cursor() as cursor:
+                            cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+                    
+                    files = self._dump_task(worker_connection, task)
+                    
+                    if snapshot == 'per_table':
+                        worker_connection.commit()
+                    
+                    self.logger.info(f"Dados gravados: {label} - {sum(entry['rows'] for entry in files)} registros")
+                    with lock:
+                        results.append((task, files))
+                
+                except Exception as e:
+                    self.logger.error(f"Erro no backup de {label}: {str(e)}")
+                    with lock:
+                        failed_tasks.append(label)
+        
+        with ThreadPoolExecutor(max_workers=len(worker_connections)) as executor:
+            list(executor.map(worker, worker_connections))
+        
+        return results, failed_tasks
+    
+    def _dump_task(self, connection, task):
+        """Gravar os dados de uma parte em blocos comprimidos
+        
+        Um novo bloco é iniciado a cada chunk_rows linhas ou chunk_bytes
+        bytes (não comprimidos). Cada bloco vira um objeto no repositório;
+        retorna a lista de objetos gerados com linhas e bytes de cada um.
+        """
+        table_name = task['table']
+        columns_str = '`, `'.join(task['columns'])
+        
+        files = []
+        writer = None
+        chunk_rows = 0
+        chunk_bytes = 0
+        
+        def close_chunk():
+            writer.close()
+            object_id, size = self.objects.add_file(files[-1].pop('temp_path'))
+            files[-1].update({'object': object_id, 'rows': chunk_rows, 'bytes': size})
+        
+        with connection.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+            stream_cursor.execute(
+                f"SELECT `{columns_str}` FROM `{table_name}` {task['where']}",
+                task['params'] or None
+            )
+            
+            try:
+                while True:
+                    rows = stream_cursor.fetchmany(self.fetch_size)
+                    if not rows:
+                        break
+                    
+                    for row in rows:
+                        if writer is None or chunk_rows >= self.chunk_rows or chunk_bytes >= self.chunk_bytes:
+                            if writer is not None:
+                                close_chunk()
+                            temp_path = self.objects.temp_path()
+                            writer = self.format.open_writer(temp_path)
+                            files.append({'temp_path': temp_path})
+                            chunk_rows = 0
+                            chunk_bytes = 0
+                        
+                        line = self.format.encode_row(row)
+                        writer.write(line)
+                        chunk_rows += 1
+                        chunk_bytes += len(line)
+            
+            finally:
+                if writer is not None and not writer.closed:
+                    close_chunk()
+        
+        return files
+    
+    def _write_statement(self, statement):
+        """Gravar um comando DDL como objeto (um comando por objeto) e retornar seu id"""
+        return self.objects.add_bytes(f"{statement};\n".encode('utf-8'))
+    
+    def _strip_auto_increment(self, create_sql):
+        """Remover o AUTO_INCREMENT=N das opções da tabela
+        
+        O contador muda a cada inserção; mantido no DDL, ele alteraria o
+        hash da definição (e a impressão de estrutura) a cada backup. A
+        restauração já descarta essa opção (ver SchemaCloner.split_create_table).
+        """
+        return re.sub(r' AUTO_INCREMENT=\d+', '', create_sql)
+    
+    def _write_manifest(self, backup_path, manifest):
+        """Gravar o manifesto do backup"""
+        with open(os.path.join(backup_path, 'manifest.json'), 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, ensure_ascii=False)
+    
+    def list_backups(self, database_name=None, host=None, limit=100):
+        """Listar backups pelo catálogo: [(nome, bytes, data de criação)]"""
+        return [
+            (backup['backup_name'], backup['total_bytes'], backup['created_at'])
+            for backup in self.catalog.list_backups(database_name, host, limit)
+            if os.path.isdir(os.path.join(self.backups_dir, backup['backup_name']))
+        ]
+    
+    def _fingerprint(self, manifest):
+        """Calcular as impressões digitais do backup
+        
+        A de estrutura cobre as definições de tabelas, views e triggers; a de
+        conteúdo cobre também os dados de cada tabela. Retorna (linhas por
+        tabela para o catálogo, impressão de estrutura, impressão de conteúdo).
+        """
+        catalog_tables = []
+        schema_digest = hashlib.sha256()
+        content_digest = hashlib.sha256()
+        
+        for table_name in sorted(manifest['tables']):
+            table = manifest['tables'][table_name]
+            schema_hash = table.get('schema') or table.get('schema_file')
+            
+            data_digest = hashlib.sha256()
+            for entry in table['files']:
+                if isinstance(entry, str):
+                    data_digest.update(entry.encode('utf-8'))
+                else:
+                    data_digest.update((entry.get('object') or entry.get('sha256') or entry['file']).encode('utf-8'))
+            data_hash = data_digest.hexdigest()
+            
+            schema_digest.update(f"{table_name}:{schema_hash}\n".encode('utf-8'))
+            content_digest.update(f"{table_name}:{schema_hash}:{data_hash}\n".encode('utf-8'))
+            
+            catalog_tables.append({
+                'table_name': table_name,
+                'schema_hash': schema_hash,
+                'data_hash': data_hash,
+                'rows': table.get('rows', 0),
+                'bytes': table.get('bytes', 0)
+            })
+        
+        for view_or_trigger in manifest.get('views', []) + manifest.get('triggers', []):
+            definition = view_or_trigger.get('object') or view_or_trigger.get('file')
+            schema_digest.update(f"{view_or_trigger['name']}:{definition}\n".encode('utf-8'))
+        
+        schema_fingerprint = schema_digest.hexdigest()
+        content_digest.update(schema_fingerprint.encode('utf-8'))
+        
+        return catalog_tables, schema_fingerprint, content_digest.hexdigest()
+    
+    def _import_into_catalog(self):
+        """Catalogar backups já existentes em disco (primeira execução com o catálogo)"""
+        try:
+            for backup in self._load_backups():
+                manifest = backup['manifest']
+                catalog_tables, schema_fingerprint, content_fingerprint = self._fingerprint(manifest)
+                self.catalog.register_backup(backup['name'], manifest, schema_fingerprint, content_fingerprint, catalog_tables)
+        
+        except Exception as e:
+            self.logger.warning(f"Erro ao catalogar backups existentes: {str(e)}")
+    
+    def apply_retention(self):
+        """Aplicar o limite de espaço (size_budget_mb) aos backups
+        
+        Remove os backups mais antigos (sempre mantendo o mais recente) até
+        que o espaço ocupado pelos objetos ainda referenciados caiba no
+        limite, e então apaga os objetos que ficaram sem referência.
+        """
+        try:
+            backups = sorted(self._load_backups(), key=lambda backup: backup['created_at'])
+            
+            if self.size_budget_mb is not None:
+                self._remove_over_budget(backups, self.size_budget_mb * 1024 * 1024)
+            
+            referenced = set()
+            for backup in backups:
+                referenced |= backup['objects']
+            
+            removed, freed = self.objects.collect_garbage(referenced)
+            if removed:
+                self.logger.info(f"{removed} objetos sem referência removidos ({freed} bytes liberados)")
+        
+        except Exception as e:
+            self.logger.warning(f"Erro ao aplicar retenção de backups: {str(e)}")
+    
+    def _remove_over_budget(self, backups, budget):
+        """Remover os backups mais antigos (da lista e do disco) até caber no limite
+        
+        O tamanho de cada objeto é lido uma única vez e descontado quando o
+        último backup que o referencia sai da lista (objetos compartilhados
+        contam uma vez). Objetos sem referência ainda no período de carência
+        da coleta ficam fora da comparação: só são apagados numa próxima
+        coleta, e contá-los faria a retenção remover backups até sobrar um.
+        """
+        references = {}
+        for backup in backups:
+            for object_id in backup['objects']:
+                references[object_id] = references.get(object_id, 0) + 1
+        
+        sizes = {object_id: self.objects.object_stat(object_id) for object_id in references}
+        size = sum(object_size for object_size, _ in sizes.values()) + sum(backup['own_size'] for backup in backups)
+        cutoff = time.time() - GC_GRACE_SECONDS
+        held = 0
+        
+        while len(backups) > 1 and size > budget:
+            oldest = backups[0]
+            released = [object_id for object_id in oldest['objects'] if references[object_id] == 1]
+            reduction = oldest['own_size'] + sum(sizes[object_id][0] for object_id in released)
+            
+            # Backup sem nada exclusivo: removê-lo não reduz o espaço
+            if not reduction:
+                break
+            
+            backups.pop(0)
+            shutil.rmtree(oldest['path'], ignore_errors=True)
+            self.catalog.remove_backup(oldest['name'])
+            self.logger.info(f"Backup removido pela política de retenção: {oldest['name']}")
+            
+            for object_id in oldest['objects']:
+                references[object_id] -= 1
+            size -= reduction
+            held += sum(object_size for object_size, modified_at in map(sizes.get, released) if modified_at > cutoff)
+        
+        if size > budget:
+            self.logger.warning(
+                f"Backups ocupam {size} bytes, acima do limite de {budget} bytes, sem backups que possam ser removidos"
+            )
+        if held:
+            self.logger.info(f"{held} bytes de objetos sem referência serão liberados após o período de carência")
+    
+    def _load_backups(self):
+        """Ler os manifestos de todos os diretórios de backup
+        
+        Para cada backup retorna nome, caminho, data, tamanho lógico, objetos
+        referenciados e o espaço ocupado pelo próprio diretório (backups de
+        formato anterior guardam os arquivos de dados no diretório).
+        """
+        backups = []
+        
+        if not os.path.exists(self.backups_dir):
+            return backups
+        
+        for entry in os.listdir(self.backups_dir):
+            backup_path = os.path.join(self.backups_dir, entry)
+            manifest_path = os.path.join(backup_path, 'manifest.json')
+            
+            if not os.path.isfile(manifest_path):
+                continue
+            
+            with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+            
+            objects = set()
+            size = 0
+            for table in manifest['tables'].values():
+                if table.get('schema'):
+                    objects.add(table['schema'])
+                for file_info in table['files']:
+                    if isinstance(file_info, dict):
+                        size += file_info.get('bytes', 0)
+                        if file_info.get('object'):
+                            objects.add(file_info['object'])
+            for view_or_trigger in manifest.get('views', []) + manifest.get('triggers', []):
+                if view_or_trigger.get('object'):
+                    objects.add(view_or_trigger['object'])
+            
+            own_size = sum(
+                os.path.getsize(os.path.join(backup_path, file_name))
+                for file_name in os.listdir(backup_path)
+            )
+            
+            backups.append({
+                'name': entry,
+                'path': backup_path,
+                'created_at': manifest['created_at'].replace('T', ' '),
+                'size': size or own_size,
+                'objects': objects,
+                'own_size': own_size,
+                'manifest': manifest
+            })
+        
+        return backups
+    
+    def _create_connection(self, connection_details):
+        """Criar conexão PyMySQL"""
+        try:
+            connection = pymysql.connect(
+                host=connection_details['host'],
+                port=connection_details['port'],
+                user=connection_details['username'],
+                password=connection_details['password'],
+                database=connection_details['database'],
+                charset='utf8mb4',
+                autocommit=False
+            )
+            return connection
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao conectar: {str(e)}")
+            return None
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfil de sessão para cargas em massa (verificações desligadas e índices adiados)
+"""
+
+import re
+import pymysql
+from database.schema_cloner import SchemaCloner
+
+# Nome do índice em uma cláusula "ADD KEY `nome` (...)" gerada por split_create_table
+INDEX_NAME_PATTERN = re.compile(r'^ADD (?:KEY|INDEX) `((?:[^`]|``)+)`')
+
+class BulkLoadProfile:
+    """Ajusta a sessão do destino durante uma carga completa
+    
+    apply() desliga unique_checks e foreign_key_checks (e, com
+    disable_binlog, o sql_log_bin, quando o usuário tiver permissão) e
+    devolve os valores anteriores, que restore() reaplica e confere.
+    
+    defer_indexes() remove os índices secundários de uma tabela vazia ou
+    sombra antes da carga; rebuild_indexes() os recria em um único ALTER
+    TABLE. Só índices comuns (KEY) são adiados: UNIQUE são mantidos (uma
+    duplicidade só seria percebida na reconstrução), FULLTEXT e SPATIAL
+    também (o InnoDB cria um FULLTEXT por ALTER), assim como todos os
+    índices de tabelas com chaves estrangeiras, que podem depender deles.
+    """
+    
+    def __init__(self, logger, disable_binlog=False):
+        """Inicializar perfil de carga"""
+        self.logger = logger
+        self.disable_binlog = disable_binlog
+        self.schema_cloner = SchemaCloner(logger)
+    
+    def apply(self, cursor):
+        """Configurar a sessão para a carga e retornar os valores anteriores"""
+        variables = ['unique_checks', 'foreign_key_checks']
+        if self.disable_binlog:
+            variables.append('sql_log_bin')
+        
+        cursor.execute("SELECT " + ", ".join(f"@@SESSION.{variable}" for variable in variables))
+        session = dict(zip(variables, cursor.fetchone()))
+        
+        cursor.execute("SET SESSION unique_checks = 0")
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        
+        if self.disable_binlog:
+            try:
+                cursor.execute("SET SESSION sql_log_bin = 0")
+            except pymysql.MySQLError as e:
+                del session['sql_log_bin']
+                self.logger.warning(f"Binlog mantido durante a carga (sem permissão para desligá-lo): {str(e)}")
+        
+        return session
+    
+    def restore(self, cursor, session):
+        """Reaplicar os valores anteriores da sessão e conferir o resultado"""
+        for variable, value in session.items():
+            cursor.execute(f"SET SESSION {variable} = %s", (int(value),))
+        
+        cursor.execute("SELECT " + ", ".join(f"@@SESSION.{variable}" for variable in session))
+        current = dict(zip(session, cursor.fetchone()))
+        
+        mismatched = [variable for variable in session if int(current[variable]) != int(session[variable])]
+        if mismatched:
+            self.logger.error(f"Configurações da sessão não restauradas: {', '.join(mismatched)}")
+            return False
+        
+        return True
+    
+    def defer_indexes(self, cursor, table_name):
+        """Remover os índices secundários adiáveis e retornar as cláusulas para recriá-los"""
+        index_clauses = self.deferrable_indexes(cursor, table_name)
+        self.drop_indexes(cursor, table_name, index_clauses)
+        return index_clauses
+    
+    def drop_indexes(self, cursor, table_name, index_clauses):
+        """Remover os índices das cláusulas ADD informadas"""
+        if not index_clauses:
+            return
+        
+        index_names = [self.index_name(clause) for clause in index_clauses]
+        cursor.execute(
+            f"ALTER TABLE `{table_name}` " + ", ".join(f"DROP INDEX `{name}`" for name in index_names)
+        )
+        
+        self.logger.info(f"Índices de '{table_name}' adiados até o fim da carga: {', '.join(index_names)}")
+    
+    def rebuild_indexes(self, cursor, table_name, index_clauses):
+        """Recriar os índices adiados com um único ALTER TABLE"""
+        if not index_clauses:
+            return
+        
+        self.logger.info(f"Reconstruindo {len(index_clauses)} índices de '{table_name}'...")
+        cursor.execute(f"ALTER TABLE `{table_name}` " + ", ".join(index_clauses))
+    
+    def missing_indexes(self, cursor, table_name, reference_table):
+        """Cláusulas dos índices adiáveis de reference_table que faltam em table_name"""
+        return self.missing_clauses(cursor, table_name, self.deferrable_indexes(cursor, reference_table))
+    
+    def missing_clauses(self, cursor, table_name, index_clauses):
+        """Cláusulas ADD cujos índices não existem em table_name"""
+        cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+        existing = {row[2].replace('`', '``') for row in cursor.fetchall()}
+        
+        return [clause for clause in index_clauses if self.index_name(clause) not in existing]
+    
+    def index_name(self, clause):
+        """Nome do índice (com crases duplicadas, como no DDL) de uma cláusula ADD KEY"""
+        return INDEX_NAME_PATTERN.match(clause).group(1)
+    
+    def deferrable_indexes(self, cursor, table_name):
+        """Cláusulas ADD dos índices comuns (KEY) de uma tabela sem FKs"""
+        cursor.execute(f"SHOW CREATE TABLE `{table_name}`")
+        create_sql = cursor.fetchone()[1]
+        
+        _, index_clauses, foreign_key_clauses = self.schema_cloner.split_create_table(create_sql, defer_indexes=True)
+        if foreign_key_clauses:
+            return []
+        
+        return [clause for clause in index_clauses if INDEX_NAME_PATTERN.match(clause)]
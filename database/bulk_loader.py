@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga em massa no destino (LOAD DATA LOCAL INFILE com fallback para INSERT)
+"""
+
+import os
+import tempfile
+import pymysql
+from database.dump_format import DumpFormat, BINARY_DATA_TYPES
+from database.restore_engine import LOCAL_INFILE_ERRORS, check_load_warnings
+
+class BulkLoader:
+    """Grava lotes de linhas no destino
+    
+    No modo 'load_data' as linhas são codificadas no formato TSV do backup
+    (DumpFormat) em um arquivo temporário e carregadas com LOAD DATA LOCAL
+    INFILE a cada rows_per_load linhas. Se o servidor ou o cliente recusar o
+    LOAD DATA LOCAL, o carregador passa a usar INSERTs de várias linhas. No
+    modo 'insert' as linhas vão direto por executemany.
+    """
+    
+    def __init__(self, logger, mode='load_data', rows_per_load=50000, insert_batch_rows=1000):
+        """Inicializar carregador"""
+        if mode not in ('load_data', 'insert'):
+            raise ValueError(f"Modo de carga não suportado: {mode}")
+        
+        self.logger = logger
+        self.mode = mode
+        self.rows_per_load = rows_per_load
+        self.insert_batch_rows = insert_batch_rows
+        self.format = DumpFormat('none')
+        self._local_infile_available = mode == 'load_data'
+    
+    def binary_columns(self, columns_info):
+        """Índices das colunas binárias a partir do resultado de DESCRIBE"""
+        return [
+            index for index, column in enumerate(columns_info)
+            if column[1].split('(')[0].split(' ')[0].lower() in BINARY_DATA_TYPES
+        ]
+    
+    def load_batches(self, cursor, table_name, column_names, hex_columns, batches, progress=None):
+        """Gravar os lotes recebidos e retornar o total de linhas
+        
+        Nenhum commit é feito aqui: a transação fica a cargo de quem chama.
+        progress, se informado, recebe o total acumulado após cada carga.
+        """
+        columns_str = '`, `'.join(column_names)
+        placeholders = ', '.join(['%s'] * len(column_names))
+        insert_sql = f"INSERT INTO `{table_name}` (`{columns_str}`) VALUES ({placeholders})"
+        
+        if not self._local_infile_available:
+            total_rows = 0
+            for batch in batches:
+                cursor.executemany(insert_sql, batch)
+                total_rows += len(batch)
+                if progress:
+                    progress(total_rows)
+            return total_rows
+        
+        load_sql = self._load_data_sql(table_name, column_names, set(hex_columns))
+        total_rows = 0
+        pending_rows = 0
+        temp_file = None
+        
+        try:
+            for batch in batches:
+                if temp_file is None:
+                    temp_file = self._open_temp_file()
+                
+                temp_file.writelines(self.format.encode_row(row) for row in batch)
+                pending_rows += len(batch)
+                
+                if pending_rows >= self.rows_per_load:
+                    full_file, temp_file = temp_file, None
+                    total_rows += self._flush(cursor, full_file, load_sql, insert_sql, set(hex_columns))
+                    pending_rows = 0
+                    if progress:
+                        progress(total_rows)
+            
+            if temp_file is not None:
+                last_file, temp_file = temp_file, None
+                total_rows += self._flush(cursor, last_file, load_sql, insert_sql, set(hex_columns))
+                if progress:
+                    progress(total_rows)
+            
+            return total_rows
+        
+        finally:
+            if temp_file is not None:
+                temp_file.close()
+                os.remove(temp_file.name)
+    
+    def upsert_sql(self, table_name, column_names, key_columns):
+        """Montar o INSERT ... ON DUPLICATE KEY UPDATE de uma tabela
+        
+        O executemany do PyMySQL agrupa as linhas em INSERTs de várias linhas
+        (ver limit_statement_size). Sem colunas fora da chave, usa INSERT IGNORE.
+        """
+        columns_str = '`, `'.join(column_names)
+        placeholders = ', '.join(['%s'] * len(column_names))
+        update_columns = [column for column in column_names if column not in key_columns]
+        
+        if not update_columns:
+            return f"INSERT IGNORE INTO `{table_name}` (`{columns_str}`) VALUES ({placeholders})"
+        
+        assignments = ', '.join(f"`{column}` = VALUES(`{column}`)" for column in update_columns)
+        return f"INSERT INTO `{table_name}` (`{columns_str}`) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {assignments}"
+    
+    def limit_statement_size(self, cursor):
+        """Ajustar o tamanho máximo dos INSERTs de várias linhas ao max_allowed_packet"""
+        cursor.execute("SELECT @@max_allowed_packet")
+        max_allowed_packet = int(cursor.fetchone()[0])
+        
+        # Margem para o cabeçalho do pacote; sem ultrapassar 16MB por comando
+        cursor.max_stmt_length = max(64 * 1024, min(max_allowed_packet - 64 * 1024, 16 * 1024 * 1024))
+        return cursor.max_stmt_length
+    
+    def _open_temp_file(self):
+        """Criar o arquivo TSV temporário de uma carga"""
+        return tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', newline='\n', delete=False)
+    
+    def _flush(self, cursor, temp_file, load_sql, insert_sql, hex_columns):
+        """Carregar o arquivo temporário e removê-lo"""
+        temp_file.close()
+        
+        try:
+            if self._local_infile_available:
+                try:
+                    rows = cursor.execute(load_sql, (temp_file.name,))
+                except pymysql.MySQLError as e:
+                    if not (e.args and e.args[0] in LOCAL_INFILE_ERRORS):
+                        raise
+                    self._local_infile_available = False
+                    self.logger.warning(f"LOAD DATA LOCAL indisponível ({str(e)}), usando INSERT em lotes")
+                else:
+                    self._check_warnings(cursor)
+                    return rows
+            
+            return self._insert_file(cursor, temp_file.name, insert_sql, hex_columns)
+        
+        finally:
+            os.remove(temp_file.name)
+    
+    def _check_warnings(self, cursor):
+        """Falhar se o LOAD DATA gerou avisos (mesma regra da restauração)"""
+        check_load_warnings(cursor)
+    
+    def _insert_file(self, cursor, path, insert_sql, hex_columns):
+        """Gravar o conteúdo de um arquivo TSV com INSERTs de várias linhas"""
+        total_rows = 0
+        batch = []
+        
+        with self.format.open_reader(path, 'none') as reader:
+            for line in reader:
+                batch.append(self.format.decode_line(line, hex_columns))
+                
+                if len(batch) >= self.insert_batch_rows:
+                    cursor.executemany(insert_sql, batch)
+                    total_rows += len(batch)
+                    batch = []
+        
+        if batch:
+            cursor.executemany(insert_sql, batch)
+            total_rows += len(batch)
+        
+        return total_rows
+    
+    def _load_data_sql(self, table_name, column_names, hex_columns):
+        """Montar o LOAD DATA com UNHEX() para as colunas binárias"""
+        targets = []
+        assignments = []
+        
+        for index, column in enumerate(column_names):
+            if index in hex_columns:
+                targets.append(f"@hex{index}")
+                assignments.append(f"`{column}` = UNHEX(@hex{index})")
+            else:
+                targets.append(f"`{column}`")
+        
+        sql = f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table_name}` CHARACTER SET utf8mb4 ({', '.join(targets)})"
+        if assignments:
+            sql += " SET " + ", ".join(assignments)
+        
+        return sql
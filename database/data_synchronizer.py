@@ -4,14 +4,61 @@
 Sincronizador de dados entre ambientes
 """
 
+import threading
+import decimal
 import pymysql
+import pymysql.cursors
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from config.data_sync_config import DataSyncConfig
+from database.same_server import SameServerDetector
+from database.bulk_loader import BulkLoader
+from database.bulk_load_profile import BulkLoadProfile
+from database.row_diff import RowDiff
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Tipos cujas chaves são ordenadas pela collation (comparadas via WEIGHT_STRING)
+STRING_DATA_TYPES = {'char', 'varchar', 'tinytext', 'text', 'mediumtext', 'longtext'}
+
+# ENUM/SET são ordenados pelo índice interno (comparados no merge-join por `coluna` + 0)
+ENUM_DATA_TYPES = {'enum', 'set'}
+
+# Tipos de chave guardados em array('q') / array('Q') na sincronização por chaves
+INTEGER_DATA_TYPES = {'tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint'}
+
+# Tipos de coluna de marca d'água: datas (janela em segundos) ou números (janela em ids)
+TEMPORAL_DATA_TYPES = {'date', 'datetime', 'timestamp'}
+NUMERIC_DATA_TYPES = INTEGER_DATA_TYPES | {'decimal', 'numeric', 'float', 'double', 'real'}
 
 class DataSynchronizer:
-    def __init__(self, logger):
-        """Inicializar sincronizador de dados"""
+    def __init__(self, logger, batch_size=1000, loader='load_data', bulk_profile=False, disable_binlog=False,
+                 checkpoint_max_age_hours=24):
+        """Inicializar sincronizador de dados
+        
+        Com bulk_profile, as cargas completas (sincronização 'full' e
+        clonagem) usam o BulkLoadProfile no destino. Checkpoints mais antigos
+        que checkpoint_max_age_hours não são retomados (None = sem limite).
+        """
         self.logger = logger
+        self.batch_size = batch_size
+        self.loader = BulkLoader(logger, loader, insert_batch_rows=batch_size)
+        self.bulk_profile = BulkLoadProfile(logger, disable_binlog) if bulk_profile else None
         self.config = DataSyncConfig(logger)
+        self.same_server = SameServerDetector(logger)
+        self.same_server_chunk_size = 50000
+        self.chunk_size = 50000
+        self.checksum_leaf_rows = 1000
+        self.checksum_fanout = 16
+        self.watermark_overlap_seconds = 300
+        self.watermark_overlap_ids = 1000
+        self.probe_max_source_keys = 100000
+        self.probe_ratio = 100
+        self.swap_lock_wait_timeout = 30
+        self.checkpoint_max_age_hours = checkpoint_max_age_hours
     
     def sync_all_configured_tables(self, source_connection, target_connection, direction='to_prod'):
         """Sincronizar todas as tabelas configuradas"""
@@ -82,35 +129,75 @@ class DataSynchronizer:
             self.logger.operation_end("SINCRONIZAÇÃO DE DADOS", False)
             return False
     
+    def copy_table_data(self, table_name, source_connection, target_connection):
+        """Copiar todos os dados de uma tabela (usado pela clonagem de banco)"""
+        table_config = {
+            'table_name': table_name,
+            'sync_type': 'full',
+            'primary_key': None
+        }
+        return self._sync_table_data(table_config, source_connection, target_connection, 'clone')
+    
     def _sync_table_data(self, table_config, source_connection, target_connection, direction):
         """Sincronizar dados de uma tabela específica"""
         try:
             table_name = table_config['table_name']
             sync_type = table_config['sync_type']
             primary_key = table_config['primary_key']
+            row_filter = table_config.get('row_filter')
+            full_sync_mode = table_config.get('full_sync_mode') or 'replace'
             
-            # Criar conexões
+            # Criar conexões; LOAD DATA LOCAL só nas cargas completas que o usam (com
+            # local_infile o PyMySQL envia o arquivo que o servidor pedir)
+            local_infile = sync_type == 'full' and full_sync_mode != 'merge' and self.loader.mode == 'load_data'
             source_conn = self._create_connection(source_connection)
-            target_conn = self._create_connection(target_connection)
+            target_conn = self._create_connection(target_connection, local_infile=local_infile)
             
             if not source_conn or not target_conn:
                 return None
             
             records_affected = 0
             
+            # Clonagem sempre parte de tabelas vazias: sem pontos de retomada
+            checkpoint_direction = direction if direction != 'clone' else None
+            
+            # Origem e destino na mesma instância: copiar no servidor
+            source_schema = None
+            if sync_type in ('full', 'key_only'):
+                source_schema = self.same_server.get_source_schema(source_connection, target_connection)
+            
             if sync_type == 'full':
-                records_affected = self._sync_full_table(
-                    table_name, primary_key, source_conn, target_conn
-                )
+                session = self._apply_bulk_profile(target_conn, table_name, full_sync_mode, direction) if self.bulk_profile else None
+                
+                try:
+                    records_affected = self._sync_full_table(
+                        table_name, primary_key, source_conn, target_conn, source_schema, checkpoint_direction, row_filter,
+                        full_sync_mode, target_connection
+                    )
+                finally:
+                    # Índices adiados nesta execução ou em uma anterior que não terminou
+                    if not self._rebuild_deferred_indexes(target_conn, table_name, direction):
+                        records_affected = None
+                    if session is not None:
+                        with target_conn.cursor() as target_cursor:
+                            if not self.bulk_profile.restore(target_cursor, session):
+                                records_affected = None
             elif sync_type == 'incremental':
                 records_affected = self._sync_incremental_table(
-                    table_name, primary_key, source_conn, target_conn
+                    table_name, primary_key, source_conn, target_conn, checkpoint_direction,
+                    table_config.get('watermark_column'), row_filter
                 )
             elif sync_type == 'key_only':
                 records_affected = self._sync_key_only_table(
-                    table_name, primary_key, source_conn, target_conn
+                    table_name, primary_key, source_conn, target_conn, source_schema, checkpoint_direction, row_filter
                 )
             
+            # Exclusões da origem (a sincronização completa só substitui a tabela nos modos 'replace' e 'swap')
+            keeps_target_rows = sync_type in ('incremental', 'key_only') or full_sync_mode == 'merge'
+            if records_affected is not None and keeps_target_rows and table_config.get('propagate_deletes'):
+                records_deleted = self._propagate_deletes(table_name, primary_key, source_conn, target_conn, row_filter)
+                records_affected = records_deleted if records_deleted is None else records_affected + records_deleted
+            
             # Fechar conexões
             source_conn.close()
             target_conn.close()
@@ -121,217 +208,1549 @@ class DataSynchronizer:
             self.logger.error(f"Erro ao sincronizar dados da tabela {table_name}: {str(e)}")
             return None
     
-    def _sync_full_table(self, table_name, primary_key, source_conn, target_conn):
-        """Sincronização completa da tabela (substitui todos os dados)"""
+    def _apply_bulk_profile(self, target_conn, table_name, full_sync_mode, direction):
+        """Aplicar o perfil de carga na sessão do destino
+        
+        Com a tabela de destino vazia, os índices secundários são adiados
+        (no modo 'swap' isso é feito na tabela sombra). As cláusulas são
+        gravadas em data_sync_deferred_indexes antes de os índices serem
+        removidos, para que uma execução interrompida não deixe a tabela sem
+        eles (ver _rebuild_deferred_indexes). Retorna a sessão anterior.
+        """
+        with target_conn.cursor() as target_cursor:
+            session = self.bulk_profile.apply(target_cursor)
+            
+            try:
+                if full_sync_mode != 'swap' and not self.config.get_deferred_indexes(table_name, direction) \
+                        and self._table_exists(target_cursor, table_name):
+                    target_cursor.execute(f"SELECT 1 FROM `{table_name}` LIMIT 1")
+                    if not target_cursor.fetchone():
+                        index_clauses = self.bulk_profile.deferrable_indexes(target_cursor, table_name)
+                        if index_clauses and self.config.save_deferred_indexes(table_name, direction, index_clauses):
+                            self.bulk_profile.drop_indexes(target_cursor, table_name, index_clauses)
+            except Exception as e:
+                self.logger.warning(f"Índices de '{table_name}' mantidos durante a carga: {str(e)}")
+        
+        return session
+    
+    def _rebuild_deferred_indexes(self, target_conn, table_name, direction):
+        """Recriar os índices registrados como adiados que faltam no destino
+        
+        Roda ao fim de toda sincronização completa, com ou sem perfil de
+        carga. Se a reconstrução falhar, o registro é mantido (a próxima
+        execução tenta de novo) e a sincronização da tabela falha.
+        """
+        index_clauses = self.config.get_deferred_indexes(table_name, direction)
+        if not index_clauses:
+            return True
+        
+        profile = self.bulk_profile or BulkLoadProfile(self.logger)
+        
+        try:
+            with target_conn.cursor() as target_cursor:
+                profile.rebuild_indexes(
+                    target_cursor, table_name, profile.missing_clauses(target_cursor, table_name, index_clauses)
+                )
+            
+            self.config.clear_deferred_indexes(table_name, direction)
+            return True
+        
+        except Exception as e:
+            self.logger.error(
+                f"Erro ao reconstruir os índices de '{table_name}' ({', '.join(index_clauses)}); "
+                f"nova tentativa na próxima sincronização: {str(e)}"
+            )
+            return False
+    
+    def _sync_full_table(self, table_name, primary_key, source_conn, target_conn, source_schema=None, direction=None,
+                         row_filter=None, mode='replace', target_connection=None):
+        """Sincronização completa da tabela (substitui todos os dados)
+        
+        Tabelas com chave primária simples são copiadas em blocos pela ordem
+        da chave (ver _sync_full_table_by_chunks), com commit e checkpoint a
+        cada bloco. Nas demais, a origem é lida com um cursor sem buffer
+        (SSCursor) em lotes de batch_size linhas, e cada lote é gravado assim
+        que chega: a memória usada depende do tamanho do lote, não do tamanho
+        da tabela. A gravação usa o BulkLoader (LOAD DATA LOCAL INFILE, ou
+        INSERTs de várias linhas quando o LOAD DATA LOCAL não é permitido).
+        
+        Apenas as colunas habilitadas para a direção em data_sync_columns são
+        lidas e gravadas (ver _project_columns). Como os modos 'replace' e
+        'swap' recriam as linhas, uma tabela com colunas excluídas é
+        sincronizada por upsert (modo 'merge') seguido da exclusão das linhas
+        removidas na origem, o que preserva as colunas excluídas; sem chave
+        para o upsert, a projeção é ignorada. Com row_filter, só as linhas
+        que atendem ao filtro são lidas da origem, e só elas são removidas do
+        destino antes da carga.
+        
+        Com source_schema (origem na mesma instância) os dados são copiados no
+        servidor com INSERT ... SELECT, sem trafegar pela rede.
+        
+        No modo 'swap' a carga vai para uma tabela sombra, trocada com a
+        original ao final (ver _sync_full_table_by_swap). No modo 'merge' o
+        destino não é limpo: as linhas da origem são aplicadas por cima das
+        existentes (ver _sync_full_table_by_merge).
+        """
         try:
             with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor:
                 # Obter estrutura da tabela
                 source_cursor.execute(f"DESCRIBE `{table_name}`")
-                columns_info = source_cursor.fetchall()
-                column_names = [col[0] for col in columns_info]
-                columns_str = '`, `'.join(column_names)
+                all_columns = source_cursor.fetchall()
+                columns_info = self._project_columns(source_cursor, table_name, all_columns, direction)
                 
                 # Verificar se a tabela existe no destino
-                target_cursor.execute("""
-                    SELECT COUNT(*) FROM information_schema.tables 
-                    WHERE table_schema = DATABASE() AND table_name = %s
-                """, (table_name,))
-                
-                if target_cursor.fetchone()[0] == 0:
+                if not self._table_exists(target_cursor, table_name):
                     self.logger.warning(f"Tabela '{table_name}' não existe no destino - pulando sincronização")
                     return 0
                 
-                # Obter todos os dados da origem
-                source_cursor.execute(f"SELECT `{columns_str}` FROM `{table_name}`")
-                source_data = source_cursor.fetchall()
+                # 'replace' e 'swap' recriam as linhas: as colunas excluídas voltariam ao default
+                if mode != 'merge' and len(columns_info) < len(all_columns):
+                    if self._get_key_columns(source_cursor, table_name):
+                        self.logger.warning(
+                            f"Tabela '{table_name}' com colunas fora da sincronização: carga completa por upsert "
+                            f"(modo 'merge') e exclusão das linhas removidas na origem, em vez de '{mode}'"
+                        )
+                        return self._sync_full_table_by_projected_merge(
+                            table_name, primary_key, [col[0] for col in columns_info], source_conn, target_conn, row_filter
+                        )
+                    
+                    self.logger.warning(
+                        f"Tabela '{table_name}' sem chave para upsert: configuração de colunas ignorada na carga completa"
+                    )
+                    columns_info = all_columns
                 
-                if not source_data:
-                    self.logger.info(f"Tabela '{table_name}' está vazia na origem")
-                    return 0
+                column_names = [col[0] for col in columns_info]
+                columns_str = '`, `'.join(column_names)
+                hex_columns = self.loader.binary_columns(columns_info)
                 
-                # Iniciar transação no destino
-                target_conn.begin()
+                if mode == 'merge':
+                    return self._sync_full_table_by_merge(table_name, column_names, source_conn, target_conn, row_filter)
                 
-                try:
-                    # Limpar tabela de destino (exceto se for tabela crítica)
-                    if not self._is_critical_table(table_name):
-                        target_cursor.execute(f"DELETE FROM `{table_name}`")
-                        self.logger.info(f"Tabela '{table_name}' limpa no destino")
+                if mode == 'swap':
+                    blocker = self._swap_blocker(target_cursor, table_name, row_filter)
+                    if not blocker:
+                        return self._sync_full_table_by_swap(
+                            table_name, column_names, hex_columns, source_schema, source_conn, target_conn,
+                            target_connection, direction
+                        )
+                    self.logger.warning(f"Troca por tabela sombra indisponível para '{table_name}' ({blocker}), usando DELETE + INSERT")
+                
+                if source_schema:
+                    total_inserted = self._sync_full_table_on_server(
+                        table_name, column_names, source_schema, target_conn, row_filter, direction
+                    )
+                    if total_inserted is not None:
+                        return total_inserted
+                
+                chunk_key = self._get_single_primary_key(source_cursor, None, table_name)
+                if chunk_key:
+                    return self._sync_full_table_by_chunks(
+                        table_name, column_names, hex_columns, chunk_key, source_conn, target_conn, direction, row_filter
+                    )
+                
+                # A gravação no destino pode pausar a leitura; evitar timeout do servidor
+                source_cursor.execute("SET SESSION net_write_timeout = 3600")
+                
+                with source_conn.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+                    # Ler a origem em streaming
+                    stream_cursor.execute(f"SELECT `{columns_str}` FROM `{table_name}`{self._filter_clause(row_filter)}", ())
+                    batch = stream_cursor.fetchmany(self.batch_size)
                     
-                    # Inserir dados da origem
-                    placeholders = ', '.join(['%s'] * len(column_names))
-                    insert_sql = f"INSERT INTO `{table_name}` (`{columns_str}`) VALUES ({placeholders})"
+                    if not batch:
+                        self.logger.info(f"Tabela '{table_name}' está vazia na origem")
+                        return 0
                     
-                    # Inserir em lotes para performance
-                    batch_size = 1000
-                    total_inserted = 0
+                    # Iniciar transação no destino
+                    target_conn.begin()
                     
-                    for i in range(0, len(source_data), batch_size):
-                        batch = source_data[i:i + batch_size]
-                        target_cursor.executemany(insert_sql, batch)
-                        total_inserted += len(batch)
+                    try:
+                        # Limpar tabela de destino
+                        target_cursor.execute(f"DELETE FROM `{table_name}`{self._filter_clause(row_filter)}", ())
+                        self.logger.info(f"Tabela '{table_name}' limpa no destino")
+                        
+                        # Inserir dados da origem
+                        total_inserted = self.loader.load_batches(
+                            target_cursor, table_name, column_names, hex_columns,
+                            self._stream_batches(stream_cursor, batch),
+                            lambda total: self.logger.info(f"Inseridos {total} registros em '{table_name}'...")
+                        )
                         
-                        if total_inserted % 5000 == 0:
-                            self.logger.info(f"Inseridos {total_inserted} registros em '{table_name}'...")
+                        target_conn.commit()
+                        self.logger.success(f"Sincronização completa: {total_inserted} registros inseridos em '{table_name}'")
+                        return total_inserted
+                    
+                    except Exception as e:
+                        target_conn.rollback()
+                        raise e
+                
+        except Exception as e:
+            self.logger.error(f"Erro na sincronização completa da tabela '{table_name}': {str(e)}")
+            return None
+    
+    def _get_checkpoint(self, table_name, direction, checkpoint_type):
+        """Checkpoint da tabela, desde que não seja mais antigo que checkpoint_max_age_hours"""
+        return self.config.get_sync_checkpoint(table_name, direction, checkpoint_type, self.checkpoint_max_age_hours)
+    
+    def _sync_full_table_by_chunks(self, table_name, column_names, hex_columns, chunk_key, source_conn, target_conn,
+                                   direction=None, row_filter=None, load_table=None, checkpoint_type='full'):
+        """Sincronização completa em blocos pela chave primária (keyset)
+        
+        Cada bloco é lido com WHERE chave > última ORDER BY chave LIMIT n,
+        gravado e confirmado no destino, e a última chave é registrada em
+        data_sync_checkpoints. Se a execução for interrompida, a próxima
+        continua do último bloco confirmado em vez de recomeçar.
+        
+        load_table, se informado, é a tabela do destino que recebe as linhas
+        (a tabela sombra do modo 'swap').
+        """
+        columns_str = '`, `'.join(column_names)
+        key_index = column_names.index(chunk_key)
+        select_sql = f"SELECT `{columns_str}` FROM `{table_name}`"
+        load_table = load_table or table_name
+        
+        checkpoint = self._get_checkpoint(table_name, direction, checkpoint_type) if direction else None
+        last_key = checkpoint['last_key'] if checkpoint else None
+        total_inserted = checkpoint['rows_copied'] if checkpoint else 0
+        
+        try:
+            with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor:
+                if checkpoint:
+                    self.logger.info(f"Retomando '{table_name}' após a chave {last_key} ({total_inserted} registros já copiados)")
+                else:
+                    source_cursor.execute(f"SELECT 1 FROM `{table_name}`{self._filter_clause(row_filter)} LIMIT 1", ())
+                    if not source_cursor.fetchone():
+                        self.logger.info(f"Tabela '{table_name}' está vazia na origem")
+                        return 0
+                
+                # A gravação no destino pode pausar a leitura; evitar timeout do servidor
+                source_cursor.execute("SET SESSION net_write_timeout = 3600")
+                
+                # Limpar tabela de destino; ao retomar, apenas as linhas de um
+                # bloco gravado sem checkpoint
+                where_clause, params = self._key_range_condition(chunk_key, last_key, None, row_filter)
+                target_cursor.execute(f"DELETE FROM `{load_table}`{where_clause}", params)
+                if last_key is None and load_table == table_name:
+                    self.logger.info(f"Tabela '{table_name}' limpa no destino")
+                target_conn.commit()
+                
+                if direction and not checkpoint:
+                    self.config.save_sync_checkpoint(table_name, direction, checkpoint_type, None, 0)
+                
+                while True:
+                    with source_conn.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+                        where_clause, params = self._key_range_condition(chunk_key, last_key, None, row_filter)
+                        stream_cursor.execute(
+                            f"{select_sql}{where_clause} ORDER BY `{chunk_key}` LIMIT {self.chunk_size}", params
+                        )
+                        
+                        last_row = []
+                        chunk_rows = self.loader.load_batches(
+                            target_cursor, load_table, column_names, hex_columns,
+                            self._stream_batches(stream_cursor, last_row=last_row)
+                        )
+                    
+                    if not chunk_rows:
+                        break
                     
                     target_conn.commit()
+                    total_inserted += chunk_rows
+                    last_key = last_row[0][key_index]
+                    
+                    if direction:
+                        self.config.save_sync_checkpoint(table_name, direction, checkpoint_type, last_key, total_inserted)
+                    
+                    self.logger.info(f"Inseridos {total_inserted} registros em '{table_name}'...")
+                    
+                    if chunk_rows < self.chunk_size:
+                        break
+                
+                if direction:
+                    self.config.clear_sync_checkpoint(table_name, direction)
+                
+                if load_table == table_name:
                     self.logger.success(f"Sincronização completa: {total_inserted} registros inseridos em '{table_name}'")
-                    return total_inserted
+                return total_inserted
+        
+        except Exception as e:
+            target_conn.rollback()
+            if direction:
+                self.logger.error(f"Erro na sincronização da tabela '{table_name}' (será retomada após a chave {last_key}): {str(e)}")
+            else:
+                self.logger.error(f"Erro na sincronização completa da tabela '{table_name}': {str(e)}")
+            return None
+    
+    def _stream_batches(self, stream_cursor, first_batch=None, last_row=None):
+        """Gerar lotes de batch_size linhas de um cursor sem buffer
+        
+        last_row, se informado, é uma lista que passa a conter a última linha
+        lida (usada para registrar a chave do checkpoint).
+        """
+        batch = first_batch if first_batch is not None else stream_cursor.fetchmany(self.batch_size)
+        
+        while batch:
+            if last_row is not None:
+                last_row[:] = [batch[-1]]
+            yield batch
+            batch = stream_cursor.fetchmany(self.batch_size)
+    
+    def _sync_full_table_on_server(self, table_name, column_names, source_schema, target_conn, row_filter=None,
+                                   direction=None, load_table=None, checkpoint_type='full'):
+        """Sincronização completa com INSERT ... SELECT a partir do schema de origem
+        
+        A cópia é dividida em faixas da chave primária (quando ela tem uma
+        única coluna), cada uma confirmada e registrada em
+        data_sync_checkpoints no mesmo formato de _sync_full_table_by_chunks:
+        a transação não cobre a tabela inteira, e uma cópia interrompida é
+        retomada (por qualquer dos dois caminhos) após a última faixa
+        confirmada. load_table, se informado, é a tabela do destino que
+        recebe as linhas (a tabela sombra do modo 'swap'). Retorna None se o
+        caminho rápido falhar, para que a sincronização siga pelo caminho
+        normal.
+        """
+        columns_str = '`, `'.join(column_names)
+        load_table = load_table or table_name
+        
+        try:
+            with target_conn.cursor() as target_cursor:
+                chunk_key = self._get_single_primary_key(target_cursor, source_schema, table_name)
+                checkpoint = None
+                if direction and chunk_key:
+                    checkpoint = self._get_checkpoint(table_name, direction, checkpoint_type)
                 
-                except Exception as e:
-                    target_conn.rollback()
-                    raise e
+                # Limpar tabela de destino; ao retomar, apenas as linhas de uma
+                # faixa gravada sem checkpoint
+                if chunk_key:
+                    where_clause, params = self._key_range_condition(
+                        chunk_key, checkpoint['last_key'] if checkpoint else None, None, row_filter
+                    )
+                else:
+                    where_clause, params = self._filter_clause(row_filter), ()
+                target_cursor.execute(f"DELETE FROM `{load_table}`{where_clause}", params)
                 
+                if checkpoint:
+                    self.logger.info(
+                        f"Retomando '{table_name}' após a chave {checkpoint['last_key']} "
+                        f"({checkpoint['rows_copied']} registros já copiados)"
+                    )
+                elif load_table == table_name:
+                    self.logger.info(f"Tabela '{table_name}' limpa no destino")
+                
+                total_inserted = self._copy_rows_on_server(
+                    target_cursor, table_name, columns_str, source_schema, chunk_key, row_filter, load_table,
+                    checkpoint, direction, checkpoint_type
+                )
+                target_conn.commit()
+                
+                if direction and chunk_key:
+                    self.config.clear_sync_checkpoint(table_name, direction)
+                
+                self.logger.success(f"Sincronização completa no servidor: {total_inserted} registros inseridos em '{load_table}'")
+                return total_inserted
+        
         except Exception as e:
-            self.logger.error(f"Erro na sincronização completa da tabela '{table_name}': {str(e)}")
+            target_conn.rollback()
+            self.logger.warning(f"Cópia no servidor falhou para '{table_name}', usando cópia via cliente: {str(e)}")
+            return None
+    
+    def _copy_rows_on_server(self, cursor, table_name, columns_str, source_schema, chunk_key, row_filter=None,
+                             target_table=None, checkpoint=None, direction=None, checkpoint_type='full'):
+        """Copiar as linhas do schema de origem em faixas da chave primária, com commit por faixa"""
+        source_table = f"`{source_schema}`.`{table_name}`"
+        insert_sql = f"INSERT INTO `{target_table or table_name}` (`{columns_str}`) SELECT `{columns_str}` FROM {source_table}"
+        
+        # Sem chave primária simples: um único comando
+        if not chunk_key:
+            return cursor.execute(f"{insert_sql}{self._filter_clause(row_filter)}", ())
+        
+        total_inserted = checkpoint['rows_copied'] if checkpoint else 0
+        lower_bound = checkpoint['last_key'] if checkpoint else None
+        
+        # A limpeza do destino é confirmada junto com o início do checkpoint
+        cursor.connection.commit()
+        if direction and not checkpoint:
+            self.config.save_sync_checkpoint(table_name, direction, checkpoint_type, None, 0)
+        
+        while True:
+            # Limite superior da próxima faixa: a chave da última linha do bloco
+            where_clause, params = self._key_range_condition(chunk_key, lower_bound, None, row_filter)
+            
+            cursor.execute(f"""
+                SELECT MAX(`{chunk_key}`) FROM (
+                    SELECT `{chunk_key}` FROM {source_table}{where_clause}
+                    ORDER BY `{chunk_key}` LIMIT {self.same_server_chunk_size}
+                ) AS chunk
+            """, params)
+            upper_bound = cursor.fetchone()[0]
+            
+            if upper_bound is None:
+                break
+            
+            where_clause, params = self._key_range_condition(chunk_key, lower_bound, upper_bound, row_filter)
+            total_inserted += cursor.execute(f"{insert_sql}{where_clause}", params)
+            cursor.connection.commit()
+            lower_bound = upper_bound
+            
+            if direction:
+                self.config.save_sync_checkpoint(table_name, direction, checkpoint_type, lower_bound, total_inserted)
+            
+            self.logger.info(f"Copiados {total_inserted} registros em '{target_table or table_name}'...")
+        
+        return total_inserted
+    
+    def _sync_full_table_by_merge(self, table_name, column_names, source_conn, target_conn, row_filter=None):
+        """Sincronização completa sem limpar o destino (modo 'merge')
+        
+        A origem é lida com um cursor sem buffer e cada lote de batch_size
+        linhas é aplicado com INSERT ... ON DUPLICATE KEY UPDATE de várias
+        linhas e confirmado: linhas novas são inseridas e as existentes,
+        atualizadas. As linhas do destino ausentes na origem só são removidas
+        com propagate_deletes (ver _propagate_deletes).
+        """
+        total_applied = 0
+        
+        try:
+            with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor:
+                key_columns = self._get_key_columns(target_cursor, table_name)
+                if not key_columns:
+                    self.logger.error(f"Tabela '{table_name}' sem chave primária ou única: o modo 'merge' não tem como casar as linhas")
+                    return None
+                
+                upsert_sql = self.loader.upsert_sql(table_name, column_names, key_columns)
+                self.loader.limit_statement_size(target_cursor)
+                
+                source_cursor.execute("SET SESSION time_zone = '+00:00'")
+                target_cursor.execute("SET SESSION time_zone = '+00:00'")
+                # A gravação no destino pode pausar a leitura; evitar timeout do servidor
+                source_cursor.execute("SET SESSION net_write_timeout = 3600")
+                
+                with source_conn.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+                    columns_str = '`, `'.join(column_names)
+                    stream_cursor.execute(f"SELECT `{columns_str}` FROM `{table_name}`{self._filter_clause(row_filter)}", ())
+                    
+                    for batch in self._stream_batches(stream_cursor):
+                        target_cursor.executemany(upsert_sql, batch)
+                        target_conn.commit()
+                        total_applied += len(batch)
+                        
+                        if total_applied % self.chunk_size < len(batch):
+                            self.logger.info(f"Aplicados {total_applied} registros em '{table_name}'...")
+            
+            self.logger.success(f"Sincronização completa (merge): {total_applied} registros aplicados em '{table_name}'")
+            return total_applied
+        
+        except Exception as e:
+            target_conn.rollback()
+            self.logger.error(f"Erro na sincronização completa (merge) da tabela '{table_name}' após {total_applied} registros: {str(e)}")
+            return None
+    
+    def _sync_full_table_by_projected_merge(self, table_name, primary_key, column_names, source_conn, target_conn,
+                                            row_filter=None):
+        """Carga completa de uma tabela com colunas excluídas: upsert e depois exclusões
+        
+        Equivale a 'replace' para as colunas sincronizadas, sem tocar nas demais.
+        """
+        records_merged = self._sync_full_table_by_merge(table_name, column_names, source_conn, target_conn, row_filter)
+        if records_merged is None:
             return None
+        
+        records_deleted = self._propagate_deletes(table_name, primary_key, source_conn, target_conn, row_filter)
+        return None if records_deleted is None else records_merged + records_deleted
+    
+    def _sync_full_table_by_swap(self, table_name, column_names, hex_columns, source_schema, source_conn, target_conn,
+                                 target_connection, direction=None):
+        """Sincronização completa por tabela sombra e troca atômica
+        
+        As linhas são carregadas em _<tabela>_swap_new, criada com CREATE TABLE ...
+        LIKE a partir do destino, enquanto a tabela original continua
+        disponível para leitura e escrita. Ao final, um único RENAME TABLE
+        troca as duas tabelas (atômico, sem janela com dados parciais) e a
+        tabela antiga, renomeada para _<tabela>_swap_old, é removida em segundo
+        plano. Com direction, uma carga interrompida é retomada na tabela
+        sombra a partir do último bloco confirmado.
+        """
+        shadow_table, old_table = self._swap_table_names(table_name)
+        columns_str = '`, `'.join(column_names)
+        
+        try:
+            with target_conn.cursor() as target_cursor:
+                checkpoint = self._get_checkpoint(table_name, direction, 'swap') if direction else None
+                
+                # Sobra de uma troca anterior cuja remoção não terminou
+                target_cursor.execute(f"DROP TABLE IF EXISTS `{old_table}`")
+                
+                if checkpoint and self._table_exists(target_cursor, shadow_table):
+                    self.logger.info(f"Retomando a carga da tabela sombra '{shadow_table}'")
+                else:
+                    if direction:
+                        self.config.clear_sync_checkpoint(table_name, direction)
+                    target_cursor.execute(f"DROP TABLE IF EXISTS `{shadow_table}`")
+                    target_cursor.execute(f"CREATE TABLE `{shadow_table}` LIKE `{table_name}`")
+                    self.logger.info(f"Tabela sombra '{shadow_table}' criada no destino")
+                    
+                    if self.bulk_profile:
+                        self.bulk_profile.defer_indexes(target_cursor, shadow_table)
+            
+            total_inserted = None
+            
+            # Mesmo checkpoint da carga via cliente: a retomada segue de onde parou
+            if source_schema:
+                total_inserted = self._sync_full_table_on_server(
+                    table_name, column_names, source_schema, target_conn, None, direction, shadow_table, 'swap'
+                )
+            
+            if total_inserted is None:
+                with source_conn.cursor() as source_cursor:
+                    chunk_key = self._get_single_primary_key(source_cursor, None, table_name)
+                
+                if chunk_key:
+                    total_inserted = self._sync_full_table_by_chunks(
+                        table_name, column_names, hex_columns, chunk_key, source_conn, target_conn, direction,
+                        load_table=shadow_table, checkpoint_type='swap'
+                    )
+                    if total_inserted is None:
+                        return None
+                else:
+                    with source_conn.cursor(pymysql.cursors.SSCursor) as stream_cursor, \
+                            target_conn.cursor() as target_cursor:
+                        # A gravação no destino pode pausar a leitura; evitar timeout do servidor
+                        stream_cursor.execute("SET SESSION net_write_timeout = 3600")
+                        stream_cursor.execute(f"SELECT `{columns_str}` FROM `{table_name}`")
+                        total_inserted = self.loader.load_batches(
+                            target_cursor, shadow_table, column_names, hex_columns,
+                            self._stream_batches(stream_cursor),
+                            lambda total: self.logger.info(f"Inseridos {total} registros em '{shadow_table}'...")
+                        )
+                    target_conn.commit()
+            
+            with target_conn.cursor() as target_cursor:
+                # Origem vazia: manter a tabela atual, como no modo 'replace'
+                if not total_inserted:
+                    target_cursor.execute(f"DROP TABLE IF EXISTS `{shadow_table}`")
+                    self.logger.info(f"Origem vazia: tabela '{table_name}' mantida e tabela sombra descartada")
+                    return 0
+                
+                # Índices adiados (nesta ou em uma execução retomada, mesmo que
+                # o perfil de carga tenha sido desligado depois) antes da troca
+                profile = self.bulk_profile or BulkLoadProfile(self.logger)
+                profile.rebuild_indexes(
+                    target_cursor, shadow_table, profile.missing_indexes(target_cursor, shadow_table, table_name)
+                )
+                
+                # Não esperar indefinidamente pelo bloqueio de metadados da troca;
+                # a conexão é reutilizada nas próximas tabelas, então o valor volta
+                target_cursor.execute("SELECT @@SESSION.lock_wait_timeout")
+                lock_wait_timeout = target_cursor.fetchone()[0]
+                target_cursor.execute("SET SESSION lock_wait_timeout = %s", (self.swap_lock_wait_timeout,))
+                try:
+                    target_cursor.execute(
+                        f"RENAME TABLE `{table_name}` TO `{old_table}`, `{shadow_table}` TO `{table_name}`"
+                    )
+                finally:
+                    target_cursor.execute("SET SESSION lock_wait_timeout = %s", (lock_wait_timeout,))
+            
+            self.logger.success(f"Sincronização completa: {total_inserted} registros carregados e tabela '{table_name}' trocada")
+            self._drop_table_in_background(target_connection, old_table)
+            return total_inserted
+        
+        except Exception as e:
+            target_conn.rollback()
+            self.logger.error(f"Erro na troca por tabela sombra de '{table_name}': {str(e)}")
+            return None
+    
+    def _swap_blocker(self, cursor, table_name, row_filter=None):
+        """Motivo que impede a troca por tabela sombra (None se ela for possível)
+        
+        CREATE TABLE ... LIKE não copia chaves estrangeiras, e o RENAME leva
+        consigo as referências de outras tabelas e os triggers para a tabela
+        antiga; com filtro de linhas, a sombra perderia as linhas fora dele.
+        """
+        if row_filter:
+            return "tabela com filtro de linhas"
+        if max(len(name) for name in self._swap_table_names(table_name)) > 64:
+            return "nome longo demais para a tabela sombra"
+        
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE
+            WHERE REFERENCED_TABLE_NAME IS NOT NULL
+              AND ((TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s)
+                OR (REFERENCED_TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME = %s))
+        """, (table_name, table_name))
+        if cursor.fetchone()[0]:
+            return "tabela com chaves estrangeiras"
+        
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.TRIGGERS
+            WHERE EVENT_OBJECT_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s
+        """, (table_name,))
+        if cursor.fetchone()[0]:
+            return "tabela com triggers"
+        
+        return None
+    
+    def _swap_table_names(self, table_name):
+        """Nomes reservados da tabela sombra e da tabela antiga do modo 'swap'
+        
+        Ambas são removidas sem confirmação (DROP TABLE IF EXISTS), então os
+        nomes não podem coincidir com tabelas do usuário como <tabela>_new.
+        """
+        return f"_{table_name}_swap_new", f"_{table_name}_swap_old"
+    
+    def _drop_table_in_background(self, connection_details, table_name):
+        """Remover uma tabela do destino em uma thread separada, com conexão própria
+        
+        A thread é daemon: o programa não espera um DROP lento para terminar.
+        Se ele for interrompido, a tabela que sobrar é removida no início da
+        próxima troca.
+        """
+        def drop_table():
+            conn = self._create_connection(connection_details)
+            if not conn:
+                self.logger.warning(f"Tabela '{table_name}' não removida do destino: sem conexão")
+                return
+            
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
+                self.logger.info(f"Tabela antiga '{table_name}' removida do destino")
+            except Exception as e:
+                self.logger.warning(f"Erro ao remover a tabela antiga '{table_name}': {str(e)}")
+            finally:
+                conn.close()
+        
+        threading.Thread(target=drop_table, name=f"drop-{table_name}", daemon=True).start()
     
-    def _sync_incremental_table(self, table_name, primary_key, source_conn, target_conn):
-        """Sincronização incremental (apenas registros novos/modificados)"""
+    def _table_exists(self, cursor, table_name):
+        """Verificar se a tabela existe no banco atual da conexão"""
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.tables 
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """, (table_name,))
+        return cursor.fetchone()[0] > 0
+    
+    def _get_single_primary_key(self, cursor, schema, table_name):
+        """Obter a coluna da chave primária, se ela tiver uma única coluna
+        
+        Sem schema, usa o banco atual da conexão.
+        """
+        cursor.execute("""
+            SELECT COLUMN_NAME
+            FROM information_schema.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = COALESCE(%s, DATABASE()) AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+        """, (schema, table_name))
+        
+        key_columns = [row[0] for row in cursor.fetchall()]
+        return key_columns[0] if len(key_columns) == 1 else None
+    
+    def _sync_incremental_table(self, table_name, primary_key, source_conn, target_conn, direction=None, watermark_column=None,
+                                row_filter=None):
+        """Sincronização incremental (apenas registros novos/modificados)
+        
+        Usa a marca d'água em watermark_column (configurada, ou uma coluna
+        updated_at/modified_at/timestamp detectada); sem ela, compara
+        checksums por faixa de chave.
+        """
         try:
             with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor:
                 # Obter estrutura da tabela
                 source_cursor.execute(f"DESCRIBE `{table_name}`")
-                columns_info = source_cursor.fetchall()
+                columns_info = self._project_columns(source_cursor, table_name, source_cursor.fetchall(), direction)
                 column_names = [col[0] for col in columns_info]
-                columns_str = '`, `'.join(column_names)
                 
                 # Verificar se a tabela tem coluna de timestamp para comparação
-                has_updated_at = any(col for col in column_names if col in ['updated_at', 'modified_at', 'timestamp'])
+                if watermark_column not in column_names:
+                    watermark_column = next(
+                        (col for col in column_names if col in ['updated_at', 'modified_at', 'timestamp']), None
+                    )
                 
-                if has_updated_at:
-                    return self._sync_by_timestamp(table_name, column_names, source_conn, target_conn)
+                if watermark_column and direction:
+                    return self._sync_by_timestamp(
+                        table_name, primary_key, watermark_column, column_names, source_conn, target_conn, direction, row_filter
+                    )
                 else:
-                    return self._sync_by_comparison(table_name, primary_key, column_names, source_conn, target_conn)
+                    return self._sync_by_comparison(
+                        table_name, primary_key, column_names, source_conn, target_conn, direction, row_filter
+                    )
                 
         except Exception as e:
             self.logger.error(f"Erro na sincronização incremental da tabela '{table_name}': {str(e)}")
             return None
     
-    def _sync_key_only_table(self, table_name, primary_key, source_conn, target_conn):
-        """Sincronização apenas de chaves (para tabelas de referência)"""
+    def _sync_key_only_table(self, table_name, primary_key, source_conn, target_conn, source_schema=None, direction=None,
+                             row_filter=None):
+        """Sincronização apenas de chaves (para tabelas de referência)
+        
+        Quando a origem é pequena perto do destino, as chaves da origem são
+        procuradas no destino pelo índice (ver _probe_missing_keys) em vez de
+        ler todas as chaves do destino. Nos demais casos, chaves inteiras são
+        comparadas em arrays compactos (ver _missing_integer_keys). Os
+        registros faltantes são buscados e inseridos em listas IN de até
+        batch_size chaves.
+        """
+        if source_schema:
+            records_inserted = self._sync_key_only_on_server(
+                table_name, primary_key, source_schema, target_conn, direction, row_filter
+            )
+            if records_inserted is not None:
+                return records_inserted
+        
         try:
             with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor:
-                # Obter apenas as chaves primárias da origem
-                source_cursor.execute(f"SELECT DISTINCT `{primary_key}` FROM `{table_name}`")
-                source_keys = {row[0] for row in source_cursor.fetchall()}
-                
-                if not source_keys:
-                    return 0
+                typecode = self._integer_key_typecode(source_cursor, table_name, primary_key)
+                source_rows = self._estimated_rows(source_cursor, table_name)
+                target_rows = self._estimated_rows(target_cursor, table_name)
                 
-                # Obter chaves existentes no destino
-                target_cursor.execute(f"SELECT DISTINCT `{primary_key}` FROM `{table_name}`")
-                target_keys = {row[0] for row in target_cursor.fetchall()}
+                # Sem estimativa (ou com origem estimada em zero) usa-se a diferença completa
+                probe = (
+                    source_rows and target_rows is not None
+                    and source_rows <= self.probe_max_source_keys
+                    and source_rows * self.probe_ratio <= target_rows
+                )
                 
-                # Encontrar chaves que existem na origem mas não no destino
-                missing_keys = source_keys - target_keys
+                if probe:
+                    self.logger.info(
+                        f"Tabela '{table_name}': ~{source_rows} chaves na origem e ~{target_rows} linhas no destino, "
+                        f"consultando as chaves no destino pelo índice"
+                    )
+                    missing_keys = self._probe_missing_keys(table_name, primary_key, source_conn, target_cursor, row_filter)
+                elif typecode:
+                    missing_keys = self._missing_integer_keys(
+                        table_name, primary_key, typecode, source_conn, target_conn, row_filter
+                    )
+                else:
+                    # Obter apenas as chaves primárias da origem
+                    source_cursor.execute(
+                        f"SELECT DISTINCT `{primary_key}` FROM `{table_name}`{self._filter_clause(row_filter)}", ()
+                    )
+                    source_keys = {row[0] for row in source_cursor.fetchall()}
+                    
+                    # Obter chaves existentes no destino
+                    target_cursor.execute(f"SELECT DISTINCT `{primary_key}` FROM `{table_name}`")
+                    target_keys = {row[0] for row in target_cursor.fetchall()}
+                    
+                    # Encontrar chaves que existem na origem mas não no destino
+                    missing_keys = list(source_keys - target_keys)
                 
-                if not missing_keys:
+                if not len(missing_keys):
                     self.logger.info(f"Tabela '{table_name}': todas as chaves já existem no destino")
                     return 0
                 
-                # Obter registros completos das chaves faltantes
-                keys_list = list(missing_keys)
-                placeholders = ', '.join(['%s'] * len(keys_list))
-                
-                source_cursor.execute(f"""
-                    SELECT * FROM `{table_name}` 
-                    WHERE `{primary_key}` IN ({placeholders})
-                """, keys_list)
+                # Obter nomes das colunas
+                source_cursor.execute(f"DESCRIBE `{table_name}`")
+                columns_info = self._project_columns(source_cursor, table_name, source_cursor.fetchall(), direction)
+                column_names = [col[0] for col in columns_info]
+                columns_str = '`, `'.join(column_names)
                 
-                missing_records = source_cursor.fetchall()
+                placeholders = ', '.join(['%s'] * len(column_names))
+                insert_sql = f"INSERT INTO `{table_name}` (`{columns_str}`) VALUES ({placeholders})"
                 
-                if missing_records:
-                    # Obter nomes das colunas
-                    source_cursor.execute(f"DESCRIBE `{table_name}`")
-                    columns_info = source_cursor.fetchall()
-                    column_names = [col[0] for col in columns_info]
-                    columns_str = '`, `'.join(column_names)
+                # Buscar e inserir os registros faltantes em listas IN limitadas
+                total_inserted = 0
+                for i in range(0, len(missing_keys), self.batch_size):
+                    keys_list = list(missing_keys[i:i + self.batch_size])
+                    key_placeholders = ', '.join(['%s'] * len(keys_list))
                     
-                    # Inserir registros faltantes
-                    placeholders = ', '.join(['%s'] * len(column_names))
-                    insert_sql = f"INSERT INTO `{table_name}` (`{columns_str}`) VALUES ({placeholders})"
+                    source_cursor.execute(f"""
+                        SELECT `{columns_str}` FROM `{table_name}` 
+                        WHERE `{primary_key}` IN ({key_placeholders})
+                    """, keys_list)
+                    missing_records = source_cursor.fetchall()
                     
-                    target_cursor.executemany(insert_sql, missing_records)
-                    target_conn.commit()
-                    
-                    self.logger.success(f"Inseridos {len(missing_records)} novos registros em '{table_name}'")
-                    return len(missing_records)
+                    if missing_records:
+                        target_cursor.executemany(insert_sql, missing_records)
+                        target_conn.commit()
+                        total_inserted += len(missing_records)
                 
-                return 0
+                self.logger.success(f"Inseridos {total_inserted} novos registros em '{table_name}'")
+                return total_inserted
                 
         except Exception as e:
+            target_conn.rollback()
             self.logger.error(f"Erro na sincronização por chaves da tabela '{table_name}': {str(e)}")
             return None
     
-    def _sync_by_timestamp(self, table_name, column_names, source_conn, target_conn):
-        """Sincronização baseada em timestamp de modificação"""
-        # Implementação para sincronização por timestamp
-        # Por enquanto, usar sincronização por comparação
-        return self._sync_by_comparison(table_name, 'id', column_names, source_conn, target_conn)
+    def _estimated_rows(self, cursor, table_name):
+        """Número estimado de linhas da tabela (estatística do information_schema, None se ausente)"""
+        cursor.execute("""
+            SELECT TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (table_name,))
+        row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+    
+    def _probe_missing_keys(self, table_name, primary_key, source_conn, target_cursor, row_filter=None):
+        """Chaves da origem ausentes no destino, consultadas em listas IN pelo índice do destino"""
+        missing_keys = []
+        
+        with source_conn.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+            stream_cursor.execute(
+                f"SELECT DISTINCT `{primary_key}` FROM `{table_name}` "
+                f"WHERE `{primary_key}` IS NOT NULL{self._filter_clause(row_filter, 'AND')} ORDER BY `{primary_key}`", ()
+            )
+            
+            for batch in self._stream_batches(stream_cursor):
+                keys = [row[0] for row in batch]
+                placeholders = ', '.join(['%s'] * len(keys))
+                target_cursor.execute(
+                    f"SELECT `{primary_key}` FROM `{table_name}` WHERE `{primary_key}` IN ({placeholders})", keys
+                )
+                existing_keys = {row[0] for row in target_cursor.fetchall()}
+                missing_keys.extend(key for key in keys if key not in existing_keys)
+        
+        return missing_keys
+    
+    def _integer_key_typecode(self, cursor, table_name, primary_key):
+        """Código do array para a chave: 'q' (inteiro), 'Q' (inteiro sem sinal) ou None"""
+        cursor.execute("""
+            SELECT DATA_TYPE, COLUMN_TYPE FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table_name, primary_key))
+        row = cursor.fetchone()
+        
+        if not row or row[0].lower() not in INTEGER_DATA_TYPES:
+            return None
+        
+        return 'Q' if 'unsigned' in row[1].lower() else 'q'
+    
+    def _missing_integer_keys(self, table_name, primary_key, typecode, source_conn, target_conn, row_filter=None):
+        """Chaves inteiras da origem ausentes no destino, em ordem crescente
+        
+        As chaves dos dois lados são lidas ordenadas em array('q') (8 bytes
+        por chave, contra ~70 de um int em set). A diferença usa
+        numpy.setdiff1d quando o NumPy está instalado e, sem ele, um merge
+        linear das duas sequências ordenadas.
+        """
+        source_keys = self._read_sorted_integer_keys(source_conn, table_name, primary_key, typecode, row_filter)
+        if not source_keys:
+            return source_keys
+        
+        target_keys = self._read_sorted_integer_keys(target_conn, table_name, primary_key, typecode)
+        
+        if numpy is not None:
+            dtype = numpy.uint64 if typecode == 'Q' else numpy.int64
+            difference = numpy.setdiff1d(
+                numpy.frombuffer(source_keys, dtype=dtype),
+                numpy.frombuffer(target_keys, dtype=dtype),
+                assume_unique=True
+            )
+            missing_keys = array(typecode)
+            missing_keys.frombytes(difference.astype(dtype).tobytes())
+            return missing_keys
+        
+        missing_keys = array(typecode)
+        target_index = 0
+        target_count = len(target_keys)
+        
+        for key in source_keys:
+            while target_index < target_count and target_keys[target_index] < key:
+                target_index += 1
+            if target_index == target_count or target_keys[target_index] != key:
+                missing_keys.append(key)
+        
+        return missing_keys
+    
+    def _read_sorted_integer_keys(self, connection, table_name, primary_key, typecode, row_filter=None):
+        """Ler as chaves inteiras de uma tabela, ordenadas, em um array compacto"""
+        keys = array(typecode)
+        
+        with connection.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+            stream_cursor.execute(
+                f"SELECT DISTINCT `{primary_key}` FROM `{table_name}` "
+                f"WHERE `{primary_key}` IS NOT NULL{self._filter_clause(row_filter, 'AND')} ORDER BY `{primary_key}`", ()
+            )
+            for batch in self._stream_batches(stream_cursor):
+                keys.extend(row[0] for row in batch)
+        
+        return keys
     
-    def _sync_by_comparison(self, table_name, primary_key, column_names, source_conn, target_conn):
-        """Sincronização baseada em comparação de registros"""
+    def _sync_key_only_on_server(self, table_name, primary_key, source_schema, target_conn, direction=None, row_filter=None):
+        """Inserir no servidor as linhas cujas chaves não existem no destino (anti-join)"""
         try:
-            with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor:
-                # Obter todos os registros da origem
+            with target_conn.cursor() as target_cursor:
+                target_cursor.execute(f"DESCRIBE `{source_schema}`.`{table_name}`")
+                columns_info = self._project_columns(target_cursor, table_name, target_cursor.fetchall(), direction)
+                column_names = [col[0] for col in columns_info]
                 columns_str = '`, `'.join(column_names)
-                source_cursor.execute(f"SELECT `{columns_str}` FROM `{table_name}`")
-                source_records = {row[0]: row for row in source_cursor.fetchall()}  # Assumindo que a primeira coluna é a PK
+                source_columns = ', '.join(f"s.`{col}`" for col in column_names)
                 
-                # Obter todos os registros do destino
-                target_cursor.execute(f"SELECT `{columns_str}` FROM `{table_name}`")
-                target_records = {row[0]: row for row in target_cursor.fetchall()}
+                # Com filtro, a origem vira uma tabela derivada: as colunas do
+                # filtro não ficam ambíguas entre origem e destino
+                source_table = f"`{source_schema}`.`{table_name}`"
+                if row_filter:
+                    source_table = f"(SELECT * FROM {source_table}{self._filter_clause(row_filter)})"
                 
-                # Encontrar registros para inserir/atualizar
-                records_to_process = []
+                inserted = target_cursor.execute(f"""
+                    INSERT INTO `{table_name}` (`{columns_str}`)
+                    SELECT {source_columns}
+                    FROM {source_table} s
+                    LEFT JOIN `{table_name}` t ON t.`{primary_key}` = s.`{primary_key}`
+                    WHERE t.`{primary_key}` IS NULL
+                """, ())
+                target_conn.commit()
                 
-                for pk, source_record in source_records.items():
-                    if pk not in target_records:
-                        # Registro novo - inserir
-                        records_to_process.append(('INSERT', source_record))
-                    elif source_record != target_records[pk]:
-                        # Registro modificado - atualizar
-                        records_to_process.append(('UPDATE', source_record))
+                if inserted:
+                    self.logger.success(f"Inseridos {inserted} novos registros em '{table_name}'")
+                else:
+                    self.logger.info(f"Tabela '{table_name}': todas as chaves já existem no destino")
                 
-                if not records_to_process:
-                    return 0
+                return inserted
+        
+        except Exception as e:
+            target_conn.rollback()
+            self.logger.warning(f"Cópia no servidor falhou para '{table_name}', usando cópia via cliente: {str(e)}")
+            return None
+    
+    def _sync_by_timestamp(self, table_name, primary_key, watermark_column, column_names, source_conn, target_conn, direction,
+                           row_filter=None):
+        """Sincronização baseada em marca d'água (timestamp de modificação ou id crescente)
+        
+        A marca d'água é o maior valor de watermark_column já sincronizado,
+        gravado por tabela e direção em data_sync_watermarks. Cada execução lê
+        apenas as linhas com watermark_column >= marca - janela de segurança
+        (watermark_overlap_seconds para datas, watermark_overlap_ids para ids),
+        um predicado que usa o índice da coluna, e as aplica com upserts em
+        lote. A janela cobre transações confirmadas fora de ordem; reaplicar
+        linhas é inofensivo.
+        
+        Na primeira execução não há marca: a tabela é comparada por checksums
+        e a marca passa a ser o máximo lido na origem antes da comparação.
+        """
+        watermark = self.config.get_sync_watermark(table_name, direction, watermark_column)
+        
+        try:
+            with source_conn.cursor() as source_cursor:
+                # Datas TIMESTAMP com a mesma representação nos dois servidores
+                source_cursor.execute("SET SESSION time_zone = '+00:00'")
                 
-                # Processar inserções e atualizações
-                insertions = 0
-                updates = 0
-                
-                for operation, record in records_to_process:
-                    if operation == 'INSERT':
-                        placeholders = ', '.join(['%s'] * len(column_names))
-                        insert_sql = f"INSERT INTO `{table_name}` (`{columns_str}`) VALUES ({placeholders})"
-                        target_cursor.execute(insert_sql, record)
-                        insertions += 1
-                    elif operation == 'UPDATE':
-                        set_clause = ', '.join([f"`{col}` = %s" for col in column_names[1:]])  # Excluir PK
-                        update_sql = f"UPDATE `{table_name}` SET {set_clause} WHERE `{primary_key}` = %s"
-                        target_cursor.execute(update_sql, record[1:] + (record[0],))  # Valores + PK
-                        updates += 1
+                # Capturada antes da leitura: alterações feitas durante a
+                # sincronização entram na próxima execução
+                source_cursor.execute(
+                    f"SELECT MAX(`{watermark_column}`) FROM `{table_name}`{self._filter_clause(row_filter)}", ()
+                )
+                new_watermark = source_cursor.fetchone()[0]
+            
+            if watermark is None:
+                self.logger.info(f"Tabela '{table_name}': sem marca d'água em '{watermark_column}', comparando a tabela inteira")
+                records_affected = self._sync_by_comparison(
+                    table_name, primary_key, column_names, source_conn, target_conn, direction, row_filter
+                )
+            else:
+                records_affected = self._sync_since_watermark(
+                    table_name, primary_key, watermark_column, watermark, column_names, source_conn, target_conn, row_filter
+                )
+            
+            if records_affected is not None and new_watermark is not None:
+                self.config.save_sync_watermark(table_name, direction, watermark_column, new_watermark)
+            
+            return records_affected
+        
+        except Exception as e:
+            self.logger.error(f"Erro na sincronização por marca d'água da tabela '{table_name}': {str(e)}")
+            return None
+    
+    def _sync_since_watermark(self, table_name, primary_key, watermark_column, watermark, column_names, source_conn, target_conn,
+                              row_filter=None):
+        """Aplicar no destino as linhas da origem a partir da marca d'água"""
+        columns_str = '`, `'.join(column_names)
+        key_columns = [primary_key] if primary_key in column_names else column_names[:1]
+        upsert_sql = self.loader.upsert_sql(table_name, column_names, key_columns)
+        
+        # A forma do predicado vem do tipo da coluna: a marca gravada em JSON
+        # pode voltar como texto (DECIMAL, BIGINT) mesmo sendo numérica
+        with source_conn.cursor() as source_cursor:
+            source_cursor.execute("""
+                SELECT DATA_TYPE FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+            """, (table_name, watermark_column))
+            row = source_cursor.fetchone()
+        data_type = row[0].lower() if row else None
+        
+        if data_type in TEMPORAL_DATA_TYPES:
+            predicate = f"`{watermark_column}` >= %s - INTERVAL %s SECOND"
+            params = (watermark, self.watermark_overlap_seconds)
+        elif data_type in NUMERIC_DATA_TYPES:
+            predicate = f"`{watermark_column}` >= %s - %s"
+            value = int(watermark) if data_type in INTEGER_DATA_TYPES else decimal.Decimal(str(watermark))
+            params = (value, self.watermark_overlap_ids)
+        else:
+            raise ValueError(f"coluna de marca d'água '{watermark_column}' com tipo não suportado: {data_type}")
+        
+        self.logger.info(f"Tabela '{table_name}': lendo linhas com '{watermark_column}' a partir de {watermark} (com janela de segurança)")
+        
+        total_applied = 0
+        
+        try:
+            with target_conn.cursor() as target_cursor, source_conn.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+                target_cursor.execute("SET SESSION time_zone = '+00:00'")
+                self.loader.limit_statement_size(target_cursor)
                 
-                target_conn.commit()
+                stream_cursor.execute(
+                    f"SELECT `{columns_str}` FROM `{table_name}` WHERE {predicate}{self._filter_clause(row_filter, 'AND')} "
+                    f"ORDER BY `{watermark_column}`",
+                    params
+                )
+                
+                for batch in self._stream_batches(stream_cursor):
+                    target_cursor.executemany(upsert_sql, batch)
+                    target_conn.commit()
+                    total_applied += len(batch)
+            
+            self.logger.success(f"Tabela '{table_name}': {total_applied} registros aplicados desde a marca d'água")
+            return total_applied
+        
+        except Exception as e:
+            target_conn.rollback()
+            raise e
+    
+    def _sync_by_comparison(self, table_name, primary_key, column_names, source_conn, target_conn, direction=None,
+                            row_filter=None):
+        """Sincronização baseada em comparação de checksums por faixa de chave
+        
+        A tabela é percorrida em blocos pela ordem da chave (keyset). Para cada
+        bloco, origem e destino calculam em paralelo COUNT(*) e um hash
+        agregado das linhas (BIT_XOR do MD5 de cada linha); blocos iguais são
+        ignorados e os diferentes são subdivididos até faixas pequenas, cujas
+        linhas são então transferidas e comparadas. O tráfego e a memória
+        acompanham o volume de alterações, não o tamanho da tabela.
+        
+        Inserções e atualizações são aplicadas juntas, em lotes de batch_size
+        linhas, com INSERT ... ON DUPLICATE KEY UPDATE de várias linhas
+        (limitados ao max_allowed_packet) e commit a cada lote.
+        
+        A última chave de cada bloco confirmado vai para data_sync_checkpoints
+        para permitir retomar uma execução interrompida.
+        
+        Tabelas com chave de várias colunas são comparadas por merge-join
+        (ver _merge_join_sync).
+        """
+        with source_conn.cursor() as source_cursor:
+            key_columns = self._get_key_columns(source_cursor, table_name)
+        
+        if len(key_columns) > 1:
+            return self._merge_join_sync(
+                table_name, key_columns, column_names, source_conn, target_conn, row_filter=row_filter
+            )
+        
+        if key_columns:
+            primary_key = key_columns[0]
+        elif primary_key not in column_names:
+            # Sem a coluna configurada, assumir que a primeira coluna é a PK
+            primary_key = column_names[0]
+        
+        key_index = column_names.index(primary_key)
+        columns_str = '`, `'.join(column_names)
+        
+        row_hash = self._row_hash_sql(column_names)
+        
+        table = {
+            'name': table_name,
+            'key': primary_key,
+            'key_index': key_index,
+            'select_sql': f"SELECT `{columns_str}` FROM `{table_name}`",
+            'checksum_sql': (
+                f"SELECT COUNT(*), COALESCE(BIT_XOR(CAST(CONV(LEFT({row_hash}, 16), 16, 10) AS UNSIGNED)), 0) "
+                f"FROM `{table_name}`"
+            ),
+            'upsert_sql': self.loader.upsert_sql(table_name, column_names, [primary_key]),
+            'filter': row_filter,
+            'pending': []
+        }
+        
+        checkpoint = self._get_checkpoint(table_name, direction, 'incremental') if direction else None
+        last_key = checkpoint['last_key'] if checkpoint else None
+        
+        if checkpoint:
+            self.logger.info(f"Retomando '{table_name}' após a chave {last_key}")
+        
+        totals = {'insertions': 0, 'updates': 0, 'ranges_compared': 0}
+        
+        try:
+            with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor, \
+                    ThreadPoolExecutor(max_workers=1) as executor:
+                # Datas TIMESTAMP com a mesma representação nos dois servidores
+                source_cursor.execute("SET SESSION time_zone = '+00:00'")
+                target_cursor.execute("SET SESSION time_zone = '+00:00'")
+                self.loader.limit_statement_size(target_cursor)
+                
+                while True:
+                    chunk_last_key = self._next_key_boundary(source_cursor, table, last_key, None, self.chunk_size)
+                    
+                    if chunk_last_key is None:
+                        break
+                    
+                    self._diff_key_range(executor, source_cursor, target_cursor, table, last_key, chunk_last_key, totals)
+                    self._flush_upserts(target_cursor, table)
+                    
+                    last_key = chunk_last_key
+                    
+                    if direction:
+                        self.config.save_sync_checkpoint(
+                            table_name, direction, 'incremental', last_key, totals['insertions'] + totals['updates']
+                        )
+                
+                if direction:
+                    self.config.clear_sync_checkpoint(table_name, direction)
                 
-                total_affected = insertions + updates
-                self.logger.success(f"Tabela '{table_name}': {insertions} inserções, {updates} atualizações")
+                total_affected = totals['insertions'] + totals['updates']
+                if total_affected:
+                    self.logger.success(
+                        f"Tabela '{table_name}': {totals['insertions']} inserções, {totals['updates']} atualizações "
+                        f"({totals['ranges_compared']} faixas comparadas linha a linha)"
+                    )
                 return total_affected
                 
         except Exception as e:
+            target_conn.rollback()
             self.logger.error(f"Erro na sincronização por comparação: {str(e)}")
             return None
     
-    def _is_critical_table(self, table_name):
-        """Verificar se uma tabela é crítica (não deve ser limpa completamente)"""
-        critical_tables = {
-            'users', 'user_passwords', 'permissions', 'roles', 
-            'processes', 'log_actions', 'log_requests'
+    def _row_hash_sql(self, column_names):
+        """Expressão SQL do MD5 de uma linha, usada no checksum das faixas
+        
+        CONCAT_WS ignora NULLs, então NULL e string vazia gerariam o mesmo
+        texto: os indicadores ISNULL() de cada coluna entram no final.
+        """
+        columns_str = '`, `'.join(column_names)
+        null_flags = ', '.join(f"ISNULL(`{col}`)" for col in column_names)
+        return f"MD5(CONCAT_WS('#', `{columns_str}`, CONCAT({null_flags})))"
+    
+    def _project_columns(self, cursor, table_name, columns_info, direction):
+        """Restringir as colunas (linhas de DESCRIBE) às habilitadas para a direção
+        
+        Segue sync_enabled e sync_direction ('both', 'to_prod', 'to_dev') de
+        data_sync_columns. Colunas da chave sempre entram, assim como colunas
+        sem configuração (criadas depois da configuração da tabela). Sem
+        direção (clonagem), todas as colunas são mantidas.
+        """
+        if not direction:
+            return columns_info
+        
+        columns_config = {column['column_name']: column for column in self.config.get_table_columns_config(table_name)}
+        excluded = {
+            name for name, column in columns_config.items()
+            if not column['is_key_column'] and (
+                not column['sync_enabled'] or column['sync_direction'] not in ('both', direction)
+            )
         }
-        return table_name.lower() in critical_tables
+        
+        if not excluded:
+            return columns_info
+        
+        excluded -= set(self._get_key_columns(cursor, table_name))
+        
+        projected = [column for column in columns_info if column[0] not in excluded]
+        if len(projected) < len(columns_info):
+            self.logger.info(f"Tabela '{table_name}': colunas fora da sincronização ({direction}): {', '.join(sorted(excluded))}")
+        
+        return projected
+    
+    def _get_key_columns(self, cursor, table_name):
+        """Colunas que identificam as linhas da tabela
+        
+        A chave primária (na ordem do índice) ou, sem ela, o primeiro índice
+        único sem colunas anuláveis. Lista vazia se não houver nenhum.
+        """
+        cursor.execute("""
+            SELECT COLUMN_NAME
+            FROM information_schema.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+            ORDER BY ORDINAL_POSITION
+        """, (table_name,))
+        key_columns = [row[0] for row in cursor.fetchall()]
+        
+        if key_columns:
+            return key_columns
+        
+        cursor.execute("""
+            SELECT s.INDEX_NAME, s.COLUMN_NAME, c.IS_NULLABLE
+            FROM information_schema.STATISTICS s
+            JOIN information_schema.COLUMNS c
+              ON c.TABLE_SCHEMA = s.TABLE_SCHEMA AND c.TABLE_NAME = s.TABLE_NAME AND c.COLUMN_NAME = s.COLUMN_NAME
+            WHERE s.TABLE_SCHEMA = DATABASE() AND s.TABLE_NAME = %s AND s.NON_UNIQUE = 0
+            ORDER BY s.INDEX_NAME, s.SEQ_IN_INDEX
+        """, (table_name,))
+        
+        unique_indexes = {}
+        for index_name, column_name, nullable in cursor.fetchall():
+            unique_indexes.setdefault(index_name, []).append((column_name, nullable))
+        
+        for columns in unique_indexes.values():
+            if all(nullable == 'NO' for _, nullable in columns):
+                return [column_name for column_name, _ in columns]
+        
+        return []
+    
+    def _merge_join_sync(self, table_name, key_columns, column_names, source_conn, target_conn,
+                         apply_upserts=True, apply_deletes=False, row_filter=None):
+        """Comparar origem e destino por merge-join de dois fluxos ordenados pela chave
+        
+        A origem é lida inteira em ORDER BY da chave por um cursor sem buffer;
+        o destino, em blocos keyset (ver _keyset_condition), deixando a
+        conexão livre para as gravações. O RowDiff gera os eventos à medida
+        que as linhas chegam, e as alterações são aplicadas em lotes (upserts
+        e DELETEs por chave) com commit a cada lote: a memória fica constante
+        e a aplicação começa na primeira diferença. Suporta chaves compostas;
+        chaves texto são comparadas por WEIGHT_STRING(), na ordem da collation,
+        e chaves ENUM/SET pelo índice interno (`coluna` + 0), a ordem do
+        ORDER BY. As expressões só entram na lista do SELECT: ORDER BY e
+        WHERE usam as colunas da chave como estão, para o índice ser usado.
+        """
+        key_indexes = [column_names.index(column) for column in key_columns]
+        sort_indexes = list(range(len(column_names), len(column_names) + len(key_columns)))
+        columns_str = '`, `'.join(column_names)
+        
+        try:
+            with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor:
+                source_cursor.execute("""
+                    SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                """, (table_name,))
+                data_types = {row[0]: row[1].lower() for row in source_cursor.fetchall()}
+                
+                sort_columns = []
+                for column in key_columns:
+                    if data_types.get(column) in STRING_DATA_TYPES:
+                        sort_columns.append(f"WEIGHT_STRING(`{column}`)")
+                    elif data_types.get(column) in ENUM_DATA_TYPES:
+                        sort_columns.append(f"`{column}` + 0")
+                    else:
+                        sort_columns.append(f"`{column}`")
+                
+                # Valor de cada coluna da chave no WHERE do keyset: ENUM/SET
+                # pelo índice (comparado como texto, sairia da ordem do ORDER BY)
+                keyset_indexes = [
+                    sort_index if data_types.get(column) in ENUM_DATA_TYPES else key_index
+                    for column, key_index, sort_index in zip(key_columns, key_indexes, sort_indexes)
+                ]
+                
+                key_list = '`, `'.join(key_columns)
+                select_sql = f"SELECT `{columns_str}`, {', '.join(sort_columns)} FROM `{table_name}`"
+                row_diff = RowDiff(len(column_names), sort_indexes)
+                
+                # Datas TIMESTAMP com a mesma representação nos dois servidores
+                source_cursor.execute("SET SESSION time_zone = '+00:00'")
+                target_cursor.execute("SET SESSION time_zone = '+00:00'")
+                self.loader.limit_statement_size(target_cursor)
+                
+                upsert_sql = self.loader.upsert_sql(table_name, column_names, key_columns)
+                counts = {'insert': 0, 'update': 0, 'delete': 0}
+                pending_upserts = []
+                pending_deletes = []
+                
+                with source_conn.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+                    stream_cursor.execute(f"{select_sql}{self._filter_clause(row_filter)} ORDER BY `{key_list}`", ())
+                    source_rows = (row for batch in self._stream_batches(stream_cursor) for row in batch)
+                    target_rows = self._iter_keyset_rows(target_cursor, select_sql, key_columns, keyset_indexes, row_filter)
+                    
+                    for event, row in row_diff.diff(source_rows, target_rows):
+                        if event == 'delete':
+                            if not apply_deletes:
+                                continue
+                            pending_deletes.append(row)
+                        else:
+                            if not apply_upserts:
+                                continue
+                            pending_upserts.append(row)
+                        
+                        counts[event] += 1
+                        
+                        if len(pending_upserts) >= self.batch_size:
+                            target_cursor.executemany(upsert_sql, pending_upserts)
+                            target_conn.commit()
+                            pending_upserts = []
+                        
+                        if len(pending_deletes) >= self.batch_size:
+                            self._delete_by_keys(target_cursor, table_name, key_columns, key_indexes, pending_deletes)
+                            target_conn.commit()
+                            pending_deletes = []
+                
+                if pending_upserts:
+                    target_cursor.executemany(upsert_sql, pending_upserts)
+                if pending_deletes:
+                    self._delete_by_keys(target_cursor, table_name, key_columns, key_indexes, pending_deletes)
+                target_conn.commit()
+                
+                total_affected = counts['insert'] + counts['update'] + counts['delete']
+                if total_affected:
+                    self.logger.success(
+                        f"Tabela '{table_name}': {counts['insert']} inserções, {counts['update']} atualizações, "
+                        f"{counts['delete']} exclusões"
+                    )
+                return total_affected
+        
+        except Exception as e:
+            target_conn.rollback()
+            self.logger.error(f"Erro na comparação por merge-join da tabela '{table_name}': {str(e)}")
+            return None
+    
+    def _iter_keyset_rows(self, cursor, select_sql, key_columns, keyset_indexes, row_filter=None):
+        """Ler uma tabela inteira em blocos keyset pela chave (possivelmente composta)
+        
+        keyset_indexes indica, para cada coluna da chave, a posição na linha
+        do valor comparado no WHERE do próximo bloco.
+        """
+        key_list = '`, `'.join(key_columns)
+        keyset_condition = self._keyset_condition(key_columns)
+        last_key = None
+        
+        while True:
+            if last_key is None:
+                cursor.execute(
+                    f"{select_sql}{self._filter_clause(row_filter)} ORDER BY `{key_list}` LIMIT {self.chunk_size}", ()
+                )
+            else:
+                cursor.execute(
+                    f"{select_sql} WHERE {keyset_condition}{self._filter_clause(row_filter, 'AND')} "
+                    f"ORDER BY `{key_list}` LIMIT {self.chunk_size}",
+                    self._keyset_params(last_key)
+                )
+            rows = cursor.fetchall()
+            
+            if not rows:
+                return
+            
+            yield from rows
+            
+            if len(rows) < self.chunk_size:
+                return
+            
+            last_key = [rows[-1][index] for index in keyset_indexes]
+    
+    def _keyset_condition(self, key_columns):
+        """WHERE das linhas após a última chave, expandido coluna a coluna
+        
+        (a, b) > (x, y) vira a >= x AND (a > x OR (a = x AND b > y)): o
+        MySQL não usa o índice para comparar construtores de linha, e o
+        a >= x inicial garante a leitura por faixa na primeira coluna.
+        """
+        alternatives = []
+        for position, column in enumerate(key_columns):
+            equalities = [f"`{previous}` = %s" for previous in key_columns[:position]]
+            alternatives.append('(' + ' AND '.join(equalities + [f"`{column}` > %s"]) + ')')
+        
+        return f"(`{key_columns[0]}` >= %s AND ({' OR '.join(alternatives)}))"
+    
+    def _keyset_params(self, last_key):
+        """Parâmetros de _keyset_condition para a última chave lida"""
+        params = [last_key[0]]
+        for position in range(len(last_key)):
+            params.extend(last_key[:position + 1])
+        return params
+    
+    def _delete_by_keys(self, cursor, table_name, key_columns, key_indexes, rows):
+        """Remover um lote de linhas pela chave (possivelmente composta)
+        
+        Usa um construtor de linha, WHERE (a, b) IN ((%s, %s), ...), que o
+        MySQL resolve por faixas no índice da chave (OR de igualdades não).
+        """
+        key_list = '`, `'.join(key_columns)
+        row_placeholder = '(' + ', '.join(['%s'] * len(key_columns)) + ')'
+        params = [row[index] for row in rows for index in key_indexes]
+        cursor.execute(
+            f"DELETE FROM `{table_name}` WHERE (`{key_list}`) IN ({', '.join([row_placeholder] * len(rows))})",
+            params
+        )
+    
+    def _filter_clause(self, row_filter, keyword='WHERE'):
+        """Trecho SQL do filtro de linhas da tabela (vazio se não houver filtro)
+        
+        O '%' do filtro é duplicado: as consultas que o usam devem sempre ser
+        executadas com parâmetros (mesmo que vazios), para o PyMySQL formatá-las.
+        """
+        if not row_filter:
+            return ""
+        
+        return f" {keyword} ({row_filter.replace('%', '%%')})"
+    
+    def _key_range_condition(self, key, lower, upper, row_filter=None):
+        """Montar o WHERE de uma faixa de chaves (lower exclusivo, upper inclusivo)"""
+        conditions = []
+        params = []
+        
+        if lower is not None:
+            conditions.append(f"`{key}` > %s")
+            params.append(lower)
+        if upper is not None:
+            conditions.append(f"`{key}` <= %s")
+            params.append(upper)
+        if row_filter:
+            conditions.append(self._filter_clause(row_filter, '').strip())
+        
+        where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where_clause, params
+    
+    def _next_key_boundary(self, cursor, table, lower, upper, rows):
+        """Chave da rows-ésima linha após lower (ou a última até upper); None se não houver linhas"""
+        where_clause, params = self._key_range_condition(table['key'], lower, upper, table['filter'])
+        
+        cursor.execute(f"""
+            SELECT MAX(`{table['key']}`) FROM (
+                SELECT `{table['key']}` FROM `{table['name']}`{where_clause}
+                ORDER BY `{table['key']}` LIMIT {rows}
+            ) AS chunk
+        """, params)
+        
+        return cursor.fetchone()[0]
+    
+    def _key_range_checksum(self, cursor, table, lower, upper):
+        """Calcular (linhas, checksum) de uma faixa de chaves"""
+        where_clause, params = self._key_range_condition(table['key'], lower, upper, table['filter'])
+        cursor.execute(f"{table['checksum_sql']}{where_clause}", params)
+        count, checksum = cursor.fetchone()
+        return int(count), int(checksum)
+    
+    def _diff_key_range(self, executor, source_cursor, target_cursor, table, lower, upper, totals):
+        """Comparar uma faixa de chaves e aplicar as diferenças no destino"""
+        source_future = executor.submit(self._key_range_checksum, source_cursor, table, lower, upper)
+        target_checksum = self._key_range_checksum(target_cursor, table, lower, upper)
+        source_checksum = source_future.result()
+        
+        if source_checksum == target_checksum:
+            return
+        
+        source_count = source_checksum[0]
+        
+        # Nada a inserir ou atualizar (linhas só no destino não são removidas)
+        if source_count == 0:
+            return
+        
+        if source_count <= self.checksum_leaf_rows:
+            self._apply_key_range_diff(source_cursor, target_cursor, table, lower, upper, totals)
+            return
+        
+        # Subdividir a faixa pelas chaves da origem
+        step = max(self.checksum_leaf_rows, -(-source_count // self.checksum_fanout))
+        sub_lower = lower
+        
+        while True:
+            sub_upper = self._next_key_boundary(source_cursor, table, sub_lower, upper, step)
+            
+            if sub_upper is None:
+                break
+            
+            self._diff_key_range(executor, source_cursor, target_cursor, table, sub_lower, sub_upper, totals)
+            sub_lower = sub_upper
+    
+    def _apply_key_range_diff(self, source_cursor, target_cursor, table, lower, upper, totals):
+        """Transferir as linhas de uma faixa pequena e aplicar inserções e atualizações"""
+        where_clause, params = self._key_range_condition(table['key'], lower, upper, table['filter'])
+        key_index = table['key_index']
+        
+        source_cursor.execute(f"{table['select_sql']}{where_clause}", params)
+        source_rows = source_cursor.fetchall()
+        
+        target_cursor.execute(f"{table['select_sql']}{where_clause}", params)
+        target_records = {row[key_index]: row for row in target_cursor.fetchall()}
+        
+        totals['ranges_compared'] += 1
+        
+        for source_record in source_rows:
+            pk = source_record[key_index]
+            
+            if pk not in target_records:
+                # Registro novo - inserir
+                table['pending'].append(source_record)
+                totals['insertions'] += 1
+            elif source_record != target_records[pk]:
+                # Registro modificado - atualizar
+                table['pending'].append(source_record)
+                totals['updates'] += 1
+        
+        if len(table['pending']) >= self.batch_size:
+            self._flush_upserts(target_cursor, table)
+    
+    def _flush_upserts(self, target_cursor, table):
+        """Aplicar as alterações pendentes em INSERT ... ON DUPLICATE KEY UPDATE de várias linhas e confirmar"""
+        if table['pending']:
+            target_cursor.executemany(table['upsert_sql'], table['pending'])
+            table['pending'] = []
+        
+        target_cursor.connection.commit()
+    
+    def _propagate_deletes(self, table_name, primary_key, source_conn, target_conn, row_filter=None):
+        """Remover do destino as linhas cujas chaves não existem mais na origem
+        
+        As chaves do destino são lidas em blocos pela ordem da chave (keyset);
+        para cada bloco, as chaves da origem na mesma faixa chegam por um
+        cursor sem buffer e são descontadas do bloco (anti-join). As que
+        sobram foram excluídas na origem e são removidas em lotes de
+        batch_size chaves, com commit a cada lote. A memória fica limitada
+        ao tamanho do bloco. Com row_filter, só as linhas do filtro são
+        comparadas nos dois lados.
+        """
+        with target_conn.cursor() as target_cursor:
+            key_columns = self._get_key_columns(target_cursor, table_name)
+            
+            target_cursor.execute("""
+                SELECT DATA_TYPE FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+            """, (table_name, key_columns[0] if key_columns else primary_key))
+            row = target_cursor.fetchone()
+        key_type = row[0].lower() if row else None
+        
+        # Chave composta ou texto: anti-join por merge-join apenas das colunas
+        # da chave. O merge-join compara chaves texto por WEIGHT_STRING(), como
+        # a collation; pela igualdade do Python, 'abc' e 'ABC' (collation
+        # case-insensitive) ou 'abc ' e 'abc' (PAD SPACE) seriam chaves
+        # diferentes, e a linha do destino seria removida
+        if len(key_columns) > 1 or (key_columns and key_type in STRING_DATA_TYPES):
+            return self._merge_join_sync(
+                table_name, key_columns, key_columns, source_conn, target_conn,
+                apply_upserts=False, apply_deletes=True, row_filter=row_filter
+            )
+        
+        if key_columns:
+            primary_key = key_columns[0]
+        
+        total_deleted = 0
+        last_key = None
+        
+        try:
+            with target_conn.cursor() as target_cursor:
+                while True:
+                    where_clause, params = self._key_range_condition(primary_key, last_key, None, row_filter)
+                    target_cursor.execute(
+                        f"SELECT `{primary_key}` FROM `{table_name}`{where_clause} "
+                        f"ORDER BY `{primary_key}` LIMIT {self.chunk_size}",
+                        params
+                    )
+                    target_keys = [row[0] for row in target_cursor.fetchall()]
+                    
+                    if not target_keys:
+                        break
+                    
+                    missing_keys = set(target_keys)
+                    where_clause, params = self._key_range_condition(primary_key, last_key, target_keys[-1], row_filter)
+                    
+                    with source_conn.cursor(pymysql.cursors.SSCursor) as stream_cursor:
+                        stream_cursor.execute(f"SELECT `{primary_key}` FROM `{table_name}`{where_clause}", params)
+                        for batch in self._stream_batches(stream_cursor):
+                            missing_keys.difference_update(row[0] for row in batch)
+                    
+                    # Remover na ordem da chave, em lotes
+                    deleted_keys = [key for key in target_keys if key in missing_keys]
+                    for i in range(0, len(deleted_keys), self.batch_size):
+                        batch_keys = deleted_keys[i:i + self.batch_size]
+                        placeholders = ', '.join(['%s'] * len(batch_keys))
+                        total_deleted += target_cursor.execute(
+                            f"DELETE FROM `{table_name}` WHERE `{primary_key}` IN ({placeholders})", batch_keys
+                        )
+                        target_conn.commit()
+                    
+                    last_key = target_keys[-1]
+                    
+                    if len(target_keys) < self.chunk_size:
+                        break
+            
+            if total_deleted:
+                self.logger.success(f"Tabela '{table_name}': {total_deleted} registros excluídos na origem removidos do destino")
+            return total_deleted
+        
+        except Exception as e:
+            target_conn.rollback()
+            self.logger.error(f"Erro ao propagar exclusões da tabela '{table_name}': {str(e)}")
+            return None
     
-    def _create_connection(self, connection_details):
+    def _create_connection(self, connection_details, local_infile=False):
         """Criar conexão PyMySQL"""
         try:
             connection = pymysql.connect(
@@ -341,7 +1760,8 @@ class DataSynchronizer:
                 password=connection_details['password'],
                 database=connection_details['database'],
                 charset='utf8mb4',
-                autocommit=False
+                autocommit=False,
+                local_infile=local_infile
             )
             return connection
             
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Clonagem completa de banco de dados (estrutura + dados)
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from database.schema_cloner import SchemaCloner
+from database.data_synchronizer import DataSynchronizer
+
+class DatabaseCloner:
+    def __init__(self, logger, workers=4, batch_size=1000, loader='load_data', bulk_profile=False, disable_binlog=False,
+                 checkpoint_max_age_hours=24):
+        """Inicializar clonador de banco de dados"""
+        self.logger = logger
+        self.workers = workers
+        self.schema_cloner = SchemaCloner(logger)
+        self.synchronizer = DataSynchronizer(
+            logger, batch_size, loader, bulk_profile, disable_binlog, checkpoint_max_age_hours
+        )
+    
+    def clone_database(self, source_connection, target_connection):
+        """Clonar estrutura e dados da origem para um destino vazio
+        
+        As tabelas são criadas sem índices secundários, os dados são copiados
+        em paralelo e só então índices e chaves estrangeiras são construídos,
+        uma única vez por tabela (mais rápido do que manter os índices linha a
+        linha durante a carga).
+        """
+        operation = "CLONAGEM DE BANCO DE DADOS"
+        
+        try:
+            self.logger.operation_start(operation)
+            started_at = time.time()
+            
+            # Passo 1: Verificar destino
+            self.logger.step(1, 4, "Verificando banco de destino")
+            if self.schema_cloner.list_tables(target_connection):
+                self.logger.error(f"O banco de destino '{target_connection['database']}' não está vazio. Clonagem abortada.")
+                self.logger.operation_end(operation, False)
+                return False
+            
+            # Passo 2: Criar tabelas sem índices secundários e sem FKs
+            self.logger.step(2, 4, "Criando tabelas (índices e chaves estrangeiras adiados)")
+            clone_result = self.schema_cloner.clone_structure(
+                source_connection, target_connection, defer_indexes=True
+            )
+            
+            if clone_result is None or clone_result['failed']:
+                self.logger.error("Falha na criação das tabelas. Clonagem abortada.")
+                self.logger.operation_end(operation, False)
+                return False
+            
+            # Passo 3: Copiar dados em paralelo
+            tables = clone_result['created']
+            self.logger.step(3, 4, f"Copiando dados de {len(tables)} tabelas")
+            total_rows, failed_tables = self._copy_all_data(source_connection, target_connection, tables)
+            
+            # Passo 4: Construir índices (em paralelo) e chaves estrangeiras (em série)
+            self.logger.step(4, 4, "Construindo índices e chaves estrangeiras")
+            self.schema_cloner.apply_deferred_clauses(
+                target_connection, clone_result['indexes'], "índices", parallel=True
+            )
+            self.schema_cloner.apply_deferred_clauses(
+                target_connection, clone_result['foreign_keys'], "chaves estrangeiras"
+            )
+            
+            elapsed = time.time() - started_at
+            rate = total_rows / elapsed if elapsed > 0 else total_rows
+            self.logger.info(f"{total_rows} registros copiados em {elapsed:.1f}s ({rate:.0f} registros/s)")
+            
+            if failed_tables:
+                self.logger.error(f"Falha na cópia de dados das tabelas: {', '.join(failed_tables)}")
+                self.logger.operation_end(operation, False)
+                return False
+            
+            self.logger.success(f"Banco clonado: {len(tables)} tabelas, {total_rows} registros")
+            self.logger.operation_end(operation, True)
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Erro na clonagem do banco de dados: {str(e)}")
+            self.logger.operation_end(operation, False)
+            return False
+    
+    def _copy_all_data(self, source_connection, target_connection, tables):
+        """Copiar os dados de todas as tabelas em paralelo"""
+        total_rows = 0
+        failed_tables = []
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            results = executor.map(
+                lambda table_name: (
+                    table_name,
+                    self.synchronizer.copy_table_data(table_name, source_connection, target_connection)
+                ),
+                tables
+            )
+            
+            for table_name, records in results:
+                if records is None:
+                    failed_tables.append(table_name)
+                else:
+                    total_rows += records
+        
+        return total_rows, failed_tables
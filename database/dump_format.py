@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Formato dos arquivos de backup (TSV compatível com LOAD DATA + compressão)
+"""
+
+import io
+import re
+import gzip
+import hashlib
+import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Tipos retornados como bytes pelo PyMySQL: gravados em hexadecimal
+BINARY_DATA_TYPES = {
+    'binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob', 'bit',
+    'geometry', 'point', 'linestring', 'polygon', 'multipoint',
+    'multilinestring', 'multipolygon', 'geometrycollection', 'geomcollection'
+}
+
+COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+    'none': ''
+}
+
+class _ClosingGzipFile(gzip.GzipFile):
+    """GzipFile que também fecha o arquivo recebido em fileobj"""
+    
+    def close(self):
+        fileobj = self.fileobj
+        try:
+            super().close()
+        finally:
+            if fileobj is not None:
+                fileobj.close()
+
+class DumpFormat:
+    """Codificação das linhas no formato padrão do LOAD DATA
+    
+    Campos separados por TAB, linhas terminadas por LF, NULL como \\N e os
+    caracteres especiais escapados com barra invertida. Colunas binárias são
+    gravadas em hexadecimal e restauradas com UNHEX().
+    """
+    
+    NULL = '\\N'
+    ESCAPES = str.maketrans({
+        '\\': '\\\\',
+        '\t': '\\t',
+        '\n': '\\n',
+        '\r': '\\r',
+        '\0': '\\0'
+    })
+    UNESCAPES = {
+        't': '\t',
+        'n': '\n',
+        'r': '\r',
+        '0': '\0',
+        'Z': '\x1a'
+    }
+    UNESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+    
+    def __init__(self, compression='gzip'):
+        """Inicializar formato com o tipo de compressão desejado"""
+        if compression == 'zstd' and zstandard is None:
+            compression = 'gzip'
+        
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Compressão não suportada: {compression}")
+        
+        self.compression = compression
+    
+    def file_checksum(self, path):
+        """Calcular (sha256, tamanho em bytes) de um arquivo gravado"""
+        digest = hashlib.sha256()
+        size = 0
+        
+        with open(path, 'rb') as checked_file:
+            for block in iter(lambda: checked_file.read(1024 * 1024), b''):
+                digest.update(block)
+                size += len(block)
+        
+        return digest.hexdigest(), size
+    
+    def open_writer(self, path):
+        """Abrir arquivo de dados para escrita (texto UTF-8, comprimido)"""
+        if self.compression == 'gzip':
+            # Sem nome nem data no cabeçalho: o mesmo conteúdo gera os mesmos bytes
+            raw = _ClosingGzipFile(filename='', mode='wb', compresslevel=6, fileobj=open(path, 'wb'), mtime=0)
+        elif self.compression == 'zstd':
+            raw = zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+        else:
+            raw = open(path, 'wb')
+        
+        return io.TextIOWrapper(raw, encoding='utf-8', newline='\n')
+    
+    def detect_compression(self, path):
+        """Tipo de compressão de um arquivo de dados a partir da extensão"""
+        return next(
+            (name for name, extension in COMPRESSION_EXTENSIONS.items() if extension and path.endswith(extension)),
+            'none'
+        )
+    
+    def open_reader(self, path, compression=None):
+        """Abrir arquivo de dados para leitura
+        
+        Sem compression informada, o tipo é detectado pela extensão do arquivo.
+        """
+        if compression is None:
+            compression = self.detect_compression(path)
+        
+        if compression == 'gzip':
+            raw = gzip.open(path, 'rb')
+        elif compression == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("Pacote 'zstandard' necessário para ler backups .zst")
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        else:
+            raw = open(path, 'rb')
+        
+        return io.TextIOWrapper(raw, encoding='utf-8', newline='\n')
+    
+    def encode_row(self, row):
+        """Codificar uma linha do banco como uma linha TSV (com o LF final)"""
+        return '\t'.join(self.encode_value(value) for value in row) + '\n'
+    
+    def encode_value(self, value):
+        """Codificar um valor individual"""
+        if value is None:
+            return self.NULL
+        
+        if isinstance(value, str):
+            return value.translate(self.ESCAPES)
+        
+        if isinstance(value, (bytes, bytearray)):
+            return value.hex()
+        
+        if isinstance(value, datetime.timedelta):
+            return self._format_time(value)
+        
+        if isinstance(value, float):
+            return repr(value)
+        
+        return str(value)
+    
+    def decode_line(self, line, hex_columns):
+        """Decodificar uma linha TSV em uma tupla de valores
+        
+        Os valores não binários são devolvidos como texto; o servidor faz a
+        conversão para o tipo da coluna na inserção.
+        """
+        fields = line.rstrip('\n').split('\t')
+        values = []
+        
+        for index, field in enumerate(fields):
+            if field == self.NULL:
+                values.append(None)
+            elif index in hex_columns:
+                values.append(bytes.fromhex(field))
+            elif '\\' in field:
+                values.append(self.UNESCAPE_PATTERN.sub(self._unescape_match, field))
+            else:
+                values.append(field)
+        
+        return tuple(values)
+    
+    def _unescape_match(self, match):
+        """Substituir uma sequência de escape pelo caractere original"""
+        char = match.group(1)
+        return self.UNESCAPES.get(char, char)
+    
+    def _format_time(self, value):
+        """Formatar um TIME (timedelta) como [-]HH:MM:SS[.ffffff]
+        
+        str(timedelta) produziria '1 day, 2:00:00' para valores acima de 24h.
+        """
+        sign = '-' if value < datetime.timedelta(0) else ''
+        value = abs(value)
+        
+        total_seconds = value.days * 86400 + value.seconds
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        
+        formatted = f"{sign}{hours:02d}:{minutes:02d}:{seconds:02d}"
+        if value.microseconds:
+            formatted += f".{value.microseconds:06d}"
+        
+        return formatted
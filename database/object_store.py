@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazenamento de arquivos de backup endereçado por conteúdo (sha256)
+"""
+
+import os
+import time
+import uuid
+import hashlib
+
+# Objetos gravados ou reaproveitados há menos tempo que isso não são
+# coletados: podem pertencer a um backup ainda em andamento, cujo manifesto
+# só é gravado no final
+GC_GRACE_SECONDS = 24 * 3600
+
+class ObjectStore:
+    """Blobs gravados em objects/<2 primeiros hex>/<sha256>
+    
+    Conteúdo idêntico é gravado uma única vez, então backups sucessivos só
+    ocupam espaço com o que mudou. Os manifestos dos backups referenciam os
+    objetos pelo hash.
+    """
+    
+    def __init__(self, objects_dir):
+        """Inicializar repositório de objetos"""
+        self.objects_dir = objects_dir
+        os.makedirs(self.objects_dir, exist_ok=True)
+    
+    def object_path(self, object_id):
+        """Caminho do arquivo de um objeto"""
+        return os.path.join(self.objects_dir, object_id[:2], object_id)
+    
+    def temp_path(self):
+        """Caminho temporário (no mesmo disco) para gravar um objeto antes de conhecer seu hash"""
+        return os.path.join(self.objects_dir, f"tmp-{uuid.uuid4().hex}")
+    
+    def add_file(self, temp_path):
+        """Mover um arquivo temporário para o repositório
+        
+        Retorna (sha256, tamanho). Se o objeto já existir, o temporário é
+        descartado.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        
+        with open(temp_path, 'rb') as temp_file:
+            for block in iter(lambda: temp_file.read(1024 * 1024), b''):
+                digest.update(block)
+                size += len(block)
+        
+        object_id = digest.hexdigest()
+        path = self.object_path(object_id)
+        
+        if os.path.exists(path):
+            os.remove(temp_path)
+            self._touch(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        
+        return object_id, size
+    
+    def add_bytes(self, data):
+        """Gravar um conteúdo pequeno (DDL) e retornar seu sha256"""
+        object_id = hashlib.sha256(data).hexdigest()
+        path = self.object_path(object_id)
+        
+        if os.path.exists(path):
+            self._touch(path)
+        else:
+            temp_path = self.temp_path()
+            with open(temp_path, 'wb') as temp_file:
+                temp_file.write(data)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        
+        return object_id
+    
+    def reuse(self, object_id):
+        """Marcar um objeto existente como reaproveitado; False se ele não existir mais"""
+        path = self.object_path(object_id)
+        if not os.path.exists(path):
+            return False
+        
+        self._touch(path)
+        return True
+    
+    def _touch(self, path):
+        """Renovar a data de um objeto reaproveitado (protege-o da coleta durante o backup)"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def object_stat(self, object_id):
+        """(tamanho em bytes, data de modificação) de um objeto; (0, 0) se não existir"""
+        try:
+            stat = os.stat(self.object_path(object_id))
+        except OSError:
+            return 0, 0
+        
+        return stat.st_size, stat.st_mtime
+    
+    def collect_garbage(self, referenced_ids, grace_seconds=GC_GRACE_SECONDS):
+        """Remover objetos não referenciados (temporários em gravação são mantidos)
+        
+        Objetos modificados nos últimos grace_seconds também são mantidos:
+        um backup concorrente (ou cujo manifesto ainda não foi gravado) pode
+        estar usando-os. Retorna (objetos removidos, bytes liberados).
+        """
+        removed = 0
+        freed = 0
+        cutoff = time.time() - grace_seconds
+        
+        for entry in os.listdir(self.objects_dir):
+            entry_path = os.path.join(self.objects_dir, entry)
+            
+            if entry.startswith('tmp-'):
+                continue
+            
+            if not os.path.isdir(entry_path):
+                continue
+            
+            for object_id in os.listdir(entry_path):
+                if object_id in referenced_ids:
+                    continue
+                
+                path = os.path.join(entry_path, object_id)
+                if os.path.getmtime(path) > cutoff:
+                    continue
+                
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+            
+            if not os.listdir(entry_path):
+                os.rmdir(entry_path)
+        
+        return removed, freed
@@ -9,14 +9,22 @@ import datetime
 import pymysql
 from colorama import Fore, Style
 from database.structure_analyzer import StructureAnalyzer
+from database.schema_cloner import SchemaCloner
+from database.backup_engine import BackupEngine
 
 class Replicator:
-    def __init__(self, logger):
+    def __init__(self, logger, column_order_max_rows=None, backup_compression='gzip', backup_workers=4,
+                 backup_size_budget_mb=None):
         """Inicializar replicador"""
         self.logger = logger
-        self.structure_analyzer = StructureAnalyzer(logger)
+        self.structure_analyzer = StructureAnalyzer(logger, column_order_max_rows)
+        self.schema_cloner = SchemaCloner(logger)
         self.backups_dir = "backups"
         os.makedirs(self.backups_dir, exist_ok=True)
+        self.backup_engine = BackupEngine(
+            logger, self.backups_dir, backup_compression, backup_workers,
+            size_budget_mb=backup_size_budget_mb
+        )
     
     def replicate_structure(self, source_connection, target_connection):
         """Executar replicação completa de estrutura"""
@@ -150,88 +158,8 @@ class Replicator:
             return None
     
     def create_backup(self, connection_details):
-        """Criar backup do banco de dados"""
-        try:
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_filename = f"backup_{connection_details['database']}_{timestamp}.sql"
-            backup_path = os.path.join(self.backups_dir, backup_filename)
-            
-            self.logger.info(f"Criando backup: {backup_filename}")
-            
-            # Usar mysqldump para criar backup
-            import subprocess
-            
-            cmd = [
-                'mysqldump',
-                f"--host={connection_details['host']}",
-                f"--port={connection_details['port']}",
-                f"--user={connection_details['username']}",
-                f"--password={connection_details['password']}",
-                '--single-transaction',
-                '--routines',
-                '--triggers',
-                '--no-data',  # Apenas estrutura, sem dados
-                connection_details['database']
-            ]
-            
-            with open(backup_path, 'w', encoding='utf-8') as backup_file:
-                result = subprocess.run(cmd, stdout=backup_file, stderr=subprocess.PIPE, text=True)
-            
-            if result.returncode == 0:
-                self.logger.success(f"Backup criado: {backup_path}")
-                return backup_path
-            else:
-                self.logger.error(f"Erro no mysqldump: {result.stderr}")
-                # Fallback: backup manual via Python
-                return self._create_manual_backup(connection_details, backup_path)
-                
-        except Exception as e:
-            self.logger.warning(f"Erro com mysqldump: {str(e)}")
-            # Fallback: backup manual via Python
-            return self._create_manual_backup(connection_details, backup_path)
-    
-    def _create_manual_backup(self, connection_details, backup_path):
-        """Criar backup manual usando Python"""
-        try:
-            self.logger.info("Criando backup manual...")
-            
-            connection = self._create_connection(connection_details)
-            if not connection:
-                return None
-            
-            with open(backup_path, 'w', encoding='utf-8') as backup_file:
-                backup_file.write(f"-- Backup da estrutura do banco {connection_details['database']}\n")
-                backup_file.write(f"-- Criado em: {datetime.datetime.now()}\n")
-                backup_file.write(f"-- Host: {connection_details['host']}:{connection_details['port']}\n\n")
-                
-                with connection.cursor() as cursor:
-                    # Obter lista de tabelas
-                    cursor.execute("""
-                        SELECT TABLE_NAME 
-                        FROM information_schema.TABLES 
-                        WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
-                        ORDER BY TABLE_NAME
-                    """, (connection_details['database'],))
-                    
-                    tables = cursor.fetchall()
-                    
-                    for (table_name,) in tables:
-                        # Obter CREATE TABLE
-                        cursor.execute(f"SHOW CREATE TABLE `{table_name}`")
-                        create_table = cursor.fetchone()
-                        
-                        if create_table:
-                            backup_file.write(f"-- Estrutura da tabela `{table_name}`\n")
-                            backup_file.write(f"DROP TABLE IF EXISTS `{table_name}`;\n")
-                            backup_file.write(f"{create_table[1]};\n\n")
-            
-            connection.close()
-            self.logger.success(f"Backup manual criado: {backup_path}")
-            return backup_path
-            
-        except Exception as e:
-            self.logger.error(f"Erro ao criar backup manual: {str(e)}")
-            return None
+        """Criar backup do banco de dados (estrutura + dados)"""
+        return self.backup_engine.create_backup(connection_details)
     
     def _execute_replication(self, target_connection, source_structure, differences):
         """Executar comandos de replicação"""
@@ -248,6 +176,9 @@ class Replicator:
                 cursor.execute("START TRANSACTION")
                 
                 try:
+                    # Carregar mapa de índices do destino uma única vez
+                    index_map = self._load_index_map(cursor)
+                    
                     # 1. Criar tabelas novas
                     for table_name in differences['new_tables']:
                         self.logger.info(f"Criando tabela: {table_name}")
@@ -258,43 +189,37 @@ class Replicator:
                         self.logger.success(f"Tabela {table_name} criada")
                         
                         # Sincronizar índices da nova tabela imediatamente
-                        self._sync_table_indexes_in_transaction(cursor, source_structure, table_name)
+                        self._sync_table_indexes_in_transaction(cursor, source_structure, table_name, index_map)
                     
                     # 2. Modificar tabelas existentes
                     for table_name, table_diff in differences['modified_tables'].items():
                         self.logger.info(f"Modificando tabela: {table_name}")
                         
-                        # Adicionar colunas novas
-                        for column_name in table_diff['new_columns']:
-                            alter_sql = self._generate_add_column_sql(
-                                table_name, 
-                                column_name, 
-                                source_structure['tables'][table_name],
-                                table_diff
-                            )
-                            cursor.execute(alter_sql)
-                            total_operations += 1
-                            successful_operations += 1
-                            self.logger.success(f"Coluna {column_name} adicionada à tabela {table_name}")
+                        # Colunas novas, modificadas e reposicionadas em um único ALTER
+                        alter_sql = self._generate_alter_table_sql(
+                            table_name,
+                            source_structure['tables'][table_name],
+                            table_diff
+                        )
                         
-                        # Modificar colunas existentes
-                        for modified_col in table_diff['modified_columns']:
-                            modify_sql = self._generate_modify_column_sql(
-                                table_name,
-                                modified_col['name'],
-                                modified_col['source']
-                            )
-                            self.logger.debug(f"EXECUTANDO SQL: {modify_sql}")
-                            cursor.execute(modify_sql)
+                        if alter_sql:
+                            self.logger.debug(f"EXECUTANDO SQL: {alter_sql}")
+                            cursor.execute(alter_sql)
                             total_operations += 1
                             successful_operations += 1
-                            self.logger.success(f"Coluna {modified_col['name']} modificada na tabela {table_name}")
+                            
+                            for column_name in table_diff['new_columns']:
+                                self.logger.success(f"Coluna {column_name} adicionada à tabela {table_name}")
+                            for modified_col in table_diff['modified_columns']:
+                                self.logger.success(f"Coluna {modified_col['name']} modificada na tabela {table_name}")
+                            if table_diff.get('column_moves'):
+                                self.logger.success(f"Colunas reposicionadas na tabela {table_name}: {', '.join(table_diff['column_moves'])}")
                         
                         # Sincronizar índices da tabela modificada imediatamente
-                        self._sync_table_indexes_in_transaction(cursor, source_structure, table_name)
+                        self._sync_table_indexes_in_transaction(cursor, source_structure, table_name, index_map)
                     
                     # 3. Sincronizar índices de todas as tabelas em uma única operação
-                    self._sync_all_indexes_batch(cursor, source_structure, differences)
+                    self._sync_all_indexes_batch(cursor, source_structure, differences, index_map)
                     
                     # Confirmar transação
                     cursor.execute("COMMIT")
@@ -378,8 +303,8 @@ class Replicator:
         
         return sql
     
-    def _generate_add_column_sql(self, table_name, column_name, table_structure, table_diff):
-        """Gerar SQL ALTER TABLE ADD COLUMN com posicionamento correto"""
+    def _generate_add_column_clause(self, column_name, table_structure):
+        """Gerar cláusula ADD COLUMN (com posicionamento) para uso em ALTER TABLE"""
         # Encontrar a coluna na estrutura de origem
         column_info = None
         for col in table_structure['columns']:
@@ -390,7 +315,7 @@ class Replicator:
         if not column_info:
             raise Exception(f"Coluna {column_name} não encontrada na estrutura de origem")
         
-        sql = f"ALTER TABLE `{table_name}` ADD COLUMN `{column_name}` {column_info['column_type']}"
+        sql = f"ADD COLUMN `{column_name}` {column_info['column_type']}"
         
         if not column_info['nullable']:
             sql += " NOT NULL"
@@ -427,25 +352,26 @@ class Replicator:
             sql += f" COMMENT '{column_info['comment']}'"
         
         # Determinar posicionamento da coluna
+        sql += self._generate_column_position_sql(column_info, table_structure)
+        
+        return sql
+    
+    def _generate_column_position_sql(self, column_info, table_structure):
+        """Gerar posicionamento (FIRST / AFTER) de uma coluna conforme a origem"""
         position = column_info['position']
         if position == 1:
-            sql += " FIRST"
-        else:
-            # Encontrar a coluna anterior
-            prev_column = None
-            for col in table_structure['columns']:
-                if col['position'] == position - 1:
-                    prev_column = col['name']
-                    break
-            
-            if prev_column:
-                sql += f" AFTER `{prev_column}`"
+            return " FIRST"
         
-        return sql
+        # Encontrar a coluna anterior
+        for col in table_structure['columns']:
+            if col['position'] == position - 1:
+                return f" AFTER `{col['name']}`"
+        
+        return ""
     
-    def _generate_modify_column_sql(self, table_name, column_name, column_info):
-        """Gerar SQL ALTER TABLE MODIFY COLUMN"""
-        sql = f"ALTER TABLE `{table_name}` MODIFY COLUMN `{column_name}` {column_info['column_type']}"
+    def _generate_modify_column_clause(self, table_name, column_name, column_info):
+        """Gerar cláusula MODIFY COLUMN para uso em ALTER TABLE"""
+        sql = f"MODIFY COLUMN `{column_name}` {column_info['column_type']}"
         
         # LOG DETALHADO para debug
         self.logger.debug(f"DEBUG SQL: Gerando MODIFY para {table_name}.{column_name}")
@@ -516,6 +442,35 @@ class Replicator:
         
         return sql
     
+    def _generate_alter_table_sql(self, table_name, table_structure, table_diff):
+        """Gerar um único ALTER TABLE com colunas novas, modificadas e reposicionadas
+        
+        As cláusulas seguem a ordem das colunas na origem, de modo que cada
+        AFTER referencia uma coluna que já está na posição final.
+        """
+        modified_columns = {col['name']: col['source'] for col in table_diff['modified_columns']}
+        new_columns = set(table_diff['new_columns'])
+        moved_columns = set(table_diff.get('column_moves', []))
+        
+        clauses = []
+        for column_info in sorted(table_structure['columns'], key=lambda col: col['position']):
+            column_name = column_info['name']
+            
+            if column_name in new_columns:
+                clauses.append(self._generate_add_column_clause(column_name, table_structure))
+            elif column_name in moved_columns:
+                clause = self._generate_modify_column_clause(
+                    table_name, column_name, modified_columns.get(column_name, column_info)
+                )
+                clauses.append(clause + self._generate_column_position_sql(column_info, table_structure))
+            elif column_name in modified_columns:
+                clauses.append(self._generate_modify_column_clause(table_name, column_name, modified_columns[column_name]))
+        
+        if not clauses:
+            return None
+        
+        return f"ALTER TABLE `{table_name}`\n  " + ",\n  ".join(clauses)
+    
     def _validate_replication(self, source_connection, target_connection):
         """Validar se a replicação foi bem-sucedida"""
         try:
@@ -643,38 +598,21 @@ class Replicator:
             total_count = 0
             
             with connection.cursor() as cursor:
+                # Estado atual dos índices (pode ter mudado desde a análise)
+                index_map = self._load_index_map(cursor)
+                
                 for table_name in source_structure['tables']:
                     if table_name not in target_structure['tables']:
                         continue
-                        
-                    source_table = source_structure['tables'][table_name]
-                    target_table = target_structure['tables'][table_name]
                     
-                    source_indexes = source_table.get('indexes', {})
-                    target_indexes = target_table.get('indexes', {})
+                    source_indexes = source_structure['tables'][table_name].get('indexes', {})
                     
                     # Criar índices faltantes
-                    for index_name, index_info in source_indexes.items():
-                        if index_name == 'PRIMARY':
-                            continue
-                            
-                        total_count += 1
-                        
-                        if index_name not in target_indexes:
-                            columns_str = '`, `'.join(index_info['columns'])
-                            unique_str = 'UNIQUE ' if index_info['unique'] else ''
-                            
-                            create_index_sql = f"CREATE {unique_str}INDEX `{index_name}` ON `{table_name}` (`{columns_str}`)"
-                            
-                            try:
-                                cursor.execute(create_index_sql)
-                                success_count += 1
-                                self.logger.success(f"Índice final {index_name} criado na tabela {table_name}")
-                            except Exception as e:
-                                if "Duplicate key name" not in str(e):
-                                    self.logger.warning(f"Erro ao criar índice final {index_name}: {str(e)}")
-                        else:
-                            success_count += 1  # Índice já existe
+                    self._create_missing_indexes(cursor, table_name, source_indexes, index_map)
+                    
+                    total, existing = self._count_synced_indexes(table_name, source_indexes, index_map)
+                    total_count += total
+                    success_count += existing
             
             connection.close()
             return success_count >= (total_count * 0.8)  # Aceitar 80% de sucesso
@@ -685,8 +623,12 @@ class Replicator:
     
     def list_backups(self):
         """Listar backups disponíveis"""
-        backups = []
+        backups = [
+            f"{name}/ ({size} bytes) - {created_at}"
+            for name, size, created_at in self.backup_engine.list_backups()
+        ]
         
+        # Backups antigos em arquivo .sql único (somente estrutura)
         if os.path.exists(self.backups_dir):
             for file in os.listdir(self.backups_dir):
                 if file.endswith('.sql'):
@@ -700,61 +642,129 @@ class Replicator:
         
         return sorted(backups, reverse=True)
     
-    def _sync_table_indexes_in_transaction(self, cursor, source_structure, table_name):
+    def _load_index_map(self, cursor):
+        """Carregar todos os índices do schema de destino com uma única consulta
+        
+        Partes funcionais de um índice (COLUMN_NAME nulo) ficam fora da lista
+        de colunas; o índice entra no mapa marcado como 'functional'.
+        """
+        cursor.execute("""
+            SELECT
+                TABLE_NAME,
+                INDEX_NAME,
+                GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) as columns,
+                MIN(NON_UNIQUE) as non_unique,
+                SUM(COLUMN_NAME IS NULL) as expressions
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            GROUP BY TABLE_NAME, INDEX_NAME
+        """)
+        
+        index_map = {}
+        for row in cursor.fetchall():
+            index_map.setdefault(row[0], {})[row[1]] = {
+                'columns': row[2].split(',') if row[2] else [],
+                'unique': row[3] == 0,
+                'functional': bool(row[4])
+            }
+        
+        return index_map
+    
+    def _generate_add_indexes_sql(self, table_name, indexes):
+        """Gerar um único ALTER TABLE que adiciona todos os índices informados"""
+        clauses = []
+        for index_name, index_info in indexes:
+            columns_str = '`, `'.join(index_info['columns'])
+            unique_str = 'UNIQUE ' if index_info['unique'] else ''
+            clauses.append(f"ADD {unique_str}INDEX `{index_name}` (`{columns_str}`)")
+        
+        return f"ALTER TABLE `{table_name}` " + ", ".join(clauses)
+    
+    def _create_missing_indexes(self, cursor, table_name, source_indexes, index_map):
+        """Criar os índices faltantes de uma tabela em uma única passada e atualizar o mapa"""
+        existing_indexes = index_map.setdefault(table_name, {})
+        
+        missing = [
+            (index_name, index_info)
+            for index_name, index_info in source_indexes.items()
+            if index_name != 'PRIMARY' and index_name not in existing_indexes
+        ]
+        
+        # Índices funcionais não têm nome de coluna em STATISTICS e não podem
+        # ser recriados a partir da lista de colunas
+        functional = [index_name for index_name, index_info in missing if None in index_info['columns']]
+        if functional:
+            self.logger.warning(
+                f"Índices funcionais não replicados na tabela {table_name}: {', '.join(functional)}"
+            )
+            missing = [(index_name, index_info) for index_name, index_info in missing if index_name not in functional]
+        
+        if not missing:
+            return 0
+        
+        created = []
+        failures = []
+        
+        try:
+            # Todos os índices em um único ALTER: a tabela é percorrida uma só vez
+            cursor.execute(self._generate_add_indexes_sql(table_name, missing))
+            created = missing
+        except Exception as e:
+            if len(missing) == 1:
+                failures.append((missing[0], e))
+            else:
+                # Criar um a um para que um índice inválido não bloqueie os demais
+                self.logger.warning(f"ALTER combinado falhou na tabela {table_name}, criando índices individualmente: {str(e)}")
+                for index_item in missing:
+                    try:
+                        cursor.execute(self._generate_add_indexes_sql(table_name, [index_item]))
+                        created.append(index_item)
+                    except Exception as index_error:
+                        failures.append((index_item, index_error))
+        
+        for (index_name, index_info), error in failures:
+            if "Duplicate key name" in str(error) or "already exists" in str(error):
+                existing_indexes[index_name] = index_info
+            else:
+                self.logger.warning(f"Erro ao criar índice {index_name}: {str(error)}")
+        
+        for index_name, index_info in created:
+            existing_indexes[index_name] = index_info
+            self.logger.success(f"Índice {index_name} criado na tabela {table_name}")
+        
+        return len(created)
+    
+    def _count_synced_indexes(self, table_name, source_indexes, index_map):
+        """Contar índices da origem (exceto PRIMARY) e quantos já existem no destino"""
+        existing_indexes = index_map.get(table_name, {})
+        names = [name for name in source_indexes if name != 'PRIMARY']
+        return len(names), sum(1 for name in names if name in existing_indexes)
+    
+    def _sync_table_indexes_in_transaction(self, cursor, source_structure, table_name, index_map=None):
         """Sincronizar índices de uma tabela dentro de uma transação ativa"""
         try:
             if table_name not in source_structure['tables']:
                 return
-                
-            source_table = source_structure['tables'][table_name]
-            source_indexes = source_table.get('indexes', {})
             
-            # Obter índices atuais da tabela de destino
-            cursor.execute("""
-                SELECT 
-                    INDEX_NAME,
-                    GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) as columns,
-                    MIN(NON_UNIQUE) as is_unique
-                FROM information_schema.STATISTICS 
-                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
-                AND INDEX_NAME != 'PRIMARY'
-                GROUP BY INDEX_NAME
-            """, (table_name,))
-            
-            existing_indexes = {}
-            for row in cursor.fetchall():
-                existing_indexes[row[0]] = {
-                    'columns': row[1].split(','),
-                    'unique': row[2] == 0
-                }
+            if index_map is None:
+                index_map = self._load_index_map(cursor)
+            
+            source_indexes = source_structure['tables'][table_name].get('indexes', {})
             
             # Criar índices faltantes
-            for index_name, index_info in source_indexes.items():
-                if index_name == 'PRIMARY':
-                    continue  # Pular chave primária
-                
-                if index_name not in existing_indexes:
-                    columns_str = '`, `'.join(index_info['columns'])
-                    unique_str = 'UNIQUE ' if index_info['unique'] else ''
-                    
-                    create_index_sql = f"CREATE {unique_str}INDEX `{index_name}` ON `{table_name}` (`{columns_str}`)"
-                    
-                    try:
-                        cursor.execute(create_index_sql)
-                        self.logger.success(f"Índice {index_name} criado na tabela {table_name}")
-                    except Exception as e:
-                        # Ignorar erros de índices duplicados ou incompatíveis
-                        if "Duplicate key name" not in str(e) and "already exists" not in str(e):
-                            self.logger.warning(f"Erro ao criar índice {index_name}: {str(e)}")
-                            
+            self._create_missing_indexes(cursor, table_name, source_indexes, index_map)
+        
         except Exception as e:
             self.logger.warning(f"Erro ao sincronizar índices da tabela {table_name}: {str(e)}")
 
-    def _sync_all_indexes_batch(self, cursor, source_structure, differences):
+    def _sync_all_indexes_batch(self, cursor, source_structure, differences, index_map=None):
         """Sincronizar todos os índices em lote para otimizar performance"""
         try:
             self.logger.info("Sincronizando índices em lote...")
             
+            if index_map is None:
+                index_map = self._load_index_map(cursor)
+            
             # Obter todas as tabelas que precisam de sincronização
             tables_to_sync = set()
             tables_to_sync.update(differences['new_tables'])
@@ -763,40 +773,11 @@ class Replicator:
             # Processar cada tabela
             for table_name in tables_to_sync:
                 if table_name in source_structure['tables']:
-                    source_table = source_structure['tables'][table_name]
-                    source_indexes = source_table.get('indexes', {})
-                    
-                    # Verificar índices existentes
-                    cursor.execute("""
-                        SELECT INDEX_NAME
-                        FROM information_schema.STATISTICS 
-                        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
-                        AND INDEX_NAME != 'PRIMARY'
-                        GROUP BY INDEX_NAME
-                    """, (table_name,))
-                    
-                    existing_indexes = {row[0] for row in cursor.fetchall()}
-                    
-                    # Criar índices faltantes
-                    for index_name, index_info in source_indexes.items():
-                        if index_name == 'PRIMARY':
-                            continue
-                            
-                        if index_name not in existing_indexes:
-                            columns_str = '`, `'.join(index_info['columns'])
-                            unique_str = 'UNIQUE ' if index_info['unique'] else ''
-                            
-                            create_index_sql = f"CREATE {unique_str}INDEX `{index_name}` ON `{table_name}` (`{columns_str}`)"
-                            
-                            try:
-                                cursor.execute(create_index_sql)
-                                self.logger.success(f"Índice {index_name} criado na tabela {table_name}")
-                            except Exception as e:
-                                if "Duplicate key name" not in str(e) and "already exists" not in str(e):
-                                    self.logger.warning(f"Erro ao criar índice {index_name}: {str(e)}")
+                    source_indexes = source_structure['tables'][table_name].get('indexes', {})
+                    self._create_missing_indexes(cursor, table_name, source_indexes, index_map)
             
             self.logger.success("Sincronização de índices em lote concluída")
-                    
+        
         except Exception as e:
             self.logger.error(f"Erro na sincronização de índices em lote: {str(e)}")
 
@@ -814,23 +795,9 @@ class Replicator:
             target_indexes = target_table.get('indexes', {})
             
             with connection.cursor() as cursor:
-                # Verificar índices que existem na origem mas não no destino
-                for index_name, index_info in source_indexes.items():
-                    if index_name == 'PRIMARY':
-                        continue  # Pular chave primária
-                    
-                    if index_name not in target_indexes:
-                        # Criar índice faltante
-                        columns_str = '`, `'.join(index_info['columns'])
-                        unique_str = 'UNIQUE ' if index_info['unique'] else ''
-                        
-                        create_index_sql = f"CREATE {unique_str}INDEX `{index_name}` ON `{table_name}` (`{columns_str}`)"
-                        
-                        try:
-                            cursor.execute(create_index_sql)
-                            self.logger.success(f"Índice {index_name} criado na tabela {table_name}")
-                        except Exception as e:
-                            self.logger.warning(f"Erro ao criar índice {index_name}: {str(e)}")
+                # Criar, em um único ALTER, os índices que existem na origem mas não no destino
+                index_map = {table_name: dict(target_indexes)}
+                self._create_missing_indexes(cursor, table_name, source_indexes, index_map)
             
             connection.close()
             return True
@@ -881,46 +848,20 @@ class Replicator:
                 
                 try:
                     # Sincronizar todos os índices de todas as tabelas de uma vez
+                    index_map = self._load_index_map(cursor)
+                    
                     for table_name in source_structure['tables']:
                         if table_name not in target_structure['tables']:
                             continue  # Pular tabelas que não existem no destino
                             
-                        source_table = source_structure['tables'][table_name]
-                        source_indexes = source_table.get('indexes', {})
-                        
-                        # Obter índices existentes no destino
-                        cursor.execute("""
-                            SELECT INDEX_NAME
-                            FROM information_schema.STATISTICS 
-                            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
-                            AND INDEX_NAME != 'PRIMARY'
-                            GROUP BY INDEX_NAME
-                        """, (table_name,))
-                        
-                        existing_indexes = {row[0] for row in cursor.fetchall()}
+                        source_indexes = source_structure['tables'][table_name].get('indexes', {})
                         
                         # Criar todos os índices faltantes
-                        for index_name, index_info in source_indexes.items():
-                            if index_name == 'PRIMARY':
-                                continue
-                                
-                            total_operations += 1
-                            
-                            if index_name not in existing_indexes:
-                                columns_str = '`, `'.join(index_info['columns'])
-                                unique_str = 'UNIQUE ' if index_info['unique'] else ''
-                                
-                                create_index_sql = f"CREATE {unique_str}INDEX `{index_name}` ON `{table_name}` (`{columns_str}`)"
-                                
-                                try:
-                                    cursor.execute(create_index_sql)
-                                    success_count += 1
-                                    self.logger.success(f"Índice {index_name} criado na tabela {table_name}")
-                                except Exception as e:
-                                    if "Duplicate key name" not in str(e) and "already exists" not in str(e):
-                                        self.logger.warning(f"Erro ao criar índice {index_name}: {str(e)}")
-                            else:
-                                success_count += 1  # Índice já existe
+                        self._create_missing_indexes(cursor, table_name, source_indexes, index_map)
+                        
+                        total, existing = self._count_synced_indexes(table_name, source_indexes, index_map)
+                        total_operations += total
+                        success_count += existing
                     
                     cursor.execute("COMMIT")
                     self.logger.success(f"Sincronização forçada concluída: {success_count}/{total_operations} operações")
@@ -954,24 +895,19 @@ class Replicator:
             total_count = 0
             
             with connection.cursor() as cursor:
+                index_map = self._load_index_map(cursor)
+                
                 for table_name, index_diff in index_differences.items():
-                    for missing_index in index_diff['missing_indexes']:
-                        total_count += 1
-                        index_name = missing_index['name']
-                        index_info = missing_index['info']
-                        
-                        columns_str = '`, `'.join(index_info['columns'])
-                        unique_str = 'UNIQUE ' if index_info['unique'] else ''
-                        
-                        create_index_sql = f"CREATE {unique_str}INDEX `{index_name}` ON `{table_name}` (`{columns_str}`)"
-                        
-                        try:
-                            cursor.execute(create_index_sql)
-                            success_count += 1
-                            self.logger.success(f"Índice {index_name} criado na tabela {table_name}")
-                        except Exception as e:
-                            if "Duplicate key name" not in str(e):
-                                self.logger.warning(f"Erro ao criar índice {index_name}: {str(e)}")
+                    missing_indexes = {
+                        missing_index['name']: missing_index['info']
+                        for missing_index in index_diff['missing_indexes']
+                    }
+                    
+                    self._create_missing_indexes(cursor, table_name, missing_indexes, index_map)
+                    
+                    total, existing = self._count_synced_indexes(table_name, missing_indexes, index_map)
+                    total_count += total
+                    success_count += existing
             
             connection.close()
             self.logger.info(f"Sincronização de índices: {success_count}/{total_count} concluídas")
@@ -986,65 +922,33 @@ class Replicator:
         try:
             self.logger.step(5, 6, f"Criando {len(source_structure['tables'])} tabelas do zero")
             
-            connection = self._create_connection(target_connection)
-            if not connection:
-                return False
+            # Clonar a partir do SHOW CREATE TABLE da origem: tabelas em paralelo,
+            # FKs em uma passada final (a ordem de criação deixa de importar)
+            source_connection = source_structure['connection_info']
+            table_names = list(source_structure['tables'].keys())
             
-            tables_created = 0
-            total_tables = len(source_structure['tables'])
+            clone_result = self.schema_cloner.clone_structure(source_connection, target_connection, table_names)
+            if clone_result is None or clone_result['failed']:
+                self.logger.error("Falha na criação das tabelas. Replicação abortada.")
+                self.logger.operation_end("REPLICAÇÃO DE ESTRUTURA", False)
+                return False
             
-            with connection.cursor() as cursor:
-                cursor.execute("START TRANSACTION")
-                
-                try:
-                    # Ordenar tabelas por dependências (se possível)
-                    table_names = list(source_structure['tables'].keys())
-                    
-                    # Criar todas as tabelas
-                    for table_name in table_names:
-                        self.logger.info(f"Criando tabela: {table_name}")
-                        
-                        table_structure = source_structure['tables'][table_name]
-                        create_sql = self._generate_create_table_sql(table_structure, table_name)
-                        
-                        cursor.execute(create_sql)
-                        tables_created += 1
-                        self.logger.success(f"Tabela {table_name} criada ({tables_created}/{total_tables})")
-                    
-                    # Criar todos os índices após criar as tabelas
-                    self.logger.info("Criando índices para todas as tabelas...")
-                    indexes_created = 0
-                    
-                    for table_name in table_names:
-                        table_structure = source_structure['tables'][table_name]
-                        indexes = table_structure.get('indexes', {})
-                        
-                        for index_name, index_info in indexes.items():
-                            if index_name == 'PRIMARY':
-                                continue  # Chave primária já foi criada com a tabela
-                            
-                            columns_str = '`, `'.join(index_info['columns'])
-                            unique_str = 'UNIQUE ' if index_info['unique'] else ''
-                            
-                            create_index_sql = f"CREATE {unique_str}INDEX `{index_name}` ON `{table_name}` (`{columns_str}`)"
-                            
-                            try:
-                                cursor.execute(create_index_sql)
-                                indexes_created += 1
-                                self.logger.success(f"Índice {index_name} criado na tabela {table_name}")
-                            except Exception as e:
-                                if "Duplicate key name" not in str(e):
-                                    self.logger.warning(f"Erro ao criar índice {index_name}: {str(e)}")
-                    
-                    cursor.execute("COMMIT")
-                    self.logger.success(f"Criação completa: {tables_created} tabelas e {indexes_created} índices")
-                    
-                except Exception as e:
-                    cursor.execute("ROLLBACK")
-                    self.logger.error(f"Erro durante criação das tabelas: {str(e)}")
-                    return False
+            foreign_keys_applied = self.schema_cloner.apply_deferred_clauses(
+                target_connection, clone_result['foreign_keys'], "chaves estrangeiras"
+            )
+            foreign_keys_expected = sum(1 for clauses in clone_result['foreign_keys'].values() if clauses)
+            if foreign_keys_applied < foreign_keys_expected:
+                self.logger.error(
+                    f"Chaves estrangeiras aplicadas em {foreign_keys_applied} de "
+                    f"{foreign_keys_expected} tabelas. Replicação abortada."
+                )
+                self.logger.operation_end("REPLICAÇÃO DE ESTRUTURA", False)
+                return False
             
-            connection.close()
+            self.logger.success(
+                f"Criação completa: {len(clone_result['created'])} tabelas, "
+                f"chaves estrangeiras em {foreign_keys_applied} tabelas"
+            )
             
             # Passo 6: Validar criação
             self.logger.step(6, 6, "Validando criação das tabelas")
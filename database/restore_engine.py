@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Restauração paralela de backups com carga em massa
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import shutil
+import tempfile
+import threading
+import pymysql
+from concurrent.futures import ThreadPoolExecutor
+from database.dump_format import DumpFormat
+from database.schema_cloner import SchemaCloner
+from database.object_store import ObjectStore
+
+# Erros que indicam LOAD DATA LOCAL desabilitado no cliente ou no servidor
+LOCAL_INFILE_ERRORS = {
+    1148,  # The used command is not allowed with this MySQL version
+    2068,  # LOAD DATA LOCAL INFILE file request rejected
+    3948   # Loading local data is disabled
+}
+
+def check_load_warnings(cursor):
+    """Falhar se o último LOAD DATA gerou avisos
+    
+    LOAD DATA LOCAL implica IGNORE: chaves duplicadas e valores truncados
+    ou convertidos viram avisos em vez de erros. Os INSERTs do fallback
+    falham nesses casos, e o resultado não deve depender do modo de carga.
+    """
+    cursor.execute("SHOW WARNINGS")
+    problems = [row for row in cursor.fetchall() if row[0] != 'Note']
+    
+    if problems:
+        details = '; '.join(f"{code}: {message}" for _, code, message in problems[:3])
+        raise pymysql.err.DataError(
+            f"LOAD DATA gerou {len(problems)} avisos (linhas duplicadas, truncadas ou convertidas): {details}"
+        )
+
+class RestoreEngine:
+    def __init__(self, logger, workers=4, insert_batch_rows=1000):
+        """Inicializar motor de restauração"""
+        self.logger = logger
+        self.workers = workers
+        self.insert_batch_rows = insert_batch_rows
+        self.format = DumpFormat()
+        self.schema_cloner = SchemaCloner(logger)
+        self.objects = None
+        self._local_infile_available = True
+    
+    def restore_backup(self, backup_path, target_connection):
+        """Restaurar um backup no banco de destino
+        
+        As tabelas do backup são recriadas sem índices secundários e sem FKs,
+        os arquivos de dados são carregados em paralelo (LOAD DATA LOCAL
+        INFILE, ou INSERT em lotes se o servidor não permitir) e só então
+        índices, chaves estrangeiras, views e triggers são criados.
+        """
+        operation = "RESTAURAÇÃO DE BACKUP"
+        
+        try:
+            self.logger.operation_start(operation)
+            started_at = time.time()
+            
+            manifest = self._read_manifest(backup_path)
+            tables = manifest['tables']
+            self.objects = ObjectStore(os.path.join(os.path.dirname(os.path.abspath(backup_path)), 'objects'))
+            self._local_infile_available = True
+            
+            # Passo 1: Recriar tabelas
+            self.logger.step(1, 4, f"Recriando {len(tables)} tabelas (índices e chaves estrangeiras adiados)")
+            deferred = self._create_tables(backup_path, manifest, target_connection)
+            if deferred is None:
+                self.logger.operation_end(operation, False)
+                return False
+            
+            # Passo 2: Carregar dados em paralelo
+            self.logger.step(2, 4, "Carregando dados")
+            total_rows, failed_files = self._load_all_data(backup_path, manifest, target_connection)
+            
+            # Passo 3: Índices e chaves estrangeiras
+            self.logger.step(3, 4, "Construindo índices e chaves estrangeiras")
+            failed_structures = []
+            for clauses_by_table, description, parallel in (
+                (deferred['indexes'], "índices", True),
+                (deferred['foreign_keys'], "chaves estrangeiras", False)
+            ):
+                expected = sum(1 for clauses in clauses_by_table.values() if clauses)
+                applied = self.schema_cloner.apply_deferred_clauses(
+                    target_connection, clauses_by_table, description, parallel=parallel
+                )
+                if applied < expected:
+                    failed_structures.append(f"{description} em {expected - applied}/{expected} tabelas")
+            
+            # Passo 4: Views e triggers
+            self.logger.step(4, 4, "Recriando views e triggers")
+            failed_objects = self._create_views_and_triggers(backup_path, manifest, target_connection)
+            if failed_objects:
+                failed_structures.append(f"views/triggers ({', '.join(failed_objects)})")
+            
+            elapsed = time.time() - started_at
+            rate = total_rows / elapsed if elapsed > 0 else total_rows
+            self.logger.info(f"{total_rows} registros restaurados em {elapsed:.1f}s ({rate:.0f} registros/s)")
+            
+            if failed_files:
+                self.logger.error(f"Falha ao carregar {len(failed_files)} arquivos: {', '.join(failed_files)}")
+            if failed_structures:
+                self.logger.error(f"Falha ao aplicar {'; '.join(failed_structures)}")
+            if failed_files or failed_structures:
+                self.logger.operation_end(operation, False)
+                return False
+            
+            self.logger.success(f"Backup restaurado em '{target_connection['database']}'")
+            self.logger.operation_end(operation, True)
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Erro na restauração do backup: {str(e)}")
+            self.logger.operation_end(operation, False)
+            return False
+    
+    def _read_manifest(self, backup_path):
+        """Ler o manifesto do backup"""
+        with open(os.path.join(backup_path, 'manifest.json'), 'r', encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    
+    def _entry_path(self, backup_path, entry, legacy_key='file'):
+        """Caminho de um arquivo DDL do backup
+        
+        Backups de formato 3 referenciam objetos do repositório pelo sha256;
+        formatos anteriores guardam os arquivos no próprio diretório.
+        """
+        if entry.get('object'):
+            return self.objects.object_path(entry['object'])
+        return os.path.join(backup_path, entry[legacy_key])
+    
+    def _data_file_info(self, backup_path, manifest, entry):
+        """Normalizar a entrada de um arquivo de dados do manifesto"""
+        # Manifestos de formato 1 listam apenas o nome do arquivo
+        if isinstance(entry, str):
+            return {'path': os.path.join(backup_path, entry), 'name': entry, 'sha256': None, 'bytes': 0, 'compression': None}
+        
+        if entry.get('object'):
+            return {
+                'path': self.objects.object_path(entry['object']),
+                'name': entry['object'][:12],
+                'sha256': entry['object'],
+                'bytes': entry.get('bytes', 0),
+                'compression': manifest['compression']
+            }
+        
+        return {
+            'path': os.path.join(backup_path, entry['file']),
+            'name': entry['file'],
+            'sha256': entry.get('sha256'),
+            'bytes': entry.get('bytes', 0),
+            'compression': None
+        }
+    
+    def _read_statement(self, path, source_database=None):
+        """Ler um comando DDL gravado pelo backup
+        
+        DEFINER é removido (exigiria privilégios de SUPER para recriar) e, se
+        informado, o prefixo do schema de origem também, para que o objeto
+        aponte para o banco restaurado.
+        """
+        with open(path, 'r', encoding='utf-8') as statement_file:
+            statement = statement_file.read().strip().rstrip(';')
+        
+        statement = re.sub(r'DEFINER=`(?:[^`]|``)*`@`(?:[^`]|``)*`\s*', '', statement)
+        
+        if source_database:
+            statement = statement.replace(f"`{source_database}`.", "")
+        
+        return statement
+    
+    def _create_tables(self, backup_path, manifest, target_connection):
+        """Recriar as tabelas sem índices secundários e sem FKs
+        
+        Retorna {'indexes': {...}, 'foreign_keys': {...}} com as cláusulas
+        adiadas, ou None em caso de erro.
+        """
+        deferred = {'indexes': {}, 'foreign_keys': {}}
+        
+        connection = self._create_connection(target_connection)
+        if not connection:
+            return None
+        
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+                
+                for view in manifest.get('views', []):
+                    cursor.execute(f"DROP VIEW IF EXISTS `{view['name']}`")
+                
+                for table_name, table in manifest['tables'].items():
+                    create_sql = self._read_statement(self._entry_path(backup_path, {'object': table.get('schema'), 'file': table.get('schema_file')}))
+                    create_sql, index_clauses, foreign_key_clauses = self.schema_cloner.split_create_table(
+                        create_sql, defer_indexes=True
+                    )
+                    
+                    cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
+                    cursor.execute(create_sql)
+                    
+                    if index_clauses:
+                        deferred['indexes'][table_name] = index_clauses
+                    if foreign_key_clauses:
+                        deferred['foreign_keys'][table_name] = foreign_key_clauses
+            
+            return deferred
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao recriar tabelas: {str(e)}")
+            return None
+        
+        finally:
+            connection.close()
+    
+    def _load_all_data(self, backup_path, manifest, target_connection):
+        """Carregar os arquivos de dados em paralelo (um arquivo por vez em cada worker)
+        
+        Retorna (total de linhas, arquivos com falha).
+        """
+        tasks = []
+        for table_name, table in manifest['tables'].items():
+            for entry in table['files']:
+                tasks.append((table_name, table, self._data_file_info(backup_path, manifest, entry)))
+        
+        # Arquivos maiores primeiro para equilibrar a carga entre os workers
+        tasks.sort(key=lambda task: task[2].get('bytes', 0), reverse=True)
+        
+        task_queue = queue.Queue()
+        for task in tasks:
+            task_queue.put(task)
+        
+        total_files = len(tasks)
+        progress = {'files': 0, 'rows': 0, 'bytes': 0}
+        failed_files = []
+        lock = threading.Lock()
+        started_at = time.time()
+        
+        def worker():
+            connection = self._create_connection(target_connection, local_infile=True)
+            if not connection:
+                return
+            
+            try:
+                with connection.cursor() as cursor:
+                    self._prepare_session(cursor)
+                    
+                    while True:
+                        try:
+                            table_name, table, file_info = task_queue.get_nowait()
+                        except queue.Empty:
+                            return
+                        
+                        try:
+                            rows = self._load_file(connection, cursor, table_name, table, file_info)
+                        except Exception as e:
+                            connection.rollback()
+                            self.logger.error(f"Erro ao carregar {file_info['name']}: {str(e)}")
+                            with lock:
+                                failed_files.append(file_info['name'])
+                            continue
+                        
+                        with lock:
+                            progress['files'] += 1
+                            progress['rows'] += rows
+                            progress['bytes'] += file_info.get('bytes', 0)
+                            elapsed = time.time() - started_at
+                            rate = progress['rows'] / elapsed if elapsed > 0 else progress['rows']
+                            self.logger.info(
+                                f"[{progress['files']}/{total_files}] {table_name}: {rows} registros "
+                                f"(total {progress['rows']}, {rate:.0f} registros/s)"
+                            )
+            finally:
+                connection.close()
+        
+        workers = max(1, min(self.workers, total_files))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in range(workers):
+                executor.submit(worker)
+        
+        # Arquivos não processados (worker sem conexão) também contam como falha
+        while not task_queue.empty():
+            failed_files.append(task_queue.get_nowait()[2]['name'])
+        
+        return progress['rows'], failed_files
+    
+    def _prepare_session(self, cursor):
+        """Configurar a sessão de carga"""
+        # O backup grava TIMESTAMP em UTC
+        cursor.execute("SET SESSION time_zone = '+00:00'")
+        # Preservar ids 0 em colunas AUTO_INCREMENT, mantendo o modo do servidor
+        # (inclusive o modo estrito)
+        cursor.execute("SET SESSION sql_mode = CONCAT_WS(',', NULLIF(@@SESSION.sql_mode, ''), 'NO_AUTO_VALUE_ON_ZERO')")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute("SET UNIQUE_CHECKS = 0")
+    
+    def _load_file(self, connection, cursor, table_name, table, file_info):
+        """Carregar um arquivo de dados, verificando antes o sha256 do manifesto"""
+        path = file_info['path']
+        
+        if file_info['sha256']:
+            checksum, _ = self.format.file_checksum(path)
+            if checksum != file_info['sha256']:
+                raise ValueError(f"checksum não confere ({checksum} != {file_info['sha256']})")
+        
+        if self._local_infile_available:
+            try:
+                rows = self._load_with_load_data(cursor, path, file_info['compression'], table_name, table)
+                connection.commit()
+                return rows
+            except pymysql.MySQLError as e:
+                connection.rollback()
+                if not (e.args and e.args[0] in LOCAL_INFILE_ERRORS):
+                    raise
+                self._local_infile_available = False
+                self.logger.warning(f"LOAD DATA LOCAL indisponível ({str(e)}), usando INSERT em lotes")
+        
+        rows = self._load_with_inserts(cursor, path, file_info['compression'], table_name, table)
+        connection.commit()
+        return rows
+    
+    def _load_with_load_data(self, cursor, path, compression, table_name, table):
+        """Carregar com LOAD DATA LOCAL INFILE
+        
+        Arquivos sem compressão são lidos direto do backup. Os comprimidos são
+        descomprimidos para um pipe nomeado lido pelo LOAD DATA, sem gravar
+        uma cópia em disco; sem suporte a pipes (Windows), para um temporário.
+        """
+        hex_columns = set(table['hex_columns'])
+        targets = []
+        assignments = []
+        
+        for index, column in enumerate(table['columns']):
+            if index in hex_columns:
+                targets.append(f"@hex{index}")
+                assignments.append(f"`{column}` = UNHEX(@hex{index})")
+            else:
+                targets.append(f"`{column}`")
+        
+        sql = f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table_name}` CHARACTER SET utf8mb4 ({', '.join(targets)})"
+        if assignments:
+            sql += " SET " + ", ".join(assignments)
+        
+        if compression is None:
+            compression = self.format.detect_compression(path)
+        
+        if compression == 'none':
+            rows = cursor.execute(sql, (path,))
+        elif hasattr(os, 'mkfifo'):
+            rows = self._load_through_fifo(cursor, sql, path, compression)
+        else:
+            rows = self._load_through_temp_file(cursor, sql, path, compression)
+        
+        check_load_warnings(cursor)
+        return rows
+    
+    def _load_through_fifo(self, cursor, sql, path, compression):
+        """Executar o LOAD DATA lendo de um pipe alimentado por uma thread"""
+        fifo_dir = tempfile.mkdtemp()
+        fifo_path = os.path.join(fifo_dir, 'data.tsv')
+        os.mkfifo(fifo_path, 0o600)
+        errors = []
+        
+        def feed():
+            try:
+                with open(fifo_path, 'wb') as fifo:
+                    with self.format.open_reader(path, compression) as reader:
+                        shutil.copyfileobj(reader.buffer, fifo, 1024 * 1024)
+            except Exception as e:
+                errors.append(e)
+        
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        
+        try:
+            rows = cursor.execute(sql, (fifo_path,))
+        finally:
+            # Se o LOAD DATA falhou sem abrir o pipe, a thread continua
+            # bloqueada esperando um leitor: abrir e fechar o pipe a libera
+            while feeder.is_alive():
+                try:
+                    os.close(os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK))
+                except OSError:
+                    pass
+                feeder.join(0.1)
+            
+            os.remove(fifo_path)
+            os.rmdir(fifo_dir)
+        
+        # Erro na descompressão fecha o pipe antes do fim: a carga foi parcial
+        if errors:
+            raise errors[0]
+        
+        return rows
+    
+    def _load_through_temp_file(self, cursor, sql, path, compression):
+        """Executar o LOAD DATA a partir de uma cópia descomprimida"""
+        with tempfile.NamedTemporaryFile(suffix='.tsv', delete=False) as plain_file:
+            plain_path = plain_file.name
+            with self.format.open_reader(path, compression) as reader:
+                shutil.copyfileobj(reader.buffer, plain_file, 1024 * 1024)
+        
+        try:
+            return cursor.execute(sql, (plain_path,))
+        finally:
+            os.remove(plain_path)
+    
+    def _load_with_inserts(self, cursor, path, compression, table_name, table):
+        """Carregar com INSERT em lotes (executemany agrupa em INSERTs de várias linhas)"""
+        hex_columns = set(table['hex_columns'])
+        columns_str = '`, `'.join(table['columns'])
+        placeholders = ', '.join(['%s'] * len(table['columns']))
+        insert_sql = f"INSERT INTO `{table_name}` (`{columns_str}`) VALUES ({placeholders})"
+        
+        total_rows = 0
+        batch = []
+        
+        with self.format.open_reader(path, compression) as reader:
+            for line in reader:
+                batch.append(self.format.decode_line(line, hex_columns))
+                
+                if len(batch) >= self.insert_batch_rows:
+                    cursor.executemany(insert_sql, batch)
+                    total_rows += len(batch)
+                    batch = []
+        
+        if batch:
+            cursor.executemany(insert_sql, batch)
+            total_rows += len(batch)
+        
+        return total_rows
+    
+    def _create_views_and_triggers(self, backup_path, manifest, target_connection):
+        """Recriar views (em rodadas, até resolver dependências entre elas) e triggers
+        
+        Retorna os nomes das views e triggers que não puderam ser recriados.
+        """
+        views = manifest.get('views', [])
+        triggers = manifest.get('triggers', [])
+        if not views and not triggers:
+            return []
+        
+        connection = self._create_connection(target_connection)
+        if not connection:
+            return [entry['name'] for entry in views + triggers]
+        
+        source_database = manifest.get('database')
+        failed_objects = []
+        
+        try:
+            with connection.cursor() as cursor:
+                pending = list(views)
+                
+                while pending:
+                    failed = []
+                    last_error = None
+                    
+                    for view in pending:
+                        try:
+                            cursor.execute(self._read_statement(self._entry_path(backup_path, view), source_database))
+                        except Exception as e:
+                            failed.append(view)
+                            last_error = e
+                    
+                    if len(failed) == len(pending):
+                        names = ', '.join(view['name'] for view in failed)
+                        self.logger.error(f"Views não recriadas ({names}): {str(last_error)}")
+                        failed_objects.extend(view['name'] for view in failed)
+                        break
+                    
+                    pending = failed
+                
+                for trigger in triggers:
+                    try:
+                        cursor.execute(f"DROP TRIGGER IF EXISTS `{trigger['name']}`")
+                        cursor.execute(self._read_statement(self._entry_path(backup_path, trigger)))
+                    except Exception as e:
+                        self.logger.error(f"Erro ao recriar trigger {trigger['name']}: {str(e)}")
+                        failed_objects.append(trigger['name'])
+            
+            connection.commit()
+        
+        finally:
+            connection.close()
+        
+        return failed_objects
+    
+    def _create_connection(self, connection_details, local_infile=False):
+        """Criar conexão PyMySQL"""
+        try:
+            connection = pymysql.connect(
+                host=connection_details['host'],
+                port=connection_details['port'],
+                user=connection_details['username'],
+                password=connection_details['password'],
+                database=connection_details['database'],
+                charset='utf8mb4',
+                autocommit=False,
+                local_infile=local_infile
+            )
+            return connection
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao conectar: {str(e)}")
+            return None
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Comparação de duas sequências de linhas ordenadas pela chave (merge-join)
+"""
+
+class RowDiff:
+    """Gera eventos de diferença entre origem e destino
+    
+    As duas sequências devem vir na mesma ordem (ORDER BY da chave) e cada
+    linha traz, após as value_count colunas de dados, as colunas de ordenação
+    indicadas em sort_indexes (por exemplo WEIGHT_STRING() das chaves texto,
+    para reproduzir a ordem da collation). Os eventos saem à medida que as
+    linhas são lidas, sem carregar nenhuma das tabelas em memória:
+        
+        ('insert', linha)  chave só na origem
+        ('update', linha)  mesma chave com valores diferentes (linha da origem)
+        ('delete', linha)  chave só no destino (linha do destino)
+    """
+    
+    def __init__(self, value_count, sort_indexes):
+        """Inicializar comparador"""
+        self.value_count = value_count
+        self.sort_indexes = sort_indexes
+    
+    def sort_key(self, row):
+        """Chave de ordenação de uma linha"""
+        return tuple(row[index] for index in self.sort_indexes)
+    
+    def diff(self, source_rows, target_rows):
+        """Percorrer as duas sequências em paralelo e gerar os eventos"""
+        source_iter = iter(source_rows)
+        target_iter = iter(target_rows)
+        source_row = next(source_iter, None)
+        target_row = next(target_iter, None)
+        
+        while source_row is not None or target_row is not None:
+            if target_row is None:
+                yield 'insert', source_row[:self.value_count]
+                source_row = next(source_iter, None)
+                continue
+            
+            if source_row is None:
+                yield 'delete', target_row[:self.value_count]
+                target_row = next(target_iter, None)
+                continue
+            
+            source_key = self.sort_key(source_row)
+            target_key = self.sort_key(target_row)
+            
+            if source_key < target_key:
+                yield 'insert', source_row[:self.value_count]
+                source_row = next(source_iter, None)
+            elif source_key > target_key:
+                yield 'delete', target_row[:self.value_count]
+                target_row = next(target_iter, None)
+            else:
+                if source_row[:self.value_count] != target_row[:self.value_count]:
+                    yield 'update', source_row[:self.value_count]
+                source_row = next(source_iter, None)
+                target_row = next(target_iter, None)
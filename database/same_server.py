@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção de origem e destino na mesma instância MySQL
+"""
+
+import threading
+import pymysql
+
+class SameServerDetector:
+    def __init__(self, logger):
+        """Inicializar detector de mesma instância"""
+        self.logger = logger
+        self._cache = {}
+        self._lock = threading.Lock()
+    
+    def get_source_schema(self, source_connection, target_connection):
+        """Obter o schema de origem se ele puder ser lido pela conexão de destino
+        
+        Quando origem e destino estão na mesma instância e o usuário de destino
+        enxerga o schema de origem, os dados podem ser copiados no próprio
+        servidor (INSERT ... SELECT entre schemas), sem passar pelo Python.
+        Retorna o nome do schema de origem, ou None se o caminho rápido não se
+        aplica. O resultado é guardado em cache por par de conexões.
+        """
+        key = (
+            source_connection['host'], source_connection['port'], source_connection['database'],
+            target_connection['host'], target_connection['port'], target_connection['database'],
+            target_connection['username']
+        )
+        
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = self._detect(source_connection, target_connection)
+            return self._cache[key]
+    
+    def _detect(self, source_connection, target_connection):
+        """Comparar a identidade das instâncias e verificar o acesso ao schema"""
+        source_schema = source_connection['database']
+        
+        # Mesmo schema nos dois lados: não há cópia a fazer no servidor
+        if source_schema == target_connection['database']:
+            return None
+        
+        source_identity = self._get_server_identity(source_connection)
+        target_identity = self._get_server_identity(target_connection)
+        
+        if source_identity is None or source_identity != target_identity:
+            return None
+        
+        connection = self._create_connection(target_connection)
+        if not connection:
+            return None
+        
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM information_schema.SCHEMATA WHERE SCHEMA_NAME = %s",
+                    (source_schema,)
+                )
+                if cursor.fetchone()[0] == 0:
+                    self.logger.info(f"Mesma instância, mas o schema '{source_schema}' não é visível para o usuário de destino")
+                    return None
+            
+            self.logger.info(f"Origem e destino na mesma instância: cópia de dados feita no servidor a partir de '{source_schema}'")
+            return source_schema
+        
+        except Exception as e:
+            self.logger.warning(f"Erro ao verificar acesso ao schema de origem: {str(e)}")
+            return None
+        
+        finally:
+            connection.close()
+    
+    def _get_server_identity(self, connection_details):
+        """Identificar a instância pelo hostname, porta e diretório de dados do servidor
+        
+        Comparar os valores reportados pelo próprio servidor evita falsos
+        negativos com apelidos de host (localhost, 127.0.0.1, nome da máquina).
+        """
+        connection = self._create_connection(connection_details)
+        if not connection:
+            return None
+        
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT @@hostname, @@port, @@datadir")
+                return cursor.fetchone()
+        
+        except Exception as e:
+            self.logger.warning(f"Erro ao identificar servidor: {str(e)}")
+            return None
+        
+        finally:
+            connection.close()
+    
+    def _create_connection(self, connection_details):
+        """Criar conexão PyMySQL"""
+        try:
+            connection = pymysql.connect(
+                host=connection_details['host'],
+                port=connection_details['port'],
+                user=connection_details['username'],
+                password=connection_details['password'],
+                database=connection_details['database'],
+                charset='utf8mb4',
+                autocommit=True
+            )
+            return connection
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao conectar: {str(e)}")
+            return None
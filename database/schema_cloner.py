@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Clonagem rápida de estrutura para bancos de destino vazios
+"""
+
+import re
+import pymysql
+from pymysql.constants import CLIENT
+from concurrent.futures import ThreadPoolExecutor
+from database.same_server import SameServerDetector
+
+# Erros que indicam que o objeto já existe (reexecução segura)
+ALREADY_EXISTS_ERRORS = {
+    1050,  # Table already exists
+    1061,  # Duplicate key name
+    1826,  # Duplicate foreign key constraint name
+}
+
+def quote_identifier(name):
+    """Nome entre crases, com as crases do próprio nome duplicadas"""
+    return "`" + name.replace('`', '``') + "`"
+
+class SchemaCloner:
+    def __init__(self, logger, workers=8, statements_per_batch=50):
+        """Inicializar clonador de estrutura"""
+        self.logger = logger
+        self.workers = workers
+        self.statements_per_batch = statements_per_batch
+        self.same_server = SameServerDetector(logger)
+    
+    def clone_structure(self, source_connection, target_connection, table_names=None, defer_indexes=False):
+        """Clonar a estrutura da origem para um destino vazio
+        
+        Reproduz exatamente o SHOW CREATE TABLE da origem, criando as tabelas em
+        paralelo e enviando vários comandos por ida ao servidor. As chaves
+        estrangeiras são sempre adiadas; com defer_indexes=True os índices
+        secundários também são, para serem criados depois da carga de dados.
+        Com origem e destino na mesma instância (e índices não adiados), as
+        tabelas são criadas com CREATE TABLE ... LIKE diretamente no servidor.
+        
+        Retorna um dicionário com as tabelas criadas, as que falharam e as
+        cláusulas adiadas ({'indexes': {tabela: [...]}, 'foreign_keys': {...}}),
+        ou None em caso de erro.
+        """
+        try:
+            if table_names is None:
+                table_names = self.list_tables(source_connection)
+            
+            table_names = list(table_names)
+            total_tables = len(table_names)
+            
+            result = {
+                'created': [],
+                'failed': [],
+                'indexes': {},
+                'foreign_keys': {}
+            }
+            
+            if not table_names:
+                return result
+            
+            # Dividir as tabelas entre os workers (uma conexão de origem e uma de destino por worker)
+            workers = max(1, min(self.workers, total_tables))
+            groups = [table_names[i::workers] for i in range(workers)]
+            
+            # CREATE TABLE ... LIKE copiaria também os índices secundários
+            like_schema = None
+            if not defer_indexes:
+                like_schema = self.same_server.get_source_schema(source_connection, target_connection)
+            
+            self.logger.info(f"Clonando {total_tables} tabelas com {workers} workers...")
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for group_result in executor.map(
+                    lambda group: self._clone_group(source_connection, target_connection, group, defer_indexes, like_schema),
+                    groups
+                ):
+                    for key in ('created', 'failed'):
+                        result[key].extend(group_result[key])
+                    for key in ('indexes', 'foreign_keys'):
+                        result[key].update(group_result[key])
+            
+            self.logger.success(f"Tabelas criadas: {len(result['created'])}/{total_tables}")
+            
+            if result['failed']:
+                self.logger.error(f"Tabelas não criadas: {', '.join(result['failed'])}")
+            
+            return result
+        
+        except Exception as e:
+            self.logger.error(f"Erro na clonagem de estrutura: {str(e)}")
+            return None
+    
+    def apply_deferred_clauses(self, target_connection, clauses_by_table, description, parallel=False):
+        """Aplicar cláusulas adiadas (índices ou FKs) com um ALTER TABLE por tabela
+        
+        Os ALTERs são agrupados em lotes multi-statement. Com parallel=True os
+        lotes são distribuídos entre os workers (adequado para índices; FKs
+        devem ser aplicadas em série, pois bloqueiam também a tabela pai).
+        """
+        statements = [
+            (table_name, f"ALTER TABLE {quote_identifier(table_name)} " + ", ".join(clauses))
+            for table_name, clauses in clauses_by_table.items()
+            if clauses
+        ]
+        
+        if not statements:
+            return 0
+        
+        self.logger.info(f"Aplicando {description} em {len(statements)} tabelas...")
+        
+        workers = max(1, min(self.workers, len(statements))) if parallel else 1
+        groups = [statements[i::workers] for i in range(workers)]
+        
+        applied = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for group_applied in executor.map(
+                lambda group: self._execute_group(target_connection, group),
+                groups
+            ):
+                applied += group_applied
+        
+        if applied == len(statements):
+            self.logger.success(f"{description.capitalize()} aplicados em {applied} tabelas")
+        else:
+            self.logger.warning(f"{description.capitalize()} aplicados em {applied}/{len(statements)} tabelas")
+        
+        return applied
+    
+    def split_create_table(self, create_sql, defer_indexes=False):
+        """Separar um SHOW CREATE TABLE em (CREATE enxuto, índices adiados, FKs adiadas)
+        
+        O SHOW CREATE TABLE traz uma definição por linha, o que permite separar
+        as cláusulas sem um parser SQL completo. O AUTO_INCREMENT=N das opções
+        da tabela é descartado para que o destino comece do zero.
+        """
+        lines = create_sql.split('\n')
+        
+        close_index = next(
+            (i for i in range(len(lines) - 1, 0, -1) if lines[i].startswith(')')),
+            None
+        )
+        
+        if close_index is None:
+            return create_sql, [], []
+        
+        definitions = []
+        index_clauses = []
+        foreign_key_clauses = []
+        
+        for line in lines[1:close_index]:
+            definition = line.strip().rstrip(',')
+            
+            if self._is_foreign_key_definition(definition):
+                foreign_key_clauses.append(f"ADD {definition}")
+            elif defer_indexes and self._is_secondary_index_definition(definition):
+                index_clauses.append(f"ADD {definition}")
+            else:
+                definitions.append(f"  {definition}")
+        
+        table_options = "\n".join(lines[close_index:])
+        table_options = re.sub(r' AUTO_INCREMENT=\d+', '', table_options)
+        
+        create_sql = lines[0] + "\n" + ",\n".join(definitions) + "\n" + table_options
+        
+        return create_sql, index_clauses, foreign_key_clauses
+    
+    def _is_foreign_key_definition(self, definition):
+        """Verificar se a linha define uma chave estrangeira"""
+        return re.match(r'^(CONSTRAINT\s+`(?:[^`]|``)+`\s+)?FOREIGN KEY\b', definition) is not None
+    
+    def _is_secondary_index_definition(self, definition):
+        """Verificar se a linha define um índice secundário (não PRIMARY)"""
+        return re.match(r'^(UNIQUE |FULLTEXT |SPATIAL )?(KEY|INDEX) ', definition) is not None
+    
+    def _clone_group(self, source_connection, target_connection, table_names, defer_indexes, like_schema=None):
+        """Clonar um grupo de tabelas usando um par de conexões dedicado
+        
+        Com like_schema as tabelas são criadas com CREATE TABLE ... LIKE a
+        partir desse schema; o SHOW CREATE TABLE continua sendo lido para
+        obter as chaves estrangeiras, que o LIKE não copia.
+        """
+        result = {
+            'created': [],
+            'failed': [],
+            'indexes': {},
+            'foreign_keys': {}
+        }
+        
+        source_conn = self._create_connection(source_connection, multi_statements=True)
+        target_conn = self._create_connection(target_connection, multi_statements=True)
+        
+        if not source_conn or not target_conn:
+            result['failed'].extend(table_names)
+            return result
+        
+        try:
+            with source_conn.cursor() as source_cursor, target_conn.cursor() as target_cursor:
+                target_cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+                
+                for i in range(0, len(table_names), self.statements_per_batch):
+                    batch = table_names[i:i + self.statements_per_batch]
+                    
+                    statements = []
+                    for table_name, create_sql in self._fetch_create_statements(source_cursor, batch):
+                        create_sql, index_clauses, foreign_key_clauses = self.split_create_table(create_sql, defer_indexes)
+                        
+                        if like_schema:
+                            create_sql = f"CREATE TABLE {quote_identifier(table_name)} LIKE {quote_identifier(like_schema)}.{quote_identifier(table_name)}"
+                        
+                        statements.append((table_name, create_sql))
+                        
+                        if index_clauses:
+                            result['indexes'][table_name] = index_clauses
+                        if foreign_key_clauses:
+                            result['foreign_keys'][table_name] = foreign_key_clauses
+                    
+                    created = self._execute_batch(target_cursor, statements)
+                    result['created'].extend(created)
+                    result['failed'].extend(name for name in batch if name not in created)
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao clonar grupo de tabelas: {str(e)}")
+            done = set(result['created']) | set(result['failed'])
+            result['failed'].extend(name for name in table_names if name not in done)
+        
+        finally:
+            source_conn.close()
+            target_conn.close()
+        
+        return result
+    
+    def _fetch_create_statements(self, cursor, table_names):
+        """Obter o SHOW CREATE TABLE de várias tabelas em uma única ida ao servidor"""
+        sql = ";\n".join(f"SHOW CREATE TABLE {quote_identifier(name)}" for name in table_names)
+        
+        try:
+            cursor.execute(sql)
+            statements = []
+            while True:
+                row = cursor.fetchone()
+                if row:
+                    statements.append((row[0], row[1]))
+                if not cursor.nextset():
+                    break
+            return statements
+        
+        except Exception as e:
+            # Uma tabela removida durante a clonagem interrompe o lote: repetir uma a uma
+            self.logger.warning(f"Falha ao ler definições em lote, lendo individualmente: {str(e)}")
+            statements = []
+            for name in table_names:
+                try:
+                    cursor.execute(f"SHOW CREATE TABLE {quote_identifier(name)}")
+                    row = cursor.fetchone()
+                    statements.append((row[0], row[1]))
+                except Exception as table_error:
+                    self.logger.error(f"Erro ao ler definição da tabela {name}: {str(table_error)}")
+            return statements
+    
+    def _execute_batch(self, cursor, statements):
+        """Executar vários comandos em uma única ida ao servidor
+        
+        Retorna os nomes associados aos comandos concluídos. Se o lote falhar,
+        os comandos são repetidos individualmente para isolar o erro.
+        """
+        if not statements:
+            return []
+        
+        try:
+            cursor.execute(";\n".join(sql for _, sql in statements))
+            while cursor.nextset():
+                pass
+            return [name for name, _ in statements]
+        
+        except Exception:
+            done = []
+            for name, sql in statements:
+                try:
+                    cursor.execute(sql)
+                    done.append(name)
+                except pymysql.MySQLError as e:
+                    if e.args and e.args[0] in ALREADY_EXISTS_ERRORS:
+                        done.append(name)
+                    else:
+                        self.logger.error(f"Erro em {name}: {str(e)}")
+            return done
+    
+    def _execute_group(self, target_connection, statements):
+        """Executar um grupo de ALTERs em lotes usando uma conexão dedicada"""
+        connection = self._create_connection(target_connection, multi_statements=True)
+        if not connection:
+            return 0
+        
+        applied = 0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+                
+                for i in range(0, len(statements), self.statements_per_batch):
+                    applied += len(self._execute_batch(cursor, statements[i:i + self.statements_per_batch]))
+        finally:
+            connection.close()
+        
+        return applied
+    
+    def list_tables(self, connection_details):
+        """Listar tabelas base do banco"""
+        connection = self._create_connection(connection_details)
+        if not connection:
+            return []
+        
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT TABLE_NAME
+                    FROM information_schema.TABLES
+                    WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+                    ORDER BY TABLE_NAME
+                """, (connection_details['database'],))
+                return [row[0] for row in cursor.fetchall()]
+        finally:
+            connection.close()
+    
+    def _create_connection(self, connection_details, multi_statements=False):
+        """Criar conexão PyMySQL"""
+        try:
+            connection = pymysql.connect(
+                host=connection_details['host'],
+                port=connection_details['port'],
+                user=connection_details['username'],
+                password=connection_details['password'],
+                database=connection_details['database'],
+                charset='utf8mb4',
+                autocommit=True,
+                client_flag=CLIENT.MULTI_STATEMENTS if multi_statements else 0
+            )
+            return connection
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao conectar: {str(e)}")
+            return None
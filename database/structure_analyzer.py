@@ -9,9 +9,12 @@ from colorama import Fore, Style
 from tabulate import tabulate
 
 class StructureAnalyzer:
-    def __init__(self, logger):
+    def __init__(self, logger, column_order_max_rows=None):
         """Inicializar analisador de estrutura"""
         self.logger = logger
+        # Acima deste número de linhas a ordem das colunas é ignorada
+        # (reordenar exige reconstruir a tabela inteira). None = sempre reordenar
+        self.column_order_max_rows = column_order_max_rows
     
     def analyze_database_structure(self, connection_details):
         """Analisar estrutura completa do banco de dados"""
@@ -94,7 +97,8 @@ class StructureAnalyzer:
             'auto_increment': None,
             'engine': None,
             'charset': None,
-            'collation': None
+            'collation': None,
+            'rows': None
         }
         
         # Obter informações das colunas com ordem preservada
@@ -150,7 +154,8 @@ class StructureAnalyzer:
             SELECT 
                 ENGINE,
                 TABLE_COLLATION,
-                AUTO_INCREMENT
+                AUTO_INCREMENT,
+                TABLE_ROWS
             FROM information_schema.TABLES 
             WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
         """, (database_name, table_name))
@@ -161,6 +166,7 @@ class StructureAnalyzer:
             table_info['collation'] = table_details[1]
             if table_details[1]:
                 table_info['charset'] = table_details[1].split('_')[0]
+            table_info['rows'] = table_details[3]
         
         return table_info
     
@@ -341,6 +347,7 @@ class StructureAnalyzer:
             'removed_columns': [],
             'modified_columns': [],
             'column_order_changed': False,
+            'column_moves': [],
             'table_properties_changed': False
         }
         
@@ -393,7 +400,14 @@ class StructureAnalyzer:
         common_order_target = [col for col in target_order if col in common_columns]
         
         if common_order_source != common_order_target:
-            diff['column_order_changed'] = True
+            target_rows = target_table.get('rows') or 0
+            
+            if self.column_order_max_rows is not None and target_rows > self.column_order_max_rows:
+                # Reordenar reconstrói a tabela: em tabelas grandes o custo supera o benefício
+                self.logger.info(f"Ordem das colunas ignorada: tabela com ~{target_rows} linhas (limite {self.column_order_max_rows})")
+            else:
+                diff['column_order_changed'] = True
+                diff['column_moves'] = self._plan_column_moves(common_order_source, common_order_target)
         
         # Verificar propriedades da tabela
         if (source_table['engine'] != target_table['engine'] or
@@ -412,6 +426,43 @@ class StructureAnalyzer:
         
         return diff
     
+    def _plan_column_moves(self, source_order, target_order):
+        """Calcular o conjunto mínimo de colunas a mover para igualar a ordem da origem
+        
+        As colunas que formam a maior subsequência comum (LCS) entre as duas ordens
+        permanecem no lugar; apenas as demais precisam de MODIFY ... AFTER. Como os
+        nomes são únicos, a LCS é obtida como a maior subsequência crescente das
+        posições de origem na ordem do destino, em O(n log n).
+        """
+        source_position = {name: i for i, name in enumerate(source_order)}
+        sequence = [source_position[name] for name in target_order]
+        
+        # tails[k] = índice em sequence do menor final de subsequência crescente de tamanho k+1
+        tails = []
+        previous = [-1] * len(sequence)
+        for i, value in enumerate(sequence):
+            low, high = 0, len(tails)
+            while low < high:
+                middle = (low + high) // 2
+                if sequence[tails[middle]] < value:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low > 0:
+                previous[i] = tails[low - 1]
+            if low == len(tails):
+                tails.append(i)
+            else:
+                tails[low] = i
+        
+        stable_columns = set()
+        i = tails[-1] if tails else -1
+        while i >= 0:
+            stable_columns.add(target_order[i])
+            i = previous[i]
+        
+        return [name for name in source_order if name not in stable_columns]
+    
     def _normalize_default_value(self, default_value, column_type, nullable):
         """Normalizar valores default problemáticos"""
         if default_value is None:
@@ -482,7 +533,8 @@ class StructureAnalyzer:
                     print(f"    {Fore.YELLOW}Colunas modificadas: {len(table_diff['modified_columns'])}{Style.RESET_ALL}")
                 
                 if table_diff['column_order_changed']:
-                    print(f"    {Fore.CYAN}Ordem das colunas alterada{Style.RESET_ALL}")
+                    moves = table_diff.get('column_moves', [])
+                    print(f"    {Fore.CYAN}Ordem das colunas alterada ({len(moves)} coluna(s) a mover: {', '.join(moves)}){Style.RESET_ALL}")
                 
                 if table_diff['table_properties_changed']:
                     print(f"    {Fore.BLUE}Propriedades da tabela alteradas{Style.RESET_ALL}")
@@ -14,6 +14,8 @@ from utils.logger import Logger
 from database.connection_manager import ConnectionManager
 from database.structure_analyzer import StructureAnalyzer
 from database.replicator import Replicator
+from database.database_cloner import DatabaseCloner
+from database.restore_engine import RestoreEngine
 from utils.data_sync_menu import DataSyncMenu
 
 # Inicializar colorama para Windows
@@ -26,7 +28,22 @@ class DatabaseReplicatorApp:
         self.logger = Logger()
         self.connection_manager = ConnectionManager(self.settings, self.logger)
         self.structure_analyzer = StructureAnalyzer(self.logger)
-        self.replicator = Replicator(self.logger)
+        self.replicator = Replicator(
+            self.logger,
+            self.settings.get_setting('column_order_max_rows'),
+            self.settings.get_setting('backup_compression', 'gzip'),
+            self.settings.get_setting('backup_workers', 4),
+            self.settings.get_setting('backup_size_budget_mb')
+        )
+        self.database_cloner = DatabaseCloner(
+            self.logger,
+            batch_size=self.settings.get_setting('data_sync_batch_size', 1000),
+            loader=self.settings.get_setting('data_sync_loader', 'load_data'),
+            bulk_profile=self.settings.get_setting('data_sync_bulk_profile', False),
+            disable_binlog=self.settings.get_setting('data_sync_disable_binlog', False),
+            checkpoint_max_age_hours=self.settings.get_setting('data_sync_checkpoint_max_age_hours', 24)
+        )
+        self.restore_engine = RestoreEngine(self.logger, self.settings.get_setting('backup_workers', 4))
         self.menu = Menu(self.logger)
         self.data_sync_menu = DataSyncMenu(self.logger, self.connection_manager)
         
@@ -61,6 +78,8 @@ class DatabaseReplicatorApp:
                     self._view_logs()
                 elif choice == '8':
                     self._backup_management()
+                elif choice == '9':
+                    self._clone_database()
                 elif choice == '0':
                     self._exit_application()
                     break
@@ -247,6 +266,56 @@ class DatabaseReplicatorApp:
             print(f"\n{Fore.RED}✗ Erro inesperado durante replicação: {str(e)}{Style.RESET_ALL}")
             print(f"{Fore.YELLOW}Verifique os logs para mais detalhes.{Style.RESET_ALL}")
     
+    def _clone_database(self):
+        """Clonar banco de dados completo (estrutura + dados)"""
+        self.menu.clear_screen()
+        self.menu.show_header()
+        print(f"{Fore.GREEN}=== CLONAR BANCO DE DADOS ==={Style.RESET_ALL}")
+        
+        source_conn = self.connection_manager.get_connection_by_type('source')
+        target_conn = self.connection_manager.get_connection_by_type('target')
+        
+        if not source_conn or not target_conn:
+            print(f"{Fore.RED}Configure as conexões de origem e destino primeiro.{Style.RESET_ALL}")
+            return
+        
+        print(f"\n{Fore.CYAN}Direções disponíveis:{Style.RESET_ALL}")
+        print(f"  {Fore.GREEN}1{Style.RESET_ALL} - Homologação → Produção ({source_conn['database']} → {target_conn['database']})")
+        print(f"  {Fore.GREEN}2{Style.RESET_ALL} - Produção → Homologação ({target_conn['database']} → {source_conn['database']})")
+        
+        direction_choice = input(f"\n{Fore.CYAN}Escolha a direção (1-2): {Style.RESET_ALL}").strip()
+        
+        if direction_choice == '1':
+            clone_source, clone_target = source_conn, target_conn
+        elif direction_choice == '2':
+            clone_source, clone_target = target_conn, source_conn
+        else:
+            print(f"{Fore.RED}Opção inválida.{Style.RESET_ALL}")
+            return
+        
+        # A clonagem só é permitida para um banco de destino vazio
+        target_info = self.connection_manager.get_database_info(clone_target)
+        if not target_info:
+            print(f"{Fore.RED}❌ Falha ao obter informações do banco de destino.{Style.RESET_ALL}")
+            return
+        
+        if target_info['table_count'] > 0:
+            print(f"{Fore.RED}❌ O banco '{clone_target['database']}' possui {target_info['table_count']} tabelas.{Style.RESET_ALL}")
+            print(f"{Fore.YELLOW}A clonagem exige um banco de destino vazio.{Style.RESET_ALL}")
+            return
+        
+        print(f"\n{Fore.YELLOW}ATENÇÃO: Todas as tabelas e dados de '{clone_source['database']}' serão copiados para '{clone_target['database']}'.{Style.RESET_ALL}")
+        
+        confirm = input(f"\n{Fore.CYAN}Deseja continuar? (s/N): {Style.RESET_ALL}").strip().lower()
+        if confirm != 's':
+            print(f"{Fore.YELLOW}Operação cancelada.{Style.RESET_ALL}")
+            return
+        
+        if self.database_cloner.clone_database(clone_source, clone_target):
+            print(f"\n{Fore.GREEN}✓ Banco de dados clonado com sucesso!{Style.RESET_ALL}")
+        else:
+            print(f"\n{Fore.RED}✗ Falha na clonagem. Verifique os logs para detalhes.{Style.RESET_ALL}")
+    
     def _view_logs(self):
         """Visualizar logs"""
         self.menu.clear_screen()
@@ -267,6 +336,8 @@ class DatabaseReplicatorApp:
             self._list_backups()
         elif choice == '3':
             self._restore_backup()
+        elif choice == '4':
+            self._search_backups()
     
     def _create_manual_backup(self):
         """Criar backup manual"""
@@ -312,14 +383,100 @@ class DatabaseReplicatorApp:
         for backup in backups:
             print(f"• {backup}")
     
+    def _search_backups(self):
+        """Buscar o último backup anterior à mudança de uma tabela"""
+        self.menu.clear_screen()
+        self.menu.show_header()
+        print(f"{Fore.GREEN}=== BUSCAR BACKUP ==={Style.RESET_ALL}")
+        
+        connections = self.connection_manager.get_all_connections()
+        if not connections:
+            print(f"{Fore.YELLOW}Nenhuma conexão configurada.{Style.RESET_ALL}")
+            return
+        
+        print(f"\n{Fore.CYAN}Selecione o banco:{Style.RESET_ALL}")
+        for i, conn in enumerate(connections):
+            print(f"{i+1}. {conn['name']} ({conn['type']}) - {conn['database']}")
+        
+        try:
+            choice = int(input(f"\n{Fore.CYAN}Escolha (1-{len(connections)}): {Style.RESET_ALL}"))
+            if not 1 <= choice <= len(connections):
+                print(f"{Fore.RED}Opção inválida.{Style.RESET_ALL}")
+                return
+        except ValueError:
+            print(f"{Fore.RED}Entrada inválida.{Style.RESET_ALL}")
+            return
+        
+        selected_conn = connections[choice-1]
+        table_name = input(f"{Fore.CYAN}Nome da tabela: {Style.RESET_ALL}").strip()
+        if not table_name:
+            return
+        
+        backup = self.replicator.backup_engine.catalog.find_backup_before_table_change(
+            selected_conn['database'], selected_conn['host'], table_name
+        )
+        
+        if not backup:
+            print(f"{Fore.YELLOW}Nenhum backup anterior a uma mudança em '{table_name}' foi encontrado.{Style.RESET_ALL}")
+            return
+        
+        print(f"\n{Fore.GREEN}Último backup antes da mudança em '{table_name}':{Style.RESET_ALL}")
+        print(f"• {backup['backup_name']} - {backup['created_at']}")
+        print(f"  {backup['table_count']} tabelas, {backup['total_rows']} registros, {backup['total_bytes']} bytes")
+    
     def _restore_backup(self):
         """Restaurar backup"""
         self.menu.clear_screen()
         self.menu.show_header()
         print(f"{Fore.GREEN}=== RESTAURAR BACKUP ==={Style.RESET_ALL}")
         
-        print(f"{Fore.YELLOW}Funcionalidade de restauração será implementada em versão futura.{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}Por segurança, use ferramentas específicas do MySQL/MariaDB para restauração.{Style.RESET_ALL}")
+        backups = sorted(self.replicator.backup_engine.list_backups(), reverse=True)
+        if not backups:
+            print(f"{Fore.YELLOW}Nenhum backup restaurável encontrado.{Style.RESET_ALL}")
+            return
+        
+        print(f"\n{Fore.CYAN}Selecione o backup:{Style.RESET_ALL}")
+        for i, (name, size, created_at) in enumerate(backups):
+            print(f"{i+1}. {name} ({size} bytes) - {created_at}")
+        
+        connections = self.connection_manager.get_all_connections()
+        if not connections:
+            print(f"{Fore.YELLOW}Nenhuma conexão configurada.{Style.RESET_ALL}")
+            return
+        
+        try:
+            backup_choice = int(input(f"\n{Fore.CYAN}Escolha o backup (1-{len(backups)}): {Style.RESET_ALL}"))
+            if not 1 <= backup_choice <= len(backups):
+                print(f"{Fore.RED}Opção inválida.{Style.RESET_ALL}")
+                return
+            
+            print(f"\n{Fore.CYAN}Selecione a conexão de destino:{Style.RESET_ALL}")
+            for i, conn in enumerate(connections):
+                print(f"{i+1}. {conn['name']} ({conn['type']}) - {conn['database']}")
+            
+            connection_choice = int(input(f"\n{Fore.CYAN}Escolha (1-{len(connections)}): {Style.RESET_ALL}"))
+            if not 1 <= connection_choice <= len(connections):
+                print(f"{Fore.RED}Opção inválida.{Style.RESET_ALL}")
+                return
+        except ValueError:
+            print(f"{Fore.RED}Entrada inválida.{Style.RESET_ALL}")
+            return
+        
+        backup_name = backups[backup_choice-1][0]
+        selected_conn = connections[connection_choice-1]
+        
+        print(f"\n{Fore.RED}ATENÇÃO: As tabelas do backup serão apagadas e recriadas em '{selected_conn['database']}'.{Style.RESET_ALL}")
+        
+        confirm = input(f"\n{Fore.CYAN}Deseja continuar? (s/N): {Style.RESET_ALL}").strip().lower()
+        if confirm != 's':
+            print(f"{Fore.YELLOW}Operação cancelada.{Style.RESET_ALL}")
+            return
+        
+        backup_path = os.path.join(self.replicator.backups_dir, backup_name)
+        if self.restore_engine.restore_backup(backup_path, selected_conn):
+            print(f"{Fore.GREEN}✓ Backup restaurado com sucesso!{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.RED}✗ Falha na restauração. Verifique os logs para detalhes.{Style.RESET_ALL}")
     
     def _data_synchronization(self):
         """Menu de sincronização de dados"""
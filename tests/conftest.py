@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fixtures compartilhadas pelos testes (nenhum teste exige servidor MySQL)
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class RecordingLogger:
+    """Logger que apenas guarda as mensagens recebidas, por nível"""
+    
+    def __init__(self):
+        """Inicializar registro vazio"""
+        self.messages = []
+    
+    def __getattr__(self, level):
+        return lambda message, *args, **kwargs: self.messages.append((level, message))
+    
+    def levels(self, level):
+        """Mensagens registradas em um nível"""
+        return [message for logged_level, message in self.messages if logged_level == level]
+
+@pytest.fixture
+def logger():
+    """Logger de teste"""
+    return RecordingLogger()
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    """Diretório de trabalho temporário com a pasta config/ (o banco usa caminho relativo)"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'config').mkdir()
+    return tmp_path
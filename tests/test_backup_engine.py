@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do reaproveitamento de tabelas sem alteração e da retenção de backups
+"""
+
+import os
+import json
+import time
+import datetime
+import pytest
+import pymysql
+from database.backup_engine import BackupEngine
+
+class SignalsCursor:
+    """Cursor de information_schema.TABLES sem a variável do cache de estatísticas (MariaDB)"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+    
+    def execute(self, sql, params=None):
+        if sql.startswith("SET SESSION information_schema_stats_expiry"):
+            raise pymysql.err.InternalError(1193, "Unknown system variable")
+        self.queries.append((sql, params))
+    
+    def fetchall(self):
+        return self.rows
+
+@pytest.fixture
+def engine(logger, config_dir):
+    return BackupEngine(logger, backups_dir=str(config_dir / 'backups'))
+
+def table_manifest(schema, signal, files=()):
+    return {
+        'schema': schema,
+        'change_signal': signal,
+        'rows': sum(entry['rows'] for entry in files),
+        'bytes': sum(entry['bytes'] for entry in files),
+        'files': list(files)
+    }
+
+def previous_backup(engine, signal='2026-10-18 10:00:00/2'):
+    object_id = engine.objects.add_bytes(b'1\tAna\n2\tBia\n')
+    files = [{'object': object_id, 'rows': 2, 'bytes': 12}]
+    return {'compression': engine.format.compression, 'tables': {'clientes': table_manifest('s1', signal, files)}}
+
+def current_backup(engine, schema='s1', signal='2026-10-18 10:00:00/2'):
+    return {'compression': engine.format.compression, 'tables': {'clientes': table_manifest(schema, signal)}}
+
+def test_unchanged_table_reuses_previous_objects(engine):
+    latest = previous_backup(engine)
+    manifest = current_backup(engine)
+    
+    assert engine._reuse_unchanged_tables(manifest, latest) == {'clientes'}
+    assert manifest['tables']['clientes']['files'] == latest['tables']['clientes']['files']
+    assert manifest['tables']['clientes']['rows'] == 2
+    assert manifest['tables']['clientes']['bytes'] == 12
+
+@pytest.mark.parametrize('schema, signal', [
+    ('s1', '2026-10-19 08:00:00/2'),
+    ('s2', '2026-10-18 10:00:00/2'),
+    ('s1', None),
+])
+def test_changed_or_unknown_table_is_dumped(engine, schema, signal):
+    manifest = current_backup(engine, schema, signal)
+    
+    assert engine._reuse_unchanged_tables(manifest, previous_backup(engine)) == set()
+    assert manifest['tables']['clientes']['files'] == []
+
+def test_table_with_collected_objects_is_dumped(engine):
+    latest = previous_backup(engine)
+    latest['tables']['clientes']['files'][0]['object'] = '0' * 64
+    
+    assert engine._reuse_unchanged_tables(current_backup(engine), latest) == set()
+
+def test_other_compression_is_not_reused(engine):
+    latest = previous_backup(engine)
+    latest['compression'] = 'zstd' if engine.format.compression != 'zstd' else 'gzip'
+    
+    assert engine._reuse_unchanged_tables(current_backup(engine), latest) == set()
+
+def test_change_signals_skip_missing_and_recent_update_time(engine):
+    cursor = SignalsCursor([
+        ('clientes', datetime.datetime(2026, 10, 18, 10, 0, 0), 2, 1),
+        ('pedidos', datetime.datetime(2026, 10, 19, 9, 59, 59), 10, 0),
+        ('itens', None, 30, None),
+    ])
+    
+    assert engine._read_change_signals(cursor, 'loja') == {
+        'clientes': '2026-10-18 10:00:00/2',
+        'pedidos': None,
+        'itens': None
+    }
+    assert cursor.queries[0][1] == ('loja',)
+
+def write_backup(engine, name, created_at, object_ids):
+    backup_path = os.path.join(engine.backups_dir, name)
+    os.makedirs(backup_path)
+    files = [{'object': object_id, 'rows': 1, 'bytes': 1000} for object_id in object_ids]
+    with open(os.path.join(backup_path, 'manifest.json'), 'w', encoding='utf-8') as manifest_file:
+        json.dump({'created_at': created_at, 'tables': {'t': {'files': files}}}, manifest_file)
+
+def add_object(engine, content, age_hours):
+    object_id = engine.objects.add_bytes(content)
+    modified_at = time.time() - age_hours * 3600
+    os.utime(engine.objects.object_path(object_id), (modified_at, modified_at))
+    return object_id
+
+def remaining_backups(engine):
+    return sorted(backup['name'] for backup in engine._load_backups())
+
+def test_retention_removes_oldest_until_budget(engine):
+    shared = add_object(engine, b's' * 1000, 48)
+    unique = [add_object(engine, bytes([day]) * 1000, 48) for day in (1, 2, 3)]
+    for day, object_id in enumerate(unique, 1):
+        write_backup(engine, f"b{day}", f"2026-10-0{day}T00:00:00", [shared, object_id])
+    # Três objetos de 1000 bytes, mais os manifestos
+    engine.size_budget_mb = 4000 / (1024 * 1024)
+    
+    engine.apply_retention()
+    
+    assert remaining_backups(engine) == ['b2', 'b3']
+    assert os.path.exists(engine.objects.object_path(shared))
+    assert not os.path.exists(engine.objects.object_path(unique[0]))
+
+def test_retention_ignores_objects_held_by_grace_period(engine, logger):
+    for day in (1, 2, 3):
+        write_backup(engine, f"b{day}", f"2026-10-0{day}T00:00:00", [add_object(engine, bytes([day]) * 1000, 1)])
+    engine.size_budget_mb = 2800 / (1024 * 1024)
+    
+    engine.apply_retention()
+    
+    # O objeto do backup removido continua em disco, mas não conta para o limite
+    assert remaining_backups(engine) == ['b2', 'b3']
+    assert any('período de carência' in message for message in logger.levels('info'))
+
+def test_retention_reads_each_object_size_once(engine, monkeypatch):
+    shared = add_object(engine, b's' * 1000, 48)
+    for day in (1, 2, 3, 4):
+        write_backup(engine, f"b{day}", f"2026-10-0{day}T00:00:00", [shared, add_object(engine, bytes([day]) * 1000, 48)])
+    engine.size_budget_mb = 0
+    stat_calls = []
+    object_stat = engine.objects.object_stat
+    monkeypatch.setattr(engine.objects, 'object_stat', lambda object_id: stat_calls.append(object_id) or object_stat(object_id))
+    
+    engine.apply_retention()
+    
+    assert remaining_backups(engine) == ['b4']
+    assert sorted(stat_calls) == sorted(set(stat_calls)) and len(stat_calls) == 5
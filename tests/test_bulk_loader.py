@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da montagem dos comandos do carregador em massa
+"""
+
+import pytest
+import pymysql
+from database.bulk_loader import BulkLoader
+
+class WarningsCursor:
+    """Cursor que responde apenas ao SHOW WARNINGS"""
+    
+    def __init__(self, warnings):
+        self.warnings = warnings
+    
+    def execute(self, sql, params=None):
+        assert sql == "SHOW WARNINGS"
+    
+    def fetchall(self):
+        return self.warnings
+
+@pytest.fixture
+def loader(logger):
+    return BulkLoader(logger)
+
+def test_upsert_updates_only_non_key_columns(loader):
+    assert loader.upsert_sql('itens', ['pedido_id', 'linha', 'qtd', 'preco'], ['pedido_id', 'linha']) == (
+        "INSERT INTO `itens` (`pedido_id`, `linha`, `qtd`, `preco`) VALUES (%s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE `qtd` = VALUES(`qtd`), `preco` = VALUES(`preco`)"
+    )
+
+def test_upsert_with_key_only_columns_uses_insert_ignore(loader):
+    assert loader.upsert_sql('tags', ['post_id', 'tag'], ['post_id', 'tag']) == (
+        "INSERT IGNORE INTO `tags` (`post_id`, `tag`) VALUES (%s, %s)"
+    )
+
+@pytest.mark.parametrize('key_columns', [['id'], ['id', 'v']])
+def test_upsert_is_batched_by_executemany(loader, key_columns):
+    # O executemany do PyMySQL só agrupa linhas em um INSERT quando reconhece o VALUES
+    sql = loader.upsert_sql('t', ['id', 'v'], key_columns)
+    assert pymysql.cursors.RE_INSERT_VALUES.match(sql)
+
+def test_binary_columns_from_describe(loader):
+    columns_info = [
+        ('id', 'int unsigned', 'NO'),
+        ('hash', 'varbinary(32)', 'YES'),
+        ('nome', 'varchar(50)', 'YES'),
+        ('flags', 'bit(8)', 'YES'),
+    ]
+    assert loader.binary_columns(columns_info) == [1, 3]
+
+def test_unknown_mode_is_rejected(logger):
+    with pytest.raises(ValueError):
+        BulkLoader(logger, mode='copy')
+
+def test_load_notes_are_accepted(loader):
+    loader._check_warnings(WarningsCursor([('Note', 1265, 'Data truncated')]))
+
+def test_load_warnings_fail_the_load(loader):
+    cursor = WarningsCursor([
+        ('Warning', 1062, "Duplicate entry '1' for key 'PRIMARY'"),
+        ('Note', 1265, 'nota'),
+    ])
+    
+    with pytest.raises(pymysql.err.DataError, match="1 avisos"):
+        loader._check_warnings(cursor)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do banco de configuração da sincronização de dados
+"""
+
+import json
+import sqlite3
+import decimal
+import datetime
+import pytest
+from config.data_sync_config import DataSyncConfig, DATA_SYNC_TABLE_COLUMNS
+
+def test_checkpoint_round_trip(config_dir, logger):
+    config = DataSyncConfig(logger)
+    config.save_sync_checkpoint('t', 'to_prod', 'full', [1, 'a'], 10)
+    
+    checkpoint = config.get_sync_checkpoint('t', 'to_prod', 'full')
+    assert checkpoint['last_key'] == [1, 'a']
+    assert checkpoint['rows_copied'] == 10
+    assert config.get_sync_checkpoint('t', 'to_prod', 'swap') is None
+    assert config.get_sync_checkpoint('t', 'to_dev', 'full') is None
+    
+    config.clear_sync_checkpoint('t', 'to_prod')
+    assert config.get_sync_checkpoint('t', 'to_prod', 'full') is None
+
+@pytest.mark.parametrize('last_key', [
+    b'b\x00\xff\x10',
+    decimal.Decimal('10.50'),
+    datetime.datetime(2024, 1, 2, 3, 4, 5, 678),
+    datetime.date(2024, 1, 2),
+    datetime.timedelta(hours=-26, microseconds=5),
+    [7, b'\x01', 'x', None, 1.5],
+])
+def test_checkpoint_key_keeps_its_type(config_dir, logger, last_key):
+    config = DataSyncConfig(logger)
+    assert config.save_sync_checkpoint('t', 'to_prod', 'full', last_key, 1)
+    
+    # repr também compara o tipo (bytes x texto, Decimal x float)
+    restored = config.get_sync_checkpoint('t', 'to_prod', 'full')['last_key']
+    assert repr(restored) == repr(last_key)
+
+def test_checkpoint_with_unsupported_key_is_not_saved(config_dir, logger):
+    config = DataSyncConfig(logger)
+    assert config.save_sync_checkpoint('t', 'to_prod', 'full', 5, 1)
+    
+    assert config.save_sync_checkpoint('t', 'to_prod', 'full', object(), 2) is False
+    assert config.get_sync_checkpoint('t', 'to_prod', 'full')['last_key'] == 5
+    assert logger.levels('warning')
+
+def age_checkpoint(config_dir, hours):
+    """Recuar a data de gravação dos checkpoints"""
+    conn = sqlite3.connect(str(config_dir / 'config' / 'replicator.db'))
+    conn.execute("UPDATE data_sync_checkpoints SET updated_at = datetime('now', ?)", (f"-{hours} hours",))
+    conn.commit()
+    conn.close()
+
+def test_stale_checkpoint_is_discarded(config_dir, logger):
+    config = DataSyncConfig(logger)
+    config.save_sync_checkpoint('t', 'to_prod', 'full', 5, 1)
+    age_checkpoint(config_dir, 48)
+    
+    assert config.get_sync_checkpoint('t', 'to_prod', 'full')['last_key'] == 5
+    assert config.get_sync_checkpoint('t', 'to_prod', 'full', max_age_hours=24) is None
+    
+    # Descartado de vez: não volta nem sem limite de idade
+    assert config.get_sync_checkpoint('t', 'to_prod', 'full') is None
+
+def test_recent_checkpoint_is_kept(config_dir, logger):
+    config = DataSyncConfig(logger)
+    config.save_sync_checkpoint('t', 'to_prod', 'full', 5, 1)
+    age_checkpoint(config_dir, 2)
+    
+    assert config.get_sync_checkpoint('t', 'to_prod', 'full', max_age_hours=24)['last_key'] == 5
+
+def test_untyped_checkpoint_from_previous_version_is_discarded(config_dir, logger):
+    config = DataSyncConfig(logger)
+    conn = sqlite3.connect(str(config_dir / 'config' / 'replicator.db'))
+    conn.execute("""
+        INSERT INTO data_sync_checkpoints (table_name, sync_direction, sync_type, last_key, rows_copied)
+        VALUES ('t', 'to_prod', 'full', ?, 10)
+    """, (json.dumps(b'\x01', default=str),))
+    conn.commit()
+    conn.close()
+    
+    assert config.get_sync_checkpoint('t', 'to_prod', 'full') is None
+    assert logger.levels('warning')
+
+def test_deferred_indexes_round_trip(config_dir, logger):
+    config = DataSyncConfig(logger)
+    clauses = ["ADD KEY `idx_a` (`a`)"]
+    
+    assert config.save_deferred_indexes('t', 'to_dev', clauses)
+    assert config.get_deferred_indexes('t', 'to_dev') == clauses
+    assert config.get_deferred_indexes('t', 'to_prod') == []
+    
+    config.clear_deferred_indexes('t', 'to_dev')
+    assert config.get_deferred_indexes('t', 'to_dev') == []
+
+def test_removing_a_table_clears_its_deferred_indexes(config_dir, logger):
+    config = DataSyncConfig(logger)
+    assert config.add_sync_table('t')
+    assert config.save_deferred_indexes('t', 'to_dev', ["ADD KEY `idx_a` (`a`)"])
+    
+    config.remove_sync_table('t')
+    assert config.get_deferred_indexes('t', 'to_dev') == []
+
+def create_legacy_database(path, tables):
+    """Banco da versão inicial: data_sync_tables sem as colunas migradas"""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE data_sync_tables (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT UNIQUE NOT NULL,
+            description TEXT,
+            sync_type TEXT DEFAULT 'full',
+            primary_key_column TEXT DEFAULT 'id',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            active INTEGER DEFAULT 1
+        )
+    """)
+    conn.executemany("INSERT INTO data_sync_tables (table_name) VALUES (?)", [(table,) for table in tables])
+    conn.commit()
+    conn.close()
+
+def modes(config):
+    """Modo de sincronização completa de cada tabela configurada"""
+    return {table['table_name']: table['full_sync_mode'] for table in config.list_sync_tables()}
+
+def test_new_database_has_all_columns(config_dir, logger):
+    DataSyncConfig(logger)
+    
+    conn = sqlite3.connect(str(config_dir / 'config' / 'replicator.db'))
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(data_sync_tables)")}
+    conn.close()
+    
+    assert set(DATA_SYNC_TABLE_COLUMNS) <= columns
+    assert logger.levels('error') == []
+
+def test_legacy_database_is_migrated(config_dir, logger):
+    create_legacy_database(str(config_dir / 'config' / 'replicator.db'), ['users', 'Roles', 'pedidos'])
+    
+    config = DataSyncConfig(logger)
+    tables = {table['table_name']: table for table in config.list_sync_tables()}
+    
+    assert modes(config) == {'users': 'merge', 'Roles': 'merge', 'pedidos': 'replace'}
+    assert tables['pedidos']['propagate_deletes'] is False
+    assert tables['pedidos']['row_filter'] is None
+    assert tables['pedidos']['watermark_column'] is None
+    assert logger.levels('error') == []
+
+def test_legacy_merge_migration_runs_once(config_dir, logger):
+    create_legacy_database(str(config_dir / 'config' / 'replicator.db'), ['users'])
+    
+    config = DataSyncConfig(logger)
+    assert config.add_sync_table('users', full_sync_mode='replace')
+    
+    # Uma escolha explícita do usuário não é desfeita na próxima inicialização
+    assert modes(DataSyncConfig(logger)) == {'users': 'replace'}
+
+def test_legacy_merge_migration_keeps_explicit_swap(config_dir, logger):
+    config = DataSyncConfig(logger)
+    conn = sqlite3.connect(str(config_dir / 'config' / 'replicator.db'))
+    conn.execute("DELETE FROM data_sync_migrations")
+    conn.commit()
+    conn.close()
+    
+    assert config.add_sync_table('users', full_sync_mode='swap')
+    assert config.add_sync_table('processes')
+    
+    assert modes(DataSyncConfig(logger)) == {'users': 'swap', 'processes': 'merge'}
+
+def test_unknown_full_sync_mode_is_rejected(config_dir, logger):
+    config = DataSyncConfig(logger)
+    
+    assert config.add_sync_table('t', full_sync_mode='truncate') is False
+    assert config.list_sync_tables() == []
+    assert config.add_sync_table('t', full_sync_mode='swap')
+    assert modes(config) == {'t': 'swap'}
+
+@pytest.mark.parametrize('row_filter', [
+    "id > 0; DROP TABLE t",
+    "id > 0 -- AND ativo = 1",
+    "id > 0 /* comentário */",
+    "id > 0 # comentário",
+    "nome = 'sem fim; DROP TABLE t",
+])
+def test_row_filter_with_statements_or_comments_is_rejected(config_dir, logger, row_filter):
+    config = DataSyncConfig(logger)
+    
+    assert config.add_sync_table('t', row_filter=row_filter) is False
+    assert config.list_sync_tables() == []
+
+@pytest.mark.parametrize('row_filter', [
+    "code LIKE '#%'",
+    "nota = 'a; b -- c /* d'",
+    "nome = 'O''Brien' AND `cliente#id` > 0",
+    'nome = "x # y"',
+])
+def test_row_filter_tokens_inside_literals_are_accepted(config_dir, logger, row_filter):
+    config = DataSyncConfig(logger)
+    
+    assert config.add_sync_table('t', row_filter=row_filter)
+    assert config.get_active_sync_tables()[0]['row_filter'] == row_filter
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da lógica do sincronizador de dados que não depende do servidor
+"""
+
+import hashlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from database.data_synchronizer import DataSynchronizer
+
+@pytest.fixture
+def synchronizer(config_dir, logger):
+    return DataSynchronizer(logger)
+
+def test_key_range_condition_bounds(synchronizer):
+    assert synchronizer._key_range_condition('id', None, None) == ("", [])
+    assert synchronizer._key_range_condition('id', 10, None) == (" WHERE `id` > %s", [10])
+    assert synchronizer._key_range_condition('id', None, 20) == (" WHERE `id` <= %s", [20])
+    assert synchronizer._key_range_condition('id', 10, 20) == (" WHERE `id` > %s AND `id` <= %s", [10, 20])
+
+def test_key_range_condition_with_filter(synchronizer):
+    where_clause, params = synchronizer._key_range_condition('id', 10, None, "code LIKE 'A%'")
+    
+    # O '%' é duplicado: a consulta sempre é executada com parâmetros
+    assert where_clause == " WHERE `id` > %s AND (code LIKE 'A%%')"
+    assert params == [10]
+    assert synchronizer._key_range_condition('id', None, None, "ativo = 1") == (" WHERE (ativo = 1)", [])
+
+def mysql_row_hashes(synchronizer, column_names, rows):
+    """Avaliar a expressão de hash das linhas no SQLite com funções de semântica MySQL"""
+    conn = sqlite3.connect(':memory:')
+    conn.create_function('MD5', 1, lambda value: None if value is None else hashlib.md5(str(value).encode()).hexdigest())
+    conn.create_function('CONCAT', -1, lambda *values: None if None in values else ''.join(map(str, values)))
+    conn.create_function('CONCAT_WS', -1, lambda sep, *values: sep.join(str(value) for value in values if value is not None))
+    conn.create_function('MYSQL_ISNULL', 1, lambda value: 1 if value is None else 0)
+    
+    conn.execute(f"CREATE TABLE t (`{'`, `'.join(column_names)}`)")
+    conn.executemany(f"INSERT INTO t VALUES ({', '.join(['?'] * len(column_names))})", rows)
+    
+    # ISNULL é operador no SQLite; a função equivalente é registrada com outro nome
+    row_hash = synchronizer._row_hash_sql(column_names).replace('ISNULL(', 'MYSQL_ISNULL(')
+    return [row[0] for row in conn.execute(f"SELECT {row_hash} FROM t ORDER BY rowid")]
+
+def test_row_hash_distinguishes_null_from_empty_string(synchronizer):
+    hashes = mysql_row_hashes(synchronizer, ['id', 'nome'], [(1, None), (1, ''), (1, 'x')])
+    assert len(set(hashes)) == 3
+
+def test_row_hash_distinguishes_null_position(synchronizer):
+    hashes = mysql_row_hashes(synchronizer, ['a', 'b'], [(None, 'x'), ('x', None)])
+    assert hashes[0] != hashes[1]
+
+def test_row_hash_is_stable_for_equal_rows(synchronizer):
+    hashes = mysql_row_hashes(synchronizer, ['a', 'b'], [(1, 'x'), (1, 'x')])
+    assert hashes[0] == hashes[1]
+
+class KeyRangeTables:
+    """Origem e destino em memória ({chave: valor}) servidos pelos métodos de faixa do sincronizador"""
+    
+    def __init__(self, synchronizer, source, target):
+        self.data = {'source': source, 'target': target}
+        self.compared_ranges = []
+        synchronizer._key_range_checksum = self.checksum
+        synchronizer._next_key_boundary = self.next_boundary
+        synchronizer._apply_key_range_diff = self.apply_diff
+    
+    def keys(self, side, lower, upper):
+        return sorted(
+            key for key in self.data[side]
+            if (lower is None or key > lower) and (upper is None or key <= upper)
+        )
+    
+    def checksum(self, cursor, table, lower, upper):
+        keys = self.keys(cursor, lower, upper)
+        return len(keys), hash(tuple((key, self.data[cursor][key]) for key in keys))
+    
+    def next_boundary(self, cursor, table, lower, upper, rows):
+        keys = self.keys(cursor, lower, upper)[:rows]
+        return keys[-1] if keys else None
+    
+    def apply_diff(self, source_cursor, target_cursor, table, lower, upper, totals):
+        self.compared_ranges.append((lower, upper))
+
+def diff_ranges(synchronizer, source, target):
+    """Ranges comparados linha a linha por _diff_key_range sobre a tabela inteira"""
+    tables = KeyRangeTables(synchronizer, source, target)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        synchronizer._diff_key_range(executor, 'source', 'target', {}, None, max(source), {})
+    
+    return tables.compared_ranges
+
+def test_equal_ranges_are_not_split(synchronizer):
+    rows = {key: 'v' for key in range(1, 1001)}
+    assert diff_ranges(synchronizer, rows, dict(rows)) == []
+
+def test_only_changed_leaf_ranges_are_compared(synchronizer):
+    synchronizer.checksum_leaf_rows = 10
+    synchronizer.checksum_fanout = 4
+    source = {key: 'v' for key in range(1, 1001)}
+    target = {**source, 537: 'alterado'}
+    
+    ranges = diff_ranges(synchronizer, source, target)
+    
+    assert len(ranges) == 1
+    lower, upper = ranges[0]
+    assert lower < 537 <= upper
+    assert upper - lower <= synchronizer.checksum_leaf_rows
+
+def test_subranges_cover_the_parent_without_gaps(synchronizer):
+    synchronizer.checksum_leaf_rows = 10
+    synchronizer.checksum_fanout = 4
+    source = {key: 'v' for key in range(1, 201)}
+    
+    # Destino vazio: todas as faixas diferem e precisam ser comparadas
+    ranges = diff_ranges(synchronizer, source, {})
+    
+    assert ranges[0][0] is None and ranges[-1][1] == 200
+    assert all(previous[1] == current[0] for previous, current in zip(ranges, ranges[1:]))
+    assert all(upper - (lower or 0) <= synchronizer.checksum_leaf_rows for lower, upper in ranges)
+
+class RecordingCursor:
+    """Cursor que grava os comandos e responde às consultas do modo 'swap'"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def execute(self, sql, params=None):
+        self.connection.statements.append((' '.join(sql.split()), params))
+        if sql.startswith("RENAME") and self.connection.fail_rename:
+            raise RuntimeError("Lock wait timeout exceeded")
+        self.result = (50,) if 'lock_wait_timeout' in sql else (0,)
+    
+    def fetchone(self):
+        return self.result
+
+class RecordingConnection:
+    """Conexão de destino que grava os comandos executados"""
+    
+    def __init__(self, fail_rename=False):
+        self.statements = []
+        self.fail_rename = fail_rename
+    
+    def cursor(self, *args):
+        return RecordingCursor(self)
+    
+    def commit(self):
+        pass
+    
+    def rollback(self):
+        pass
+
+class NoIndexProfile:
+    """Perfil de carga sem índices adiados"""
+    
+    def defer_indexes(self, cursor, table_name):
+        return []
+    
+    def missing_indexes(self, cursor, table_name, reference_table):
+        return []
+    
+    def rebuild_indexes(self, cursor, table_name, index_clauses):
+        pass
+
+def run_swap(synchronizer, target_conn):
+    """Executar o modo 'swap' com a carga e a remoção em segundo plano substituídas"""
+    dropped = []
+    synchronizer.bulk_profile = NoIndexProfile()
+    synchronizer._get_single_primary_key = lambda cursor, schema, table_name: 'id'
+    synchronizer._sync_full_table_by_chunks = lambda *args, **kwargs: 5
+    synchronizer._drop_table_in_background = lambda connection_details, table_name: dropped.append(table_name)
+    
+    result = synchronizer._sync_full_table_by_swap(
+        'orders', ['id'], [], None, RecordingConnection(), target_conn, {}
+    )
+    return result, dropped
+
+def test_swap_uses_reserved_table_names(synchronizer):
+    target_conn = RecordingConnection()
+    result, dropped = run_swap(synchronizer, target_conn)
+    
+    assert result == 5
+    assert dropped == ['_orders_swap_old']
+    statements = [sql for sql, _ in target_conn.statements]
+    assert "DROP TABLE IF EXISTS `_orders_swap_old`" in statements
+    assert "CREATE TABLE `_orders_swap_new` LIKE `orders`" in statements
+    assert "RENAME TABLE `orders` TO `_orders_swap_old`, `_orders_swap_new` TO `orders`" in statements
+    assert not any('`orders_new`' in sql or '`orders_old`' in sql for sql in statements)
+
+@pytest.mark.parametrize('fail_rename', [False, True])
+def test_swap_restores_lock_wait_timeout(synchronizer, fail_rename):
+    target_conn = RecordingConnection(fail_rename)
+    result, _ = run_swap(synchronizer, target_conn)
+    
+    assert (result is None) == fail_rename
+    timeouts = [params for sql, params in target_conn.statements if sql.startswith("SET SESSION lock_wait_timeout")]
+    assert timeouts == [(synchronizer.swap_lock_wait_timeout,), (50,)]
+
+def test_swap_blocked_when_reserved_names_are_too_long(synchronizer):
+    assert synchronizer._swap_blocker(None, 'x' * 55) == "nome longo demais para a tabela sombra"
+
+def test_background_drop_does_not_keep_the_process_alive(synchronizer, monkeypatch):
+    threads = []
+    monkeypatch.setattr('threading.Thread.start', lambda thread: threads.append(thread))
+    
+    synchronizer._drop_table_in_background({}, '_orders_swap_old')
+    assert threads and threads[0].daemon
+
+class DescribeCursor:
+    """Cursor da origem que responde ao DESCRIBE"""
+    
+    def __init__(self, columns_info):
+        self.columns_info = columns_info
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def execute(self, sql, params=None):
+        pass
+    
+    def fetchall(self):
+        return self.columns_info
+
+class DescribeConnection:
+    """Conexão cujos cursores respondem ao DESCRIBE"""
+    
+    def __init__(self, columns_info):
+        self.columns_info = columns_info
+    
+    def cursor(self, *args):
+        return DescribeCursor(self.columns_info)
+
+COLUMNS_INFO = [('id', 'int', 'NO'), ('nome', 'varchar(50)', 'YES'), ('foto', 'longblob', 'NO')]
+
+def run_projected_full_sync(synchronizer, mode, key_columns):
+    """Carga completa com a coluna 'foto' fora da sincronização; retorna as estratégias chamadas"""
+    calls = []
+    synchronizer._project_columns = lambda cursor, table_name, columns_info, direction: columns_info[:2]
+    synchronizer._table_exists = lambda cursor, table_name: True
+    synchronizer._get_key_columns = lambda cursor, table_name: key_columns
+    synchronizer._get_single_primary_key = lambda cursor, schema, table_name: 'id'
+    synchronizer._sync_full_table_by_merge = (
+        lambda table_name, column_names, *args: calls.append(('merge', column_names)) or 3
+    )
+    synchronizer._propagate_deletes = lambda table_name, primary_key, *args: calls.append(('deletes', primary_key)) or 1
+    synchronizer._sync_full_table_by_chunks = (
+        lambda table_name, column_names, *args, **kwargs: calls.append(('chunks', column_names)) or 3
+    )
+    synchronizer._sync_full_table_by_swap = (
+        lambda table_name, column_names, *args: calls.append(('swap', column_names)) or 3
+    )
+    synchronizer._swap_blocker = lambda cursor, table_name, row_filter=None: None
+    
+    result = synchronizer._sync_full_table(
+        't', 'id', DescribeConnection(COLUMNS_INFO), DescribeConnection([]), None, 'to_prod', None, mode, {}
+    )
+    return result, calls
+
+@pytest.mark.parametrize('mode', ['replace', 'swap'])
+def test_projected_full_sync_upserts_instead_of_reloading(synchronizer, mode):
+    # Recriar as linhas zeraria 'foto'; o upsert a mantém e as exclusões completam o 'replace'
+    result, calls = run_projected_full_sync(synchronizer, mode, ['id'])
+    
+    assert calls == [('merge', ['id', 'nome']), ('deletes', 'id')]
+    assert result == 4
+    assert any("upsert" in message for message in synchronizer.logger.levels('warning'))
+
+def test_projected_full_sync_without_key_copies_every_column(synchronizer):
+    result, calls = run_projected_full_sync(synchronizer, 'replace', [])
+    
+    assert calls == [('chunks', ['id', 'nome', 'foto'])]
+    assert result == 3
+    assert any("ignorada" in message for message in synchronizer.logger.levels('warning'))
+
+def test_merge_mode_keeps_its_own_projection(synchronizer):
+    result, calls = run_projected_full_sync(synchronizer, 'merge', ['id'])
+    assert calls == [('merge', ['id', 'nome'])]
+
+class SQLiteFormatCursor:
+    """Cursor SQLite que aceita os marcadores %s do PyMySQL"""
+    
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+        self.statements = []
+    
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        self.cursor.execute(sql.replace('%s', '?'), list(params))
+    
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+def composite_key_table(rows):
+    """Tabela SQLite (a, b, v) com chave composta (a, b)"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (a INTEGER, b TEXT, v TEXT, PRIMARY KEY (a, b))")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", rows)
+    return conn
+
+def test_keyset_condition_is_expanded_column_by_column(synchronizer):
+    assert synchronizer._keyset_condition(['a', 'b']) == "(`a` >= %s AND ((`a` > %s) OR (`a` = %s AND `b` > %s)))"
+    assert synchronizer._keyset_params([1, 'x']) == [1, 1, 1, 'x']
+    assert synchronizer._keyset_params([1, 'x', 2]) == [1, 1, 1, 'x', 1, 'x', 2]
+
+def test_keyset_condition_matches_row_comparison(synchronizer):
+    rows = [(a, b, c) for a in range(3) for b in range(3) for c in range(3)]
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (a, b, c)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", rows)
+    condition = synchronizer._keyset_condition(['a', 'b', 'c']).replace('%s', '?')
+    
+    for last_key in rows:
+        selected = conn.execute(f"SELECT a, b, c FROM t WHERE {condition}", synchronizer._keyset_params(list(last_key)))
+        assert sorted(selected) == [row for row in rows if row > last_key]
+
+def test_keyset_pages_cover_the_table_once(synchronizer):
+    rows = [(a, b, f"{a}{b}") for a in range(4) for b in 'xyz']
+    cursor = SQLiteFormatCursor(composite_key_table(rows))
+    synchronizer.chunk_size = 5
+    
+    read = list(synchronizer._iter_keyset_rows(cursor, "SELECT a, b, v FROM t", ['a', 'b'], [0, 1]))
+    
+    assert read == rows
+    assert len(cursor.statements) == 3
+    assert not any('CAST' in sql or ') > (' in sql for sql in cursor.statements)
+
+def test_keyset_pages_with_filter(synchronizer):
+    rows = [(a, b, f"{a}{b}") for a in range(4) for b in 'xyz']
+    cursor = SQLiteFormatCursor(composite_key_table(rows))
+    synchronizer.chunk_size = 2
+    
+    read = list(synchronizer._iter_keyset_rows(cursor, "SELECT a, b, v FROM t", ['a', 'b'], [0, 1], "b <> 'y'"))
+    assert read == [row for row in rows if row[1] != 'y']
+
+class KeyTypeCursor:
+    """Cursor que responde à chave da tabela e ao tipo da sua coluna"""
+    
+    def __init__(self, key_columns, data_type):
+        self.key_columns = key_columns
+        self.data_type = data_type
+        self.result = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def execute(self, sql, params=None):
+        if 'KEY_COLUMN_USAGE' in sql:
+            self.result = [(column,) for column in self.key_columns]
+        elif 'DATA_TYPE' in sql:
+            self.result = [(self.data_type,)]
+        else:
+            self.result = []
+    
+    def fetchone(self):
+        return self.result[0] if self.result else None
+    
+    def fetchall(self):
+        return self.result
+
+class KeyTypeConnection(RecordingConnection):
+    """Conexão de destino para a escolha do anti-join das exclusões"""
+    
+    def __init__(self, key_columns, data_type):
+        super().__init__()
+        self.key_columns = key_columns
+        self.data_type = data_type
+    
+    def cursor(self, *args):
+        return KeyTypeCursor(self.key_columns, self.data_type)
+
+@pytest.mark.parametrize('key_columns, data_type, merge_join', [
+    (['codigo'], 'varchar', True),
+    (['codigo'], 'CHAR', True),
+    (['pedido_id', 'linha'], 'int', True),
+    (['id'], 'int', False),
+])
+def test_text_keys_are_compared_by_collation(synchronizer, key_columns, data_type, merge_join):
+    # Em collation case-insensitive ou PAD SPACE, 'abc' e 'ABC ' são a mesma chave
+    calls = []
+    synchronizer._merge_join_sync = lambda table_name, keys, columns, *args, **kwargs: calls.append((keys, kwargs)) or 0
+    
+    deleted = synchronizer._propagate_deletes('clientes', key_columns[0], None, KeyTypeConnection(key_columns, data_type))
+    
+    assert deleted == 0
+    assert calls == ([(key_columns, {'apply_upserts': False, 'apply_deletes': True, 'row_filter': None})] if merge_join else [])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do formato TSV dos backups (codificação compatível com LOAD DATA)
+"""
+
+import datetime
+import decimal
+import pytest
+from database.dump_format import DumpFormat
+
+def test_round_trip_preserves_special_characters():
+    dump_format = DumpFormat('none')
+    row = (None, 'tab\tlinha\nretorno\rbarra\\nulo\0fim', '', b'\x00\xff', 'N')
+    
+    line = dump_format.encode_row(row)
+    
+    assert line.count('\n') == 1 and line.endswith('\n')
+    assert line.count('\t') == len(row) - 1
+    assert dump_format.decode_line(line, {3}) == row
+
+def test_null_differs_from_literal_backslash_n():
+    dump_format = DumpFormat('none')
+    line = dump_format.encode_row((None, '\\N'))
+    assert dump_format.decode_line(line, set()) == (None, '\\N')
+
+def test_scalar_values_are_written_as_text():
+    dump_format = DumpFormat('none')
+    row = (42, decimal.Decimal('10.50'), 0.1, datetime.datetime(2024, 1, 2, 3, 4, 5))
+    
+    assert dump_format.decode_line(dump_format.encode_row(row), set()) == (
+        '42', '10.50', '0.1', '2024-01-02 03:04:05'
+    )
+
+@pytest.mark.parametrize('value, expected', [
+    (datetime.timedelta(hours=26, minutes=3), '26:03:00'),
+    (datetime.timedelta(hours=-1, seconds=-30), '-01:00:30'),
+    (datetime.timedelta(seconds=1, microseconds=5), '00:00:01.000005'),
+])
+def test_time_values(value, expected):
+    assert DumpFormat('none').encode_value(value) == expected
+
+@pytest.mark.parametrize('compression', ['gzip', 'none'])
+def test_file_round_trip(tmp_path, compression):
+    dump_format = DumpFormat(compression)
+    path = str(tmp_path / f"dados.tsv{'.gz' if compression == 'gzip' else ''}")
+    rows = [(1, 'a\tb', None), (2, 'ç', b'\x01')]
+    
+    with dump_format.open_writer(path) as writer:
+        for row in rows:
+            writer.write(dump_format.encode_row(row))
+    
+    with dump_format.open_reader(path) as reader:
+        decoded = [dump_format.decode_line(line, {2}) for line in reader]
+    
+    assert decoded == [('1', 'a\tb', None), ('2', 'ç', b'\x01')]
+
+def test_gzip_output_is_deterministic(tmp_path):
+    dump_format = DumpFormat('gzip')
+    paths = [str(tmp_path / 'a.tsv.gz'), str(tmp_path / 'b.tsv.gz')]
+    
+    for path in paths:
+        with dump_format.open_writer(path) as writer:
+            writer.write(dump_format.encode_row((1, 'x')))
+    
+    assert dump_format.file_checksum(paths[0]) == dump_format.file_checksum(paths[1])
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        DumpFormat('lzma')
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da carga dos arquivos de dados e dos objetos na restauração
+"""
+
+import os
+import pytest
+import pymysql
+from database.dump_format import DumpFormat
+from database.restore_engine import RestoreEngine
+
+TABLE = {'columns': ['id', 'nome'], 'hex_columns': []}
+
+class LoadCursor:
+    """Cursor que lê o arquivo do LOAD DATA como o PyMySQL faz com LOCAL INFILE"""
+    
+    def __init__(self, warnings=(), error=None):
+        self.warnings = list(warnings)
+        self.error = error
+        self.loaded = []
+    
+    def execute(self, sql, params=None):
+        if sql == "SHOW WARNINGS":
+            return 0
+        
+        if self.error:
+            raise self.error
+        
+        with open(params[0], 'rb') as data_file:
+            data = data_file.read()
+        self.loaded.append((params[0], data))
+        return data.count(b'\n')
+    
+    def fetchall(self):
+        return self.warnings
+
+class ObjectsCursor:
+    """Cursor que falha nos comandos que contêm um dos nomes informados"""
+    
+    def __init__(self, failing):
+        self.failing = failing
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, sql, params=None):
+        if any(name in sql for name in self.failing):
+            raise pymysql.err.OperationalError(1146, "Table doesn't exist")
+
+class ObjectsConnection:
+    """Conexão de teste para a recriação de views e triggers"""
+    
+    def __init__(self, failing):
+        self.failing = failing
+    
+    def cursor(self):
+        return ObjectsCursor(self.failing)
+    
+    def commit(self):
+        pass
+    
+    def close(self):
+        pass
+
+@pytest.fixture
+def engine(logger):
+    return RestoreEngine(logger)
+
+def write_data_file(path, compression, rows):
+    dump_format = DumpFormat(compression)
+    with dump_format.open_writer(str(path)) as writer:
+        writer.writelines(dump_format.encode_row(row) for row in rows)
+
+@pytest.mark.parametrize('compression', ['gzip', None])
+def test_compressed_file_is_streamed_without_temp_copy(engine, tmp_path, monkeypatch, compression):
+    data_path = tmp_path / 'clientes.00000.tsv.gz'
+    write_data_file(data_path, 'gzip', [(1, 'Ana'), (2, None)])
+    monkeypatch.setattr(engine, '_load_through_temp_file', None)
+    cursor = LoadCursor()
+    
+    rows = engine._load_with_load_data(cursor, str(data_path), compression, 'clientes', TABLE)
+    
+    loaded_path, data = cursor.loaded[0]
+    assert rows == 2
+    assert data == b'1\tAna\n2\t\\N\n'
+    assert not os.path.exists(loaded_path)
+
+def test_uncompressed_file_is_loaded_in_place(engine, tmp_path):
+    data_path = tmp_path / 'clientes.00000.tsv'
+    write_data_file(data_path, 'none', [(1, 'Ana')])
+    cursor = LoadCursor()
+    
+    assert engine._load_with_load_data(cursor, str(data_path), None, 'clientes', TABLE) == 1
+    assert cursor.loaded[0][0] == str(data_path)
+
+def test_load_error_before_opening_pipe_does_not_hang(engine, tmp_path):
+    data_path = tmp_path / 'clientes.00000.tsv.gz'
+    write_data_file(data_path, 'gzip', [(1, 'Ana')])
+    cursor = LoadCursor(error=pymysql.err.OperationalError(3948, 'Loading local data is disabled'))
+    
+    with pytest.raises(pymysql.err.OperationalError):
+        engine._load_with_load_data(cursor, str(data_path), 'gzip', 'clientes', TABLE)
+    assert os.listdir(tmp_path) == ['clientes.00000.tsv.gz']
+
+def test_load_warnings_fail_the_restore_load(engine, tmp_path):
+    data_path = tmp_path / 'clientes.00000.tsv.gz'
+    write_data_file(data_path, 'gzip', [(1, 'Ana'), (1, 'Ana')])
+    cursor = LoadCursor(warnings=[('Warning', 1062, "Duplicate entry '1' for key 'PRIMARY'")])
+    
+    with pytest.raises(pymysql.err.DataError, match='1062'):
+        engine._load_with_load_data(cursor, str(data_path), 'gzip', 'clientes', TABLE)
+
+def test_failed_views_and_triggers_are_returned(engine, tmp_path, monkeypatch):
+    for name in ('v_ativos', 'v_resumo', 'trg_auditoria'):
+        (tmp_path / f"{name}.sql").write_text(f"CREATE ... {name}", encoding='utf-8')
+    manifest = {
+        'views': [{'name': 'v_ativos', 'file': 'v_ativos.sql'}, {'name': 'v_resumo', 'file': 'v_resumo.sql'}],
+        'triggers': [{'name': 'trg_auditoria', 'file': 'trg_auditoria.sql'}]
+    }
+    monkeypatch.setattr(engine, '_create_connection', lambda details: ObjectsConnection({'v_resumo', 'trg_auditoria'}))
+    
+    assert engine._create_views_and_triggers(str(tmp_path), manifest, {}) == ['v_resumo', 'trg_auditoria']
+
+def test_views_and_triggers_without_connection_all_fail(engine, tmp_path, monkeypatch):
+    manifest = {'views': [{'name': 'v_ativos', 'file': 'v_ativos.sql'}], 'triggers': []}
+    monkeypatch.setattr(engine, '_create_connection', lambda details: None)
+    
+    assert engine._create_views_and_triggers(str(tmp_path), manifest, {}) == ['v_ativos']
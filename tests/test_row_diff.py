@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do merge-join entre linhas da origem e do destino
+"""
+
+from database.row_diff import RowDiff
+
+def rows(*pairs):
+    """Linhas (chave, valor) com a chave repetida como coluna de ordenação"""
+    return [(key, value, key) for key, value in pairs]
+
+def test_identical_streams_produce_no_events():
+    row_diff = RowDiff(2, [2])
+    assert list(row_diff.diff(rows((1, 'a'), (2, 'b')), rows((1, 'a'), (2, 'b')))) == []
+
+def test_insert_update_and_delete_events():
+    row_diff = RowDiff(2, [2])
+    source = rows((1, 'a'), (2, 'novo'), (4, 'd'))
+    target = rows((2, 'b'), (3, 'c'), (4, 'd'))
+    
+    assert list(row_diff.diff(source, target)) == [
+        ('insert', (1, 'a')),
+        ('update', (2, 'novo')),
+        ('delete', (3, 'c')),
+    ]
+
+def test_one_side_empty():
+    row_diff = RowDiff(2, [2])
+    assert list(row_diff.diff(rows((1, 'a')), [])) == [('insert', (1, 'a'))]
+    assert list(row_diff.diff([], rows((1, 'a')))) == [('delete', (1, 'a'))]
+
+def test_composite_key_uses_sort_columns_only():
+    # Colunas de dados (tenant, nome, valor) seguidas da ordenação (tenant, WEIGHT_STRING(nome))
+    row_diff = RowDiff(3, [3, 4])
+    source = [(1, 'B', 10, 1, b'b'), (2, 'a', 20, 2, b'a')]
+    target = [(1, 'b', 10, 1, b'b'), (2, 'a', 21, 2, b'a')]
+    
+    # Mesma chave pela collation ('B' = 'b'): valor de dados diferente vira update
+    assert list(row_diff.diff(source, target)) == [
+        ('update', (1, 'B', 10)),
+        ('update', (2, 'a', 20)),
+    ]
+
+def test_diff_is_lazy():
+    row_diff = RowDiff(2, [2])
+    
+    def endless():
+        key = 0
+        while True:
+            key += 1
+            yield (key, 'x', key)
+    
+    events = row_diff.diff(endless(), [])
+    assert next(events) == ('insert', (1, 'x'))
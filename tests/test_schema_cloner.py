@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da separação do SHOW CREATE TABLE em tabela, índices e chaves estrangeiras
+"""
+
+import pytest
+from database.schema_cloner import SchemaCloner
+
+CREATE_SQL = """CREATE TABLE `pedidos` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `cliente_id` int NOT NULL,
+  `codigo` varchar(20) NOT NULL,
+  `texto` text,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_codigo` (`codigo`),
+  KEY `idx_cliente` (`cliente_id`),
+  FULLTEXT KEY `ft_texto` (`texto`),
+  CONSTRAINT `fk_cliente` FOREIGN KEY (`cliente_id`) REFERENCES `clientes` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB AUTO_INCREMENT=1234 DEFAULT CHARSET=utf8mb4"""
+
+@pytest.fixture
+def cloner(logger):
+    return SchemaCloner(logger)
+
+def test_foreign_keys_are_always_deferred(cloner):
+    create_sql, index_clauses, foreign_key_clauses = cloner.split_create_table(CREATE_SQL)
+    
+    assert foreign_key_clauses == [
+        "ADD CONSTRAINT `fk_cliente` FOREIGN KEY (`cliente_id`) REFERENCES `clientes` (`id`) ON DELETE CASCADE"
+    ]
+    assert index_clauses == []
+    assert 'FOREIGN KEY' not in create_sql
+    assert "KEY `idx_cliente` (`cliente_id`)" in create_sql
+
+def test_secondary_indexes_deferred_on_request(cloner):
+    create_sql, index_clauses, _ = cloner.split_create_table(CREATE_SQL, defer_indexes=True)
+    
+    assert index_clauses == [
+        "ADD UNIQUE KEY `uk_codigo` (`codigo`)",
+        "ADD KEY `idx_cliente` (`cliente_id`)",
+        "ADD FULLTEXT KEY `ft_texto` (`texto`)",
+    ]
+    assert create_sql == (
+        "CREATE TABLE `pedidos` (\n"
+        "  `id` int NOT NULL AUTO_INCREMENT,\n"
+        "  `cliente_id` int NOT NULL,\n"
+        "  `codigo` varchar(20) NOT NULL,\n"
+        "  `texto` text,\n"
+        "  PRIMARY KEY (`id`)\n"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    )
+
+def test_auto_increment_option_is_removed(cloner):
+    create_sql, _, _ = cloner.split_create_table(CREATE_SQL)
+    assert 'AUTO_INCREMENT=' not in create_sql
+    assert '`id` int NOT NULL AUTO_INCREMENT' in create_sql
+
+def test_column_named_like_a_keyword_is_not_an_index(cloner):
+    create_sql, index_clauses, foreign_key_clauses = cloner.split_create_table(
+        "CREATE TABLE `t` (\n"
+        "  `key` int NOT NULL,\n"
+        "  `foreign` int DEFAULT NULL,\n"
+        "  PRIMARY KEY (`key`)\n"
+        ") ENGINE=InnoDB",
+        defer_indexes=True
+    )
+    
+    assert index_clauses == [] and foreign_key_clauses == []
+    assert '`foreign` int DEFAULT NULL' in create_sql
+
+def test_unparseable_statement_is_returned_unchanged(cloner):
+    assert cloner.split_create_table("CREATE VIEW `v` AS SELECT 1") == ("CREATE VIEW `v` AS SELECT 1", [], [])
+
+class ShowCreateCursor:
+    """Cursor que devolve um SHOW CREATE TABLE por comando do lote"""
+    
+    def __init__(self):
+        self.statements = []
+    
+    def execute(self, sql):
+        self.statements = sql.split(";\n")
+        self.index = 0
+    
+    def fetchone(self):
+        return ('tabela', self.statements[self.index])
+    
+    def nextset(self):
+        self.index += 1
+        return self.index < len(self.statements)
+
+def test_table_names_with_backticks_are_escaped(cloner):
+    statements = cloner._fetch_create_statements(ShowCreateCursor(), ['pedidos', 'a`b'])
+    
+    assert [sql for _, sql in statements] == ["SHOW CREATE TABLE `pedidos`", "SHOW CREATE TABLE `a``b`"]
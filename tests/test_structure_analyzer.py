@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do plano de reordenação de colunas (maior subsequência crescente)
+"""
+
+import itertools
+import pytest
+from database.structure_analyzer import StructureAnalyzer
+
+def apply_moves(source_order, target_order, moves):
+    """Simular MODIFY ... AFTER das colunas movidas, na ordem da origem"""
+    order = [name for name in target_order if name not in moves]
+    for name in source_order:
+        if name in moves:
+            index = source_order.index(name)
+            previous = source_order[index - 1] if index else None
+            order.insert(order.index(previous) + 1 if previous else 0, name)
+    return order
+
+@pytest.fixture
+def analyzer(logger):
+    return StructureAnalyzer(logger)
+
+def test_same_order_needs_no_moves(analyzer):
+    assert analyzer._plan_column_moves(['a', 'b', 'c'], ['a', 'b', 'c']) == []
+
+def test_single_column_moved_to_the_end(analyzer):
+    assert analyzer._plan_column_moves(['a', 'b', 'c', 'd'], ['b', 'c', 'd', 'a']) == ['a']
+
+def test_reversed_order_keeps_one_column(analyzer):
+    moves = analyzer._plan_column_moves(['a', 'b', 'c'], ['c', 'b', 'a'])
+    assert len(moves) == 2
+
+def test_moves_are_minimal_and_reach_source_order(analyzer):
+    source_order = ['a', 'b', 'c', 'd', 'e']
+    
+    for target_order in itertools.permutations(source_order):
+        target_order = list(target_order)
+        moves = analyzer._plan_column_moves(source_order, target_order)
+        
+        # Mínimo = n - maior subsequência comum (nomes únicos: LIS das posições)
+        longest = max(
+            size for size in range(len(source_order) + 1)
+            for subset in itertools.combinations(target_order, size)
+            if list(subset) == [name for name in source_order if name in subset]
+        )
+        assert len(moves) == len(source_order) - longest
+        assert apply_moves(source_order, target_order, moves) == source_order
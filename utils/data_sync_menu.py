@@ -16,7 +16,14 @@ class DataSyncMenu:
         self.logger = logger
         self.connection_manager = connection_manager
         self.config = DataSyncConfig(logger)
-        self.synchronizer = DataSynchronizer(logger)
+        self.synchronizer = DataSynchronizer(
+            logger,
+            connection_manager.settings.get_setting('data_sync_batch_size', 1000),
+            connection_manager.settings.get_setting('data_sync_loader', 'load_data'),
+            connection_manager.settings.get_setting('data_sync_bulk_profile', False),
+            connection_manager.settings.get_setting('data_sync_disable_binlog', False),
+            connection_manager.settings.get_setting('data_sync_checkpoint_max_age_hours', 24)
+        )
     
     def clear_screen(self):
         """Limpar a tela do terminal"""
@@ -141,8 +148,31 @@ class DataSyncMenu:
             
             primary_key = input(f"{Fore.CYAN}Coluna de chave primária (padrão: id): {Style.RESET_ALL}").strip() or "id"
             
+            full_sync_mode = "replace"
+            if sync_type == "full":
+                print(f"\n{Fore.YELLOW}Modos da sincronização completa:{Style.RESET_ALL}")
+                print(f"  {Fore.GREEN}1{Style.RESET_ALL} - Substituir (DELETE + INSERT na própria tabela)")
+                print(f"  {Fore.GREEN}2{Style.RESET_ALL} - Tabela sombra (carga em _<tabela>_swap_new e troca atômica)")
+                print(f"  {Fore.GREEN}3{Style.RESET_ALL} - Merge (insere/atualiza sem limpar o destino; para tabelas críticas)")
+                mode_choice = input(f"{Fore.CYAN}Modo (1-3, padrão: 1): {Style.RESET_ALL}").strip()
+                full_sync_mode = {"1": "replace", "2": "swap", "3": "merge"}.get(mode_choice, "replace")
+            
+            watermark_column = None
+            if sync_type == "incremental":
+                print(f"\n{Fore.YELLOW}Marca d'água: coluna de data de modificação (ex.: updated_at) ou, em tabelas só de inserção, a chave auto-incremento{Style.RESET_ALL}")
+                watermark_column = input(f"{Fore.CYAN}Coluna de marca d'água (vazio = detectar automaticamente): {Style.RESET_ALL}").strip() or None
+            
+            propagate_deletes = False
+            if sync_type in ("incremental", "key_only") or full_sync_mode == "merge":
+                answer = input(f"{Fore.CYAN}Remover no destino os registros excluídos na origem? (s/N): {Style.RESET_ALL}").strip().lower()
+                propagate_deletes = answer in ('s', 'sim')
+            
+            print(f"\n{Fore.YELLOW}Filtro de linhas: condição SQL sem o WHERE (ex.: tenant_id = 42); só essas linhas são sincronizadas{Style.RESET_ALL}")
+            row_filter = input(f"{Fore.CYAN}Filtro de linhas (WHERE, opcional): {Style.RESET_ALL}").strip() or None
+            
             # Adicionar tabela
-            if self.config.add_sync_table(table_name, description, sync_type, primary_key):
+            if self.config.add_sync_table(table_name, description, sync_type, primary_key, watermark_column, propagate_deletes,
+                                          row_filter, full_sync_mode):
                 # Configurar colunas automaticamente
                 if self.config.configure_table_columns(table_name, source_conn):
                     print(f"\n{Fore.GREEN}✓ Tabela '{table_name}' configurada com sucesso!{Style.RESET_ALL}")
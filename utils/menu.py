@@ -40,13 +40,14 @@ class Menu:
             ["6", "Sincronizar Dados", "Sincronizar dados entre ambientes"],
             ["7", "Visualizar Logs", "Ver histórico de operações"],
             ["8", "Gerenciar Backups", "Criar e gerenciar backups"],
+            ["9", "Clonar Banco de Dados", "Copiar estrutura e dados para um banco vazio"],
             ["0", "Sair", "Encerrar aplicação"]
         ]
         
         print(tabulate(options, headers=["Opção", "Ação", "Descrição"], 
                       tablefmt="grid", colalign=("center", "left", "left")))
         
-        choice = input(f"\n{Fore.CYAN}Escolha uma opção (0-8): {Style.RESET_ALL}").strip()
+        choice = input(f"\n{Fore.CYAN}Escolha uma opção (0-9): {Style.RESET_ALL}").strip()
         return choice
     
     def show_connection_menu(self):
@@ -80,14 +81,15 @@ class Menu:
         options = [
             ["1", "Criar Backup Manual", "Fazer backup de um banco específico"],
             ["2", "Listar Backups", "Ver backups disponíveis"],
-            ["3", "Restaurar Backup", "Restaurar backup (função informativa)"],
+            ["3", "Restaurar Backup", "Restaurar backup em um banco"],
+            ["4", "Buscar Backup", "Último backup antes da mudança de uma tabela"],
             ["0", "Voltar", "Retornar ao menu principal"]
         ]
         
         print(tabulate(options, headers=["Opção", "Ação", "Descrição"], 
                       tablefmt="grid", colalign=("center", "left", "left")))
         
-        choice = input(f"\n{Fore.CYAN}Escolha uma opção (0-3): {Style.RESET_ALL}").strip()
+        choice = input(f"\n{Fore.CYAN}Escolha uma opção (0-4): {Style.RESET_ALL}").strip()
         return choice
     
     def get_connection_details(self, connection_type):